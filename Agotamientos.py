@@ -0,0 +1,93 @@
+import numpy as np
+
+'''
+Registro estructurado de agotamientos de inventario
+Cada entrada es (tiempo, producto, cantidad no satisfecha) y se guarda en arreglos columnares que crecen al doble cuando se llenan;
+los motores registran una entrada por producto y minuto con demanda no satisfecha (no una por cliente rechazado).
+'''
+class RegistroAgotamientos:
+    CAPACIDAD_INICIAL = 256
+
+    # @param nombres (list) nombres de los productos (en el orden del catálogo)
+    def __init__(self, nombres):
+        self.nombres = list(nombres)
+        self._tiempos = np.empty(self.CAPACIDAD_INICIAL)
+        self._productos = np.empty(self.CAPACIDAD_INICIAL, dtype=np.int32)
+        self._cantidades = np.empty(self.CAPACIDAD_INICIAL, dtype=np.int64)
+        self.n_eventos = 0
+        # Tiempo en el que cada producto dejó por primera vez demanda sin satisfacer
+        self.tiempos_agotamiento = {}
+
+    def __len__(self):
+        return self.n_eventos
+
+    # Método que asegura espacio para n entradas adicionales
+    def _asegura(self, n):
+        requerido = self.n_eventos + n
+        if(requerido <= len(self._tiempos)):
+            return
+        capacidad = max(requerido, 2 * len(self._tiempos))
+        for nombre in ["_tiempos", "_productos", "_cantidades"]:
+            anterior = getattr(self, nombre)
+            nuevo = np.empty(capacidad, dtype=anterior.dtype)
+            nuevo[:self.n_eventos] = anterior[:self.n_eventos]
+            setattr(self, nombre, nuevo)
+
+    # Marca el tiempo de agotamiento del producto k si todavía no se había agotado
+    def marca(self, tiempo, k):
+        self.tiempos_agotamiento.setdefault(self.nombres[k], tiempo)
+
+    # Registra la cantidad no satisfecha del producto k en un tiempo
+    def registra(self, tiempo, k, cantidad):
+        if(cantidad <= 0):
+            return
+        self._asegura(1)
+        self._tiempos[self.n_eventos] = tiempo
+        self._productos[self.n_eventos] = k
+        self._cantidades[self.n_eventos] = cantidad
+        self.n_eventos += 1
+        self.marca(tiempo, k)
+
+    # Registra en bloque las cantidades no satisfechas de todos los productos en un tiempo (arreglo en el orden del catálogo)
+    def registraLote(self, tiempo, cantidades):
+        productos = np.nonzero(cantidades)[0]
+        if(len(productos) == 0):
+            return
+        self._asegura(len(productos))
+        fin = self.n_eventos + len(productos)
+        self._tiempos[self.n_eventos:fin] = tiempo
+        self._productos[self.n_eventos:fin] = productos
+        self._cantidades[self.n_eventos:fin] = np.asarray(cantidades)[productos]
+        self.n_eventos = fin
+        for k in productos.tolist():
+            self.marca(tiempo, k)
+
+    # Entradas registradas: (tiempos, índices de producto, cantidades no satisfechas)
+    def eventos(self):
+        return self._tiempos[:self.n_eventos], self._productos[:self.n_eventos], self._cantidades[:self.n_eventos]
+
+    # Cantidad no satisfecha total por producto
+    def porProducto(self):
+        totales = np.bincount(self._productos[:self.n_eventos], weights=self._cantidades[:self.n_eventos], minlength=len(self.nombres))
+        return {nombre: int(total) for nombre, total in zip(self.nombres, totales)}
+
+    # Entradas como dataframe con columnas tiempo, producto y cantidad_no_satisfecha
+    def aDataFrame(self):
+        import pandas as pd
+        tiempos, productos, cantidades = self.eventos()
+        return pd.DataFrame({"tiempo": tiempos, "producto": np.asarray(self.nombres, dtype=object)[productos], "cantidad_no_satisfecha": cantidades})
+
+    # Copia independiente del registro (para los resultados intermedios)
+    def copia(self):
+        copia = RegistroAgotamientos(self.nombres)
+        copia._asegura(self.n_eventos)
+        tiempos, productos, cantidades = self.eventos()
+        copia._tiempos[:self.n_eventos] = tiempos
+        copia._productos[:self.n_eventos] = productos
+        copia._cantidades[:self.n_eventos] = cantidades
+        copia.n_eventos = self.n_eventos
+        copia.tiempos_agotamiento = dict(self.tiempos_agotamiento)
+        return copia
+
+    def __str__(self):
+        return 'Agotamientos: ' + str(self.n_eventos) + ' eventos, productos agotados ' + str(self.tiempos_agotamiento)
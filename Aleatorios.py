@@ -0,0 +1,284 @@
+import math
+import numpy as np
+
+'''
+Flujos de números aleatorios reproducibles e independientes para la simulación de Colmena
+Cada fase (y cada producto dentro de una fase) obtiene su propio numpy.random.Generator derivado de una sola semilla,
+de modo que una misma semilla reproduce la simulación bit a bit, en un solo proceso o repartida en varios procesos
+'''
+
+# Identificador estable de cada fase de la simulación (forma parte de la llave con la que se deriva cada flujo)
+FASES = {
+    "clientes": 0,
+    "muestreo": 1,
+    "cantidades": 2,
+    "descuentos": 3,
+    "clientes_extemporaneos": 4,
+    "muestreo_extemporaneos": 5,
+    "llegadas": 6,
+    "cantidades_tiempo": 7,
+    "descuentos_tiempo": 8,
+    "descuentos_estaticos": 9,
+}
+
+
+'''
+Generador con bloques pre-extraídos: las extracciones escalares (sin size) se sirven de una lista que se rellena
+en bloque, así cada llamada escalar no paga el costo de una llamada a NumPy. Las extracciones con size van directo al generador.
+Implementa el subconjunto de la interfaz de numpy.random.Generator que utiliza la simulación.
+'''
+class GeneradorEnBloques:
+    # Tamaño del primer bloque y tamaño máximo (el bloque crece al doble en cada relleno)
+    BLOQUE_INICIAL = 64
+    BLOQUE_MAXIMO = 8192
+
+    # @param rng (np.random.Generator) generador del flujo
+    def __init__(self, rng):
+        self.rng = rng
+        # llave (método, parámetros): [bloque, posición, tamaño del siguiente bloque]
+        self._bloques = {}
+
+    def _siguiente(self, llave, extrae):
+        bloque = self._bloques.get(llave)
+        if(bloque is None or bloque[1] == len(bloque[0])):
+            tam = self.BLOQUE_INICIAL if bloque is None else bloque[2]
+            bloque = [extrae(tam).tolist(), 0, min(2 * tam, self.BLOQUE_MAXIMO)]
+            self._bloques[llave] = bloque
+        valor = bloque[0][bloque[1]]
+        bloque[1] += 1
+        return valor
+
+    def random(self, size = None):
+        if(size is not None):
+            return self.rng.random(size)
+        return self._siguiente(("random",), self.rng.random)
+
+    def beta(self, a, b, size = None):
+        if(size is not None):
+            return self.rng.beta(a, b, size)
+        return self._siguiente(("beta", a, b), lambda n: self.rng.beta(a, b, n))
+
+    def exponential(self, scale = 1.0, size = None):
+        if(size is not None or not np.isscalar(scale)):
+            return self.rng.exponential(scale, size)
+        return self._siguiente(("exponential", scale), lambda n: self.rng.exponential(scale, n))
+
+    def poisson(self, lam, size = None):
+        if(size is not None or not np.isscalar(lam)):
+            return self.rng.poisson(lam, size)
+        return self._siguiente(("poisson", lam), lambda n: self.rng.poisson(lam, n))
+
+    def integers(self, low, high = None, size = None):
+        if(size is not None or not np.isscalar(low) or not np.isscalar(high)):
+            return self.rng.integers(low, high, size)
+        return self._siguiente(("integers", low, high), lambda n: self.rng.integers(low, high, n))
+
+    def choice(self, *args, **kwargs):
+        return self.rng.choice(*args, **kwargs)
+
+
+# Malla de la inversa de la beta: puntos más densos cerca de 0 y de 1 (nodos de Chebyshev)
+PUNTOS_BETA = 4097
+# Uniformes acotados a (0, 1) para que las inversas (logaritmos, colas) sean finitas también en la réplica antitética
+UNIFORME_MINIMO = 2.0 ** -54
+UNIFORME_MAXIMO = 1.0 - 2.0 ** -53
+# Tablas de las inversas por parámetros (función de distribución de la Poisson y malla de la beta), compartidas por
+# todos los generadores del proceso
+_TABLAS = {}
+
+
+# Función beta incompleta regularizada I_x(a, b) por fracciones continuas (Numerical Recipes, betacf), vectorizada en x
+def betaIncompleta(x, a, b, iteraciones = 300):
+    x = np.asarray(x, dtype=float)
+    resultado = np.zeros_like(x)
+    resultado[x >= 1] = 1.0
+    interior = (x > 0) & (x < 1)
+    x_int = x[interior]
+    log_bt = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * np.log(x_int) + b * np.log1p(-x_int)
+    directa = x_int < (a + 1) / (a + b + 2)
+    valores = np.empty_like(x_int)
+    valores[directa] = np.exp(log_bt[directa]) * _fraccionBeta(x_int[directa], a, b, iteraciones) / a
+    valores[~directa] = 1 - np.exp(log_bt[~directa]) * _fraccionBeta(1 - x_int[~directa], b, a, iteraciones) / b
+    resultado[interior] = np.clip(valores, 0, 1)
+    return resultado
+
+
+def _fraccionBeta(x, a, b, iteraciones):
+    minimo = 1e-300
+    qab, qap, qam = a + b, a + 1, a - 1
+    c = np.ones_like(x)
+    d = 1 - qab * x / qap
+    d = 1 / np.where(np.abs(d) < minimo, minimo, d)
+    h = d.copy()
+    for m in range(1, iteraciones + 1):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)), -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1 + aa * d
+            d = 1 / np.where(np.abs(d) < minimo, minimo, d)
+            c = 1 + aa / c
+            c = np.where(np.abs(c) < minimo, minimo, c)
+            delta = d * c
+            h *= delta
+        # Todas las fracciones convergieron
+        if(np.all(np.abs(delta - 1) < 1e-15)):
+            break
+    return h
+
+
+'''
+Generador por inversión: cada extracción es la inversa de la función de distribución evaluada en un uniforme, así cada
+extracción consume exactamente un uniforme y es monótona en él. Con la misma semilla, dos escenarios que cambian parámetros
+(por ejemplo forma_a, forma_b o las tasas) reciben los mismos uniformes en cada extracción (números aleatorios comunes
+alineados, lo que no ocurre con los algoritmos de rechazo de NumPy), y la réplica antitética (uniformes 1 - u) produce
+extracciones con correlación negativa. Misma interfaz que GeneradorEnBloques.
+'''
+class GeneradorInversion:
+    BLOQUE_INICIAL = 64
+    BLOQUE_MAXIMO = 8192
+
+    # @param rng (np.random.Generator) generador de los uniformes
+    # @param antitetico (bool) utiliza 1 - u en lugar de u
+    def __init__(self, rng, antitetico = False):
+        self.rng = rng
+        self.antitetico = antitetico
+        # Uniformes pre-extraídos para las extracciones escalares: [bloque, posición, tamaño del siguiente bloque]
+        self._bloque = [[], 0, self.BLOQUE_INICIAL]
+
+    def _uniformes(self, size):
+        u = self.rng.random(size)
+        return np.clip(1 - u if self.antitetico else u, UNIFORME_MINIMO, UNIFORME_MAXIMO)
+
+    def _uniforme(self):
+        bloque = self._bloque
+        if(bloque[1] == len(bloque[0])):
+            bloque[0] = self._uniformes(bloque[2]).tolist()
+            bloque[1] = 0
+            bloque[2] = min(2 * bloque[2], self.BLOQUE_MAXIMO)
+        valor = bloque[0][bloque[1]]
+        bloque[1] += 1
+        return valor
+
+    # Uniformes para una extracción: escalar (del bloque) o arreglo del tamaño indicado (o del tamaño de los parámetros)
+    def _extraccion(self, size, *parametros):
+        forma = np.broadcast(*parametros).shape if parametros else ()
+        if(size is None and forma == ()):
+            return None, self._uniforme()
+        return forma, self._uniformes(size if size is not None else forma)
+
+    def random(self, size = None):
+        return self._uniforme() if size is None else self._uniformes(size)
+
+    def exponential(self, scale = 1.0, size = None):
+        forma, u = self._extraccion(size, scale)
+        valores = -np.asarray(scale) * np.log1p(-np.asarray(u))
+        return float(valores) if forma is None else valores
+
+    def integers(self, low, high = None, size = None):
+        if(high is None):
+            low, high = 0, low
+        low, high = np.asarray(low), np.asarray(high)
+        if(np.any(high <= low)):
+            raise ValueError('low >= high')
+        forma, u = self._extraccion(size, low, high)
+        valores = low + np.minimum(np.floor(np.asarray(u) * (high - low)), high - low - 1).astype(np.int64)
+        return int(valores) if forma is None else valores
+
+    # Función de distribución de la Poisson hasta una cola despreciable (en caché por tasa)
+    def _tablaPoisson(self, lam):
+        llave = ("poisson", lam)
+        if(llave not in _TABLAS):
+            k = np.arange(int(lam + 12 * math.sqrt(lam) + 20))
+            log_factorial = np.concatenate(([0.0], np.cumsum(np.log(k[1:]))))
+            acumulada = np.cumsum(np.exp(k * math.log(lam) - lam - log_factorial))
+            acumulada[-1] = 1.0
+            _TABLAS[llave] = acumulada
+        return _TABLAS[llave]
+
+    def poisson(self, lam = 1.0, size = None):
+        forma, u = self._extraccion(size, lam)
+        u = np.asarray(u)
+        lam = np.broadcast_to(lam, u.shape)
+        valores = np.zeros(u.shape, dtype=np.int64)
+        for valor in np.unique(lam):
+            if(valor > 0):
+                seleccion = lam == valor
+                valores[seleccion] = np.searchsorted(self._tablaPoisson(float(valor)), u[seleccion], side="right")
+        return int(valores) if forma is None else valores
+
+    # Malla (x, I_x(a, b)) de la función de distribución de la beta (en caché por parámetros)
+    def _tablaBeta(self, a, b):
+        llave = ("beta", a, b)
+        if(llave not in _TABLAS):
+            x = (1 - np.cos(np.pi * np.linspace(0, 1, PUNTOS_BETA))) / 2
+            _TABLAS[llave] = (x, betaIncompleta(x, a, b))
+        return _TABLAS[llave]
+
+    def beta(self, a, b, size = None):
+        forma, u = self._extraccion(size)
+        x, acumulada = self._tablaBeta(float(a), float(b))
+        valores = np.interp(u, acumulada, x)
+        return float(valores) if forma is None else valores
+
+    def choice(self, a, size = None, replace = True, p = None):
+        n = a if np.isscalar(a) else len(a)
+        if(replace or size is None):
+            if(p is None):
+                indices = self.integers(0, n, size)
+            else:
+                acumulada = np.cumsum(p)
+                u = self.random(size)
+                indices = np.minimum(np.searchsorted(acumulada / acumulada[-1], u, side="right"), n - 1)
+        else:
+            # Algoritmo de Floyd: k extracciones (una por elemento) sin reemplazo
+            k = int(np.prod(size))
+            if(k > n):
+                raise ValueError('Cannot take a larger sample than population when replace is False')
+            if(p is not None):
+                raise ValueError('El generador por inversión no implementa choice sin reemplazo con probabilidades')
+            elegidos = {}
+            u = self._uniformes(k)
+            for i, j in enumerate(range(n - k, n)):
+                t = min(int(u[i] * (j + 1)), j)
+                elegidos[j if t in elegidos else t] = True
+            indices = np.fromiter(elegidos, dtype=np.int64, count=k).reshape(size)
+        return indices if np.isscalar(a) else np.asarray(a)[indices]
+
+
+# Semilla raíz de la que se derivan otras (réplicas, variantes): un entero (o None) se convierte en SeedSequence y una
+# SeedSequence se copia, así derivar semillas (spawn) no cambia la del usuario y la misma semilla siempre da las mismas réplicas
+def semillaRaiz(semilla):
+    if(not isinstance(semilla, np.random.SeedSequence)):
+        return np.random.SeedSequence(semilla)
+    return np.random.SeedSequence(semilla.entropy, spawn_key = semilla.spawn_key, pool_size = semilla.pool_size, n_children_spawned = semilla.n_children_spawned)
+
+
+'''
+Conjunto de flujos aleatorios de una simulación
+'''
+class FlujosAleatorios:
+    # @param semilla (int, SeedSequence o None) semilla de la simulación (None toma entropía del sistema)
+    # @param inversion (bool) generadores por inversión (GeneradorInversion) para números aleatorios comunes alineados
+    # @param antitetico (bool) réplica antitética de la misma semilla (implica inversion)
+    def __init__(self, semilla = None, inversion = False, antitetico = False):
+        if(not isinstance(semilla, np.random.SeedSequence)):
+            semilla = np.random.SeedSequence(semilla)
+        self.semilla = semilla
+        self.inversion = inversion or antitetico
+        self.antitetico = antitetico
+        self._flujos = {}
+
+    # Semilla del flujo de una fase (y opcionalmente de un producto); depende solo de la llave, no del orden en que se piden los flujos
+    def semillaDe(self, fase, producto = None):
+        llave = (FASES[fase],) if producto is None else (FASES[fase], int(producto) + 1)
+        return np.random.SeedSequence(self.semilla.entropy, spawn_key = self.semilla.spawn_key + llave, pool_size = self.semilla.pool_size)
+
+    # Generador de una fase (y opcionalmente de un producto) con bloques pre-extraídos para las extracciones escalares
+    def generador(self, fase, producto = None):
+        llave = (fase, producto)
+        if(llave not in self._flujos):
+            rng = np.random.default_rng(self.semillaDe(fase, producto))
+            self._flujos[llave] = GeneradorInversion(rng, self.antitetico) if self.inversion else GeneradorEnBloques(rng)
+        return self._flujos[llave]
+
+    def __str__(self):
+        return 'Flujos aleatorios: entropía ' + str(self.semilla.entropy) + ' llave ' + str(self.semilla.spawn_key) + ' (' + str(len(self._flujos)) + ' flujos)'
@@ -1,49 +1,91 @@
 import numpy as np
 import random 
 from Cliente import Cliente
+from PoblacionClientes import PoblacionClientes
+
+# Todas las funciones aleatorias reciben opcionalmente un generador (rng) de tipo numpy.random.Generator
+# (o GeneradorEnBloques); si no se indica se utiliza el estado global de np.random
 
 # Algoritmo que simula la cantidad de clientes que solicitan un producto determinado
 # en un periodo de tiempo determinado (utilizamos una variable aleatoria de Poisson)
 '''
 @param: lambda = tasa de llegada de clientes en un periodo de tiempo determinado
 '''
-def simularDemanda(lambda_):
-    return np.random.poisson(lambda_)
+def simularDemanda(lambda_, rng=None):
+    return (rng or np.random).poisson(lambda_)
 
 # Función que simula si un cliente compra un producto o no (utilizamos una variable aleatoria de Bernoulli)
 '''
 @param: p = probabilidad de que un cliente compre un producto
 '''
-def simularCompra(p):
-    return np.random.binomial(1, p)
+def simularCompra(p, rng=None):
+    return (rng or np.random).binomial(1, p)
 
 # Función que simula la tasa con la que se darán descuentos a los clientes (utilizamos una beta con parámetros 0.5, 0.5)
-def simularTasaDescuento(a, b):
+# @param: size = cantidad de descuentos a simular en bloque (None para un solo valor)
+def simularTasaDescuento(a, b, size=None, rng=None):
     # Se puede ver como un descuento personalizado a medida que se simula de una distribución beta para cada cliente
     # Si los descuentos son estáticos, se modifica esta función para que de acuerdo a un diccionario regrese un valor predeterminado 
-    return np.random.beta(a, b)
+    return (rng or np.random).beta(a, b, size)
+
+# Función que simula en bloque la cantidad total que solicitan n clientes de un producto agotado (ninguno se puede satisfacer)
+# Cada cliente solicita una cantidad uniforme discreta en [baja, alta), como en las dinámicas
+def simulaCantidadNoSatisfecha(n, baja, alta, rng=None):
+    if(n <= 0):
+        return 0
+    if(rng is None):
+        return int(np.random.randint(baja, alta, n).sum())
+    return int(rng.integers(baja, alta, n).sum())
+
+# Función que atiende en orden de llegada a los clientes de un producto con inventario limitado (como el motor clásico):
+# un cliente se atiende si su cantidad cabe en el inventario restante; si no cabe se rechaza y se sigue con el siguiente
+# (que puede pedir menos), y cuando el inventario se acaba ya no se atiende a nadie
+# @param: cantidades = cantidad que solicita cada cliente (en orden de llegada); restante = inventario disponible
+# @return: arreglo booleano con los clientes atendidos
+def atiendeEnOrden(cantidades, restante):
+    atendido = np.zeros(len(cantidades), dtype=bool)
+    for j, cantidad in enumerate(cantidades.tolist()):
+        if(restante <= 0):
+            break
+        if(cantidad <= restante):
+            atendido[j] = True
+            restante -= cantidad
+    return atendido
 
 # Función para calcular el espacio del cargamento (se basa con la columna de productos_solicitados, peso y dimensiones)
+# (producto punto de las cantidades con el volumen y con el peso unitarios, sin recorrer los productos en Python)
 def calculaEspacioCargamento(productos):
-    espacio = 0
-    peso_total = 0 
-    for cantidad, peso, dimensiones in zip(productos['productos_solicitados'], productos['peso'], productos['dimensiones']):
-        # Sumamos la cantidad de los productos por el volumen (dimensiones)
-        espacio +=cantidad * dimensiones
-        # Sumamos la cantidad de los productos por el peso
-        peso_total += cantidad * peso
+    cantidades = np.asarray(productos['productos_solicitados'], dtype=float)
+    # Sumamos la cantidad de los productos por el volumen (dimensiones)
+    espacio = float(cantidades @ np.asarray(productos['dimensiones'], dtype=float))
+    # Sumamos la cantidad de los productos por el peso
+    peso_total = float(cantidades @ np.asarray(productos['peso'], dtype=float))
     return espacio, peso_total
 
 # Algoritmos que simulan listas de clientes que compran productos
-def simulaClientes(lambda_): 
+# @param: segmentacion = clusters aprendidos de las canastas (Segmentacion); si se indica, el cluster de cada cliente sigue sus proporciones
+def simulaClientes(lambda_, segmentacion=None): 
     clientes = []
-    for i in range(simularDemanda(lambda_)):
-        clientes.append(Cliente(i, 'Cliente ' + str(i), 'Direccion ' + str(i), 'Telefono ' + str(i), np.random.randint(1, 5)))
+    n = simularDemanda(lambda_)
+    clusters = np.random.randint(1, 5, n) if segmentacion is None else segmentacion.muestreaClusters(n, np.random.default_rng(np.random.randint(2**31)))
+    for i in range(n):
+        clientes.append(Cliente(i, 'Cliente ' + str(i), 'Direccion ' + str(i), 'Telefono ' + str(i), int(clusters[i])))
     return clientes
 
+# Algoritmo que simula una población de clientes en formato columnar (sin crear un objeto Cliente por llegada)
+# @param: nombres_productos = nombres de los productos que pueden ir en las canastas de los clientes
+# @param: segmentacion = clusters aprendidos de las canastas (Segmentacion); si se indica, el cluster de cada cliente sigue sus proporciones
+def simulaPoblacionClientes(lambda_, nombres_productos, rng=None, segmentacion=None):
+    n = simularDemanda(lambda_, rng)
+    if(segmentacion is not None):
+        clusters = segmentacion.muestreaClusters(n, rng)
+    else:
+        clusters = np.random.randint(1, 5, n) if rng is None else rng.integers(1, 5, size=n)
+    return PoblacionClientes(clusters, nombres_productos)
+
 
 # Función para calcular los ingresos por ventas considerando que se han aplicado descuentos por venta
-# @param: dict (DESCUENTOS) para cada producto 
+# @param: dict (DESCUENTOS) para cada producto: lista de unidades con descuento o su suma acumulada (LibroIngresos)
 def calculaIngresosConDescuento(DESCUENTOS, productos):
     ingresos = 0 
     ingresos_por_producto = {}
@@ -52,7 +94,11 @@ def calculaIngresosConDescuento(DESCUENTOS, productos):
             # Obtenemos los items que no tienen descuento 
             # Vamos a crear un vector de 1's de tamaño len(DESCUENTOS[producto])
             #                   precio_i * sum( (1- descuento_i)) * numero_self.DESCUENTOS_APLICADOS + items_sin_descuento * precio_i
-            ingresos_producto = precio * sum(DESCUENTOS[producto])
+            unidades = DESCUENTOS[producto]
+            # El libro de ingresos ya guarda la suma acumulada; las listas se suman
+            if(not np.isscalar(unidades)):
+                unidades = sum(unidades)
+            ingresos_producto = precio * unidades
             ingresos = ingresos + ingresos_producto
             ingresos_por_producto[producto] = ingresos_producto
         else: 
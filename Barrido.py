@@ -0,0 +1,154 @@
+import os
+import json
+import pickle
+import hashlib
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from Replicaciones import run_replications
+
+'''
+Barridos de parámetros de la simulación de Colmena con caché local de resultados
+Cada punto del barrido se identifica por un hash estable de su query (incluyendo el contenido del dataframe de productos),
+del número de réplicas, de la semilla y del motor, y sus resultados agregados se guardan en disco.
+'''
+
+# Huella de un valor de la query por su contenido (no por su representación como texto)
+# Arreglos por sus bytes, dataframes por su CSV y los objetos de la simulación por su método llave();
+# cualquier otro valor tiene que ser de tipos de JSON
+def huellaValor(valor):
+    import pandas as pd
+    if(valor is None or isinstance(valor, (bool, int, float, str))):
+        return valor
+    if(isinstance(valor, np.generic)):
+        return valor.item()
+    if(isinstance(valor, np.ndarray)):
+        h = hashlib.sha256(np.ascontiguousarray(valor).tobytes())
+        return {"ndarray": [str(valor.dtype), list(valor.shape), h.hexdigest()]}
+    if(isinstance(valor, (pd.DataFrame, pd.Series))):
+        return {type(valor).__name__: hashlib.sha256(valor.to_csv(index=True).encode()).hexdigest()}
+    if(callable(getattr(valor, "llave", None))):
+        return {type(valor).__name__: valor.llave()}
+    if(isinstance(valor, dict)):
+        return {str(llave): huellaValor(v) for llave, v in valor.items()}
+    if(isinstance(valor, (list, tuple))):
+        return [huellaValor(v) for v in valor]
+    raise TypeError(f'No se puede calcular la llave de un valor de tipo {type(valor).__name__} (se esperaba un valor de JSON, un arreglo, un dataframe o un objeto con llave())')
+
+
+# Función que calcula la llave estable (sha256) de un punto del barrido
+# @param query (dict) query de Simulacion (cada valor se incluye por su contenido, ver huellaValor)
+# @param extras (dict) otros valores que determinan el resultado (réplicas, semilla, motor)
+def llaveQuery(query, extras = None):
+    h = hashlib.sha256()
+    h.update(json.dumps(huellaValor(dict(query)), sort_keys=True).encode())
+    h.update(json.dumps(huellaValor(extras or {}), sort_keys=True).encode())
+    return h.hexdigest()
+
+
+'''
+Caché de resultados en un directorio local (un archivo por llave) con desalojo por tamaño:
+cuando el tamaño total supera el máximo se borran primero los resultados usados hace más tiempo
+'''
+class CacheResultados:
+    # @param directorio (str) directorio de la caché
+    # @param tam_maximo (int) tamaño máximo de la caché en bytes
+    def __init__(self, directorio = ".cache_colmena", tam_maximo = 256 * 1024 * 1024):
+        self.directorio = directorio
+        self.tam_maximo = tam_maximo
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, llave):
+        return os.path.join(self.directorio, llave + ".pkl")
+
+    # Regresa el resultado guardado para la llave (None si no existe)
+    def obtiene(self, llave):
+        ruta = self._ruta(llave)
+        try:
+            with open(ruta, "rb") as archivo:
+                valor = pickle.load(archivo)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # Marcamos el resultado como usado recientemente
+        os.utime(ruta)
+        return valor
+
+    # Guarda el resultado de una llave y desaloja resultados antiguos si se excede el tamaño máximo
+    def guarda(self, llave, valor):
+        ruta = self._ruta(llave)
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as archivo:
+            pickle.dump(valor, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+        self.desaloja()
+
+    # Borra los resultados usados hace más tiempo hasta que la caché quede por debajo del tamaño máximo
+    def desaloja(self):
+        archivos = []
+        for nombre in os.listdir(self.directorio):
+            if(nombre.endswith(".pkl")):
+                estado = os.stat(os.path.join(self.directorio, nombre))
+                archivos.append((estado.st_mtime, estado.st_size, nombre))
+        total = sum(tam for _, tam, _ in archivos)
+        for _, tam, nombre in sorted(archivos):
+            if(total <= self.tam_maximo):
+                break
+            os.remove(os.path.join(self.directorio, nombre))
+            total -= tam
+
+    def __len__(self):
+        return sum(1 for nombre in os.listdir(self.directorio) if nombre.endswith(".pkl"))
+
+
+# Función que genera los puntos del barrido (producto cartesiano de los rangos)
+# @param rangos (dict) parámetro de la query: lista de valores (por ejemplo {"forma_a": [2, 3], "tiempo": [60, 85]})
+def puntosBarrido(rangos):
+    nombres = list(rangos)
+    return [dict(zip(nombres, valores)) for valores in itertools.product(*[rangos[nombre] for nombre in nombres])]
+
+
+def _corre_punto(query, n, semilla, engine):
+    return run_replications(query, n, workers = 1, semilla = semilla, engine = engine)
+
+
+# Función que ejecuta un barrido de parámetros; solo se simulan los puntos que no están en la caché
+# @param query (dict) query base de Simulacion
+# @param rangos (dict) parámetro: lista de valores a barrer
+# @param n (int) réplicas por punto
+# @param workers (int) número de procesos (None utiliza todos los núcleos)
+# @param semilla (int) semilla de las réplicas (la misma en todos los puntos, para compararlos con números aleatorios comunes)
+# @param cache (CacheResultados) caché de resultados (None crea una en el directorio por defecto); los puntos cuya query no
+#        tiene llave estable (ver huellaValor, por ejemplo una curva_precio que es una función) se simulan siempre y no se guardan
+# @return (list) por punto: {"parametros", "resumen", "en_cache"}
+def barrido(query, rangos, n = 100, workers = None, semilla = 0, cache = None, engine = "vectorizado"):
+    cache = CacheResultados() if cache is None else cache
+    extras = {"n": n, "semilla": semilla, "engine": engine}
+    puntos = []
+    for parametros in puntosBarrido(rangos):
+        query_punto = dict(query)
+        query_punto.update(parametros)
+        try:
+            llave = llaveQuery(query_punto, extras)
+        except TypeError:
+            # Sin llave estable (por ejemplo, una curva_precio que es una función) el punto se simula sin pasar por la caché
+            llave = None
+        puntos.append({"parametros": parametros, "query": query_punto, "llave": llave, "resumen": None if llave is None else cache.obtiene(llave)})
+    puntos_nuevos = [punto for punto in puntos if punto["resumen"] is None]
+    for punto in puntos:
+        punto["en_cache"] = punto["resumen"] is not None
+
+    if(workers is None):
+        workers = os.cpu_count() or 1
+    if(len(puntos_nuevos) >= workers and workers > 1):
+        # Hay suficientes puntos nuevos para repartirlos entre los procesos (cada proceso corre las réplicas de un punto)
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            resumenes = list(pool.map(_corre_punto, [p["query"] for p in puntos_nuevos], [n] * len(puntos_nuevos), [semilla] * len(puntos_nuevos), [engine] * len(puntos_nuevos)))
+    else:
+        # Pocos puntos nuevos: se reparten las réplicas de cada punto entre los procesos
+        resumenes = [run_replications(p["query"], n, workers = workers, semilla = semilla, engine = engine) for p in puntos_nuevos]
+
+    for punto, resumen in zip(puntos_nuevos, resumenes):
+        punto["resumen"] = resumen
+        if(punto["llave"] is not None):
+            cache.guarda(punto["llave"], resumen)
+    return [{"parametros": p["parametros"], "resumen": p["resumen"], "en_cache": p["en_cache"]} for p in puntos]
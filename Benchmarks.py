@@ -0,0 +1,206 @@
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+from Simulacion import Simulacion
+from LibroIngresos import LibroIngresos
+from Catalogo import Catalogo
+from AlgoritmosAuxiliares import simulaClientes, simulaPoblacionClientes, calculaIngresosConDescuento
+from Colmena import aplicaDescuentoIndividual
+from Descuentos import MotorDescuentos
+
+'''
+Benchmarks de las rutas críticas de la simulación de Colmena
+Se generan catálogos y queries sintéticos (como los del notebook Simulacion-Workflow_individual) y se mide el tiempo y la
+memoria pico de cada dinámica a lo largo de tres ejes: número de productos, escala de las tasas de llegada de clientes y tiempo.
+Los resultados se guardan en JSON para compararlos contra una corrida base y señalar regresiones.
+
+Uso: python Benchmarks.py --salida actual.json [--base base.json] [--tolerancia 0.2] [--rapido]
+'''
+
+# Caso base (el del notebook) y valores de cada eje; en cada eje los otros dos parámetros se quedan en el caso base
+CASO_BASE = {"productos": 6, "escala_tasas": 1.0, "tiempo": 85}
+EJES = {"productos": [6, 60, 600], "escala_tasas": [1.0, 5.0, 20.0], "tiempo": [85, 850, 8500]}
+EJES_RAPIDOS = {"productos": [6, 60], "escala_tasas": [1.0, 5.0], "tiempo": [85, 850]}
+MOTORES = ("clasico", "vectorizado", "eventos")
+
+
+# Función que construye un dataframe de productos sintético
+# El inventario crece con la escala de las tasas y con el tiempo para que el agotamiento no domine los casos grandes
+def catalogoSintetico(n_productos, escala_tasas = 1.0, tiempo = 85, semilla = 0):
+    rng = np.random.default_rng(semilla)
+    factor_inventario = max(1.0, escala_tasas * tiempo / 85)
+    return pd.DataFrame({
+        "Id": np.arange(n_productos),
+        "Nombre": ["Producto " + str(i) for i in range(n_productos)],
+        "precio": rng.integers(10, 30, n_productos).astype(float),
+        "peso": rng.integers(5, 20, n_productos),
+        "dimensiones": rng.integers(1, 10, n_productos),
+        "cantidad": (rng.integers(750, 1000, n_productos) * factor_inventario).astype(int),
+        "demanda_clientes": rng.poisson(100 * escala_tasas, n_productos),
+        "productos_solicitados": np.zeros(n_productos, dtype=int),
+    })
+
+
+# Función que construye una query sintética con los parámetros del notebook (las tasas de clientes se multiplican por escala_tasas)
+def querySintetica(n_productos = 6, escala_tasas = 1.0, tiempo = 85, semilla = 0):
+    productos = catalogoSintetico(n_productos, escala_tasas, tiempo, semilla)
+    nombres = list(productos["Nombre"])
+    return {
+        "tasa_clientes_compran": 150 * escala_tasas,
+        "forma_a": 3,
+        "forma_b": 6,
+        "cantidad_promedio": {producto: 2 + i % 5 for i, producto in enumerate(nombres)},
+        "tasa_clientes_compran_nuevos": 2,
+        "tasas_nuevos_clientes": {producto: (i % 3) * escala_tasas for i, producto in enumerate(nombres)},
+        "tiempo": tiempo,
+        "tasa_tota_nuevos_clientes": 30 * escala_tasas,
+        "limites_inferiores": {producto: precio * 0.9 for producto, precio in zip(nombres, productos["precio"])},
+        "productos": productos,
+    }
+
+
+# Función que mide una función: tiempo (mediana y mínimo de varias repeticiones) y memoria pico (en una corrida aparte con tracemalloc)
+# @param prepara (function) regresa el argumento de la función medida; su tiempo no se cuenta
+def mide(funcion, prepara = lambda: None, repeticiones = 3):
+    tiempos = []
+    for _ in range(repeticiones):
+        argumento = prepara()
+        inicio = time.perf_counter()
+        funcion(argumento)
+        tiempos.append(time.perf_counter() - inicio)
+    argumento = prepara()
+    tracemalloc.start()
+    funcion(argumento)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"segundos": float(np.median(tiempos)), "segundos_min": float(min(tiempos)), "memoria_pico": int(pico), "repeticiones": repeticiones}
+
+
+# Benchmarks de cada dinámica en un caso (la segunda dinámica se mide por motor, con la primera ya ejecutada fuera del tiempo medido)
+def benchmarksDinamicas(caso, motores = MOTORES, repeticiones = 3):
+    resultados = []
+
+    def nuevaSimulacion():
+        return Simulacion(querySintetica(caso["productos"], caso["escala_tasas"], caso["tiempo"]), semilla = 0)
+
+    def simulacionConPrimera():
+        simulacion = nuevaSimulacion()
+        simulacion.simulaPrimeraDinamica(True)
+        return simulacion
+
+    medicion = mide(lambda simulacion: simulacion.simulaPrimeraDinamica(True), nuevaSimulacion, repeticiones)
+    resultados.append(dict(medicion, nombre = "primera_dinamica", caso = caso))
+    for motor in motores:
+        medicion = mide(lambda simulacion: simulacion.consumeTicks(simulacion.iteraSegundaDinamica(motor), guardar_series = False), simulacionConPrimera, repeticiones)
+        resultados.append(dict(medicion, nombre = "segunda_dinamica/" + motor, caso = caso))
+    return resultados
+
+
+# Benchmarks de las funciones auxiliares que se llaman en las rutas críticas
+def benchmarksAuxiliares(n_productos = 600, repeticiones = 3):
+    resultados = []
+    nombres = ["Producto " + str(i) for i in range(n_productos)]
+    caso = {"productos": n_productos}
+    resultados.append(dict(mide(lambda _: simulaClientes(5000), repeticiones = repeticiones), nombre = "simulaClientes", caso = {"lambda": 5000}))
+    resultados.append(dict(mide(lambda rng: simulaPoblacionClientes(5000, nombres, rng), lambda: np.random.default_rng(0), repeticiones), nombre = "simulaPoblacionClientes", caso = {"lambda": 5000, "productos": n_productos}))
+
+    def descuentos(rng):
+        for _ in range(10000):
+            aplicaDescuentoIndividual(None, 3, 6, "Producto 0", rng)
+    resultados.append(dict(mide(descuentos, lambda: np.random.default_rng(0), repeticiones), nombre = "aplicaDescuentoIndividual", caso = {"llamadas": 10000}))
+    motor = MotorDescuentos(3, 6, nombres)
+    resultados.append(dict(mide(lambda rng: motor.lote(rng.integers(0, n_productos, 10000), rng), lambda: np.random.default_rng(0), repeticiones), nombre = "MotorDescuentos.lote", caso = {"compras": 10000}))
+
+    def preparaIngresos():
+        catalogo = Catalogo(catalogoSintetico(n_productos))
+        libro = LibroIngresos(catalogo.nombres)
+        libro.registraLote(np.arange(n_productos), np.ones(n_productos))
+        return libro, catalogo
+    resultados.append(dict(mide(lambda argumentos: calculaIngresosConDescuento(*argumentos), preparaIngresos, repeticiones), nombre = "calculaIngresosConDescuento", caso = caso))
+    return resultados
+
+
+# Función que ejecuta la suite completa
+# @param ejes (dict) eje: valores (por defecto EJES)
+# @return (dict) "metadatos" del ambiente y "resultados" (una medición por benchmark y caso)
+def corre(ejes = None, motores = MOTORES, repeticiones = 3):
+    ejes = EJES if ejes is None else ejes
+    casos = [CASO_BASE]
+    for eje, valores in ejes.items():
+        casos += [dict(CASO_BASE, **{eje: valor}) for valor in valores if valor != CASO_BASE[eje]]
+    resultados = []
+    for caso in casos:
+        resultados += benchmarksDinamicas(caso, motores, repeticiones)
+    resultados += benchmarksAuxiliares(max(ejes["productos"]), repeticiones)
+    metadatos = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+    }
+    return {"metadatos": metadatos, "resultados": resultados}
+
+
+# Llave que identifica una medición entre corridas
+def llaveMedicion(medicion):
+    return medicion["nombre"] + " " + json.dumps(medicion["caso"], sort_keys=True)
+
+
+# Función que compara una corrida contra una corrida base
+# @param tolerancia (float) aumento relativo permitido antes de señalar una regresión (0.2 = 20%)
+# @return (list) por medición presente en ambas corridas: tiempo y memoria relativos a la base e indicadores de regresión
+def comparaConBase(actual, base, tolerancia = 0.2):
+    mediciones_base = {llaveMedicion(medicion): medicion for medicion in base["resultados"]}
+    comparacion = []
+    for medicion in actual["resultados"]:
+        anterior = mediciones_base.get(llaveMedicion(medicion))
+        if(anterior is None):
+            continue
+        # Se compara el mínimo de las repeticiones, que es el tiempo menos afectado por el ruido del sistema
+        razon_tiempo = medicion["segundos_min"] / max(anterior["segundos_min"], 1e-9)
+        razon_memoria = medicion["memoria_pico"] / max(anterior["memoria_pico"], 1)
+        comparacion.append({
+            "llave": llaveMedicion(medicion),
+            "razon_tiempo": razon_tiempo,
+            "razon_memoria": razon_memoria,
+            "regresion_tiempo": razon_tiempo > 1 + tolerancia,
+            "regresion_memoria": razon_memoria > 1 + tolerancia,
+        })
+    return comparacion
+
+
+def main(argumentos = None):
+    parser = argparse.ArgumentParser(description = "Benchmarks de la simulación de Colmena")
+    parser.add_argument("--salida", default = "benchmarks.json", help = "archivo JSON de resultados")
+    parser.add_argument("--base", help = "archivo JSON de una corrida base contra la cual comparar")
+    parser.add_argument("--tolerancia", type = float, default = 0.2, help = "aumento relativo permitido antes de señalar una regresión")
+    parser.add_argument("--repeticiones", type = int, default = 3)
+    parser.add_argument("--motores", nargs = "+", default = list(MOTORES))
+    parser.add_argument("--rapido", action = "store_true", help = "ejes reducidos")
+    argumentos = parser.parse_args(argumentos)
+
+    actual = corre(EJES_RAPIDOS if argumentos.rapido else EJES, argumentos.motores, argumentos.repeticiones)
+    for medicion in actual["resultados"]:
+        print(f'{llaveMedicion(medicion)}: {medicion["segundos"]:.4f} s, {medicion["memoria_pico"] / 2**20:.1f} MiB')
+    regresiones = []
+    if(argumentos.base):
+        with open(argumentos.base) as archivo:
+            base = json.load(archivo)
+        actual["comparacion"] = comparaConBase(actual, base, argumentos.tolerancia)
+        regresiones = [c for c in actual["comparacion"] if c["regresion_tiempo"] or c["regresion_memoria"]]
+        for c in regresiones:
+            print(f'REGRESIÓN {c["llave"]}: tiempo x{c["razon_tiempo"]:.2f}, memoria x{c["razon_memoria"]:.2f}')
+    with open(argumentos.salida, "w") as archivo:
+        json.dump(actual, archivo, indent=2)
+    # El código de salida distinto de cero permite usar la comparación en integración continua
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
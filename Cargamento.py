@@ -0,0 +1,237 @@
+import numpy as np
+from AlgoritmosAuxiliares import calculaEspacioCargamento
+
+'''
+Selección de camiones y planeación de la carga (paso 3 de la primera dinámica)
+A partir de un catálogo local de camiones (capacidad en volumen y peso, y costo) y de los productos solicitados, se escoge
+el camión o la combinación de camiones más barata con capacidad suficiente y se asignan los productos a los camiones con
+la heurística de primer ajuste decreciente (first-fit decreasing) en dos dimensiones.
+Todos los cálculos sobre productos y camiones son vectorizados, así escalan a miles de productos y cientos de camiones.
+'''
+
+# Tolerancia de redondeo al comparar capacidades
+TOLERANCIA = 1e-9
+
+
+'''
+Catálogo de camiones disponibles en arreglos de NumPy
+'''
+class CatalogoCamiones:
+    # @param camiones (DataFrame o str) dataframe (o ruta a un CSV) con las columnas Nombre, capacidad_volumen, capacidad_peso y costo;
+    # opcionalmente disponibles (cuántos camiones hay de cada tipo; si no se indica no hay límite)
+    def __init__(self, camiones):
+        if(isinstance(camiones, str)):
+            import pandas as pd
+            camiones = pd.read_csv(camiones)
+        self.nombres = list(camiones["Nombre"])
+        self.volumen = np.array(camiones["capacidad_volumen"], dtype=float)
+        self.peso = np.array(camiones["capacidad_peso"], dtype=float)
+        self.costo = np.array(camiones["costo"], dtype=float)
+        if("disponibles" in camiones):
+            self.disponibles = np.array(camiones["disponibles"], dtype=np.int64)
+        else:
+            self.disponibles = np.full(len(self.nombres), np.iinfo(np.int64).max)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __str__(self):
+        return 'Catálogo de camiones: ' + str(len(self)) + ' tipos ' + str(self.nombres)
+
+
+'''
+Plan de carga: camiones escogidos y unidades de cada producto asignadas a cada camión
+'''
+class PlanCarga:
+    # @param camiones (CatalogoCamiones) catálogo del que se escogieron los camiones
+    # @param flota (array) índice en el catálogo de cada camión del plan
+    # @param asignacion (array) unidades de cada producto (renglón) en cada camión del plan (columna)
+    # @param no_asignadas (array) unidades de cada producto que no cupieron en ningún camión
+    def __init__(self, nombres_productos, camiones, flota, asignacion, no_asignadas, volumen_unitario, peso_unitario):
+        self.nombres_productos = list(nombres_productos)
+        self.camiones = [camiones.nombres[t] for t in flota]
+        self.flota = np.asarray(flota, dtype=np.int64)
+        self.asignacion = asignacion
+        self.no_asignadas = no_asignadas
+        self.costo = float(camiones.costo[self.flota].sum())
+        self.capacidad_volumen = camiones.volumen[self.flota]
+        self.capacidad_peso = camiones.peso[self.flota]
+        # Volumen y peso cargados en cada camión
+        self.volumen = volumen_unitario @ asignacion
+        self.peso = peso_unitario @ asignacion
+        self.factible = not no_asignadas.any()
+
+    # Cantidad de camiones de cada tipo
+    def conteo(self):
+        tipos, conteos = np.unique(self.camiones, return_counts=True)
+        return dict(zip(tipos.tolist(), conteos.tolist()))
+
+    # Fracción ocupada de cada camión: (volumen, peso)
+    def ocupacion(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.volumen / self.capacidad_volumen, self.peso / self.capacidad_peso
+
+    # Asignación en formato largo: un renglón por producto y camión con unidades asignadas
+    def aDataFrame(self):
+        import pandas as pd
+        productos, camiones = np.nonzero(self.asignacion)
+        return pd.DataFrame({
+            "producto": np.asarray(self.nombres_productos, dtype=object)[productos],
+            "camion": camiones,
+            "tipo_camion": np.asarray(self.camiones, dtype=object)[camiones],
+            "unidades": self.asignacion[productos, camiones],
+        })
+
+    def __str__(self):
+        return 'Plan de carga: ' + str(self.conteo()) + ' costo ' + str(self.costo) + (' (factible)' if self.factible else ' (unidades sin asignar: ' + str(int(self.no_asignadas.sum())) + ')')
+
+
+# Función que calcula cuántos camiones de cada tipo se necesitan para una carga (cota inferior sin considerar el empaque)
+# @return (array) cantidad de camiones por tipo (inf si el tipo no tiene capacidad para la carga)
+def camionesNecesarios(volumen, peso, camiones):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        por_volumen = np.where(volumen > 0, volumen / camiones.volumen, 0)
+        por_peso = np.where(peso > 0, peso / camiones.peso, 0)
+    return np.ceil(np.maximum(por_volumen, por_peso) - TOLERANCIA)
+
+
+# Máximo de cantidades distintas de un tipo que se prueban por combinación (si se necesitan más, se prueban cantidades espaciadas)
+MAX_CANTIDADES = 256
+# Tipos más eficientes (costo por carga cubierta) entre los que también se prueban combinaciones de tres tipos, y cantidades por tipo
+TIPOS_TRIPLES = 6
+MAX_CANTIDADES_TRIPLES = 48
+
+
+# Cantidades de camiones que se prueban: de 0 a n_max (espaciadas si son más de maximo)
+def _cantidades(n_max, maximo):
+    if(n_max < maximo):
+        return np.arange(n_max + 1)
+    return np.unique(np.linspace(0, n_max, maximo).round().astype(np.int64))
+
+
+# Camiones de un tipo que cubren por sí solos la dimensión que pueden cubrir (acotado por los disponibles)
+def _cantidadMaxima(volumen, peso, camiones, t):
+    cubre = [carga / capacidad for carga, capacidad in [(volumen, camiones.volumen[t]), (peso, camiones.peso[t])] if capacidad > 0]
+    return int(min(np.ceil(max(cubre) - TOLERANCIA) if cubre else 0, camiones.disponibles[t]))
+
+
+# Mejor combinación que completa con un solo tipo r (cualquiera del catálogo) cargas restantes dadas
+# @param resto_volumen, resto_peso (array) carga restante por cubrir en cada combinación parcial
+# @param fijos (array) camiones ya usados de cada tipo en cada combinación parcial (combinaciones x tipos)
+# @param costo_fijo (array) costo de cada combinación parcial
+# @return (índice de la combinación parcial, tipo r, camiones b del tipo r, costo total)
+def _completaConUnTipo(resto_volumen, resto_peso, fijos, costo_fijo, camiones):
+    resto_volumen = np.maximum(resto_volumen, 0)[:, None]
+    resto_peso = np.maximum(resto_peso, 0)[:, None]
+    b = np.maximum(np.where(resto_volumen > 0, resto_volumen / camiones.volumen[None, :], 0), np.where(resto_peso > 0, resto_peso / camiones.peso[None, :], 0))
+    b = np.ceil(b - TOLERANCIA)
+    costo = np.where(np.isfinite(b) & (b + fijos <= camiones.disponibles[None, :]), costo_fijo[:, None] + b * camiones.costo[None, :], np.inf)
+    i, r = np.unravel_index(np.argmin(costo), costo.shape)
+    return i, r, (int(b[i, r]) if np.isfinite(costo[i, r]) else 0), costo[i, r]
+
+
+# Función que escoge la combinación de camiones más barata para una carga total (volumen y peso)
+# Con dos restricciones (volumen y peso) la relajación lineal tiene un óptimo con a lo más dos tipos de camión, así que se
+# prueban todas las combinaciones de a camiones de un tipo t completadas con b camiones de un tipo r (con a = 0 o r = t se
+# obtienen las flotas de un solo tipo); el redondeo a camiones enteros puede requerir un tercer tipo, por lo que también se
+# prueban combinaciones de tres tipos entre los TIPOS_TRIPLES tipos más eficientes. El b de cada r se calcula vectorizado.
+# @return (array) índice en el catálogo de cada camión escogido (vacío si no hay carga; None si ninguna combinación es factible)
+def seleccionaCamiones(volumen, peso, camiones):
+    if(volumen <= 0 and peso <= 0):
+        return np.zeros(0, dtype=np.int64)
+    n_tipos = len(camiones)
+    mejor_costo, mejor = np.inf, None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Combinaciones de dos tipos: a camiones del tipo t completados con el mejor tipo r
+        for t in range(n_tipos):
+            a = _cantidades(_cantidadMaxima(volumen, peso, camiones, t), MAX_CANTIDADES)
+            fijos = np.zeros((len(a), n_tipos), dtype=np.int64)
+            fijos[:, t] = a
+            i, r, b, costo = _completaConUnTipo(volumen - a * camiones.volumen[t], peso - a * camiones.peso[t], fijos, a * camiones.costo[t], camiones)
+            if(costo < mejor_costo):
+                mejor_costo, mejor = costo, [t] * int(a[i]) + [r] * b
+        # Combinaciones de tres tipos entre los más eficientes: costo por la fracción de la carga que cubre cada camión
+        cobertura = np.minimum(camiones.volumen / max(volumen, TOLERANCIA), camiones.peso / max(peso, TOLERANCIA))
+        eficientes = np.argsort(camiones.costo / np.maximum(cobertura, TOLERANCIA), kind="stable")[:TIPOS_TRIPLES]
+        for x, t in enumerate(eficientes):
+            for u in eficientes[x + 1:]:
+                a = _cantidades(_cantidadMaxima(volumen, peso, camiones, t), MAX_CANTIDADES_TRIPLES)
+                c = _cantidades(_cantidadMaxima(volumen, peso, camiones, u), MAX_CANTIDADES_TRIPLES)
+                a, c = np.repeat(a, len(c)), np.tile(c, len(a))
+                fijos = np.zeros((len(a), n_tipos), dtype=np.int64)
+                fijos[:, t] = a
+                fijos[:, u] = c
+                i, r, b, costo = _completaConUnTipo(volumen - a * camiones.volumen[t] - c * camiones.volumen[u], peso - a * camiones.peso[t] - c * camiones.peso[u], fijos, a * camiones.costo[t] + c * camiones.costo[u], camiones)
+                if(costo < mejor_costo):
+                    mejor_costo, mejor = costo, [t] * int(a[i]) + [u] * int(c[i]) + [r] * b
+    if(mejor is None):
+        return None
+    return np.array(mejor, dtype=np.int64)
+
+
+# Función que asigna las unidades de los productos a los camiones con primer ajuste decreciente en dos dimensiones
+# Los productos se ordenan de mayor a menor tamaño unitario y los camiones de mayor a menor capacidad; cada producto se
+# reparte entre los primeros camiones en los que caben sus unidades (el cálculo por producto es vectorizado sobre los camiones)
+# @return (asignacion, no_asignadas) unidades por producto y camión, y unidades de cada producto que no cupieron
+def empacaPrimerAjusteDecreciente(cantidades, volumen_unitario, peso_unitario, capacidad_volumen, capacidad_peso):
+    n_productos, n_camiones = len(cantidades), len(capacidad_volumen)
+    asignacion = np.zeros((n_productos, n_camiones), dtype=np.int64)
+    no_asignadas = np.array(cantidades, dtype=np.int64)
+    if(n_camiones == 0):
+        return asignacion, no_asignadas
+    restante_volumen = np.array(capacidad_volumen, dtype=float)
+    restante_peso = np.array(capacidad_peso, dtype=float)
+    # Tamaño unitario relativo a la capacidad máxima (la dimensión que más limita)
+    tamano = np.maximum(volumen_unitario / max(restante_volumen.max(), TOLERANCIA), peso_unitario / max(restante_peso.max(), TOLERANCIA))
+    for p in np.argsort(-tamano, kind="stable"):
+        n = no_asignadas[p]
+        if(n == 0):
+            continue
+        # Unidades del producto que caben en cada camión
+        caben = np.full(n_camiones, n, dtype=np.int64)
+        if(volumen_unitario[p] > 0):
+            caben = np.minimum(caben, np.floor((restante_volumen + TOLERANCIA) / volumen_unitario[p]).astype(np.int64))
+        if(peso_unitario[p] > 0):
+            caben = np.minimum(caben, np.floor((restante_peso + TOLERANCIA) / peso_unitario[p]).astype(np.int64))
+        caben = np.maximum(caben, 0)
+        # Primer ajuste: se llenan los camiones en orden hasta colocar todas las unidades
+        antes = np.cumsum(caben) - caben
+        asignado = np.clip(n - antes, 0, caben)
+        asignacion[p] = asignado
+        no_asignadas[p] = n - asignado.sum()
+        restante_volumen -= asignado * volumen_unitario[p]
+        restante_peso -= asignado * peso_unitario[p]
+    return asignacion, no_asignadas
+
+
+# Función que escoge los camiones y asigna la carga de los productos solicitados
+# @param productos (Catalogo o DataFrame) productos con las columnas Nombre, productos_solicitados, peso y dimensiones
+# @param camiones (CatalogoCamiones, DataFrame o str) catálogo de camiones
+# @param max_intentos (int) camiones que se pueden agregar si la carga no cabe por fragmentación
+# @return (PlanCarga) plan de carga (factible = False si hay unidades que no caben en ningún camión disponible)
+def planificaCarga(productos, camiones, max_intentos = 10):
+    if(not isinstance(camiones, CatalogoCamiones)):
+        camiones = CatalogoCamiones(camiones)
+    nombres = list(productos["Nombre"])
+    cantidades = np.asarray(productos["productos_solicitados"], dtype=np.int64)
+    volumen_unitario = np.asarray(productos["dimensiones"], dtype=float)
+    peso_unitario = np.asarray(productos["peso"], dtype=float)
+    volumen, peso = calculaEspacioCargamento(productos)
+
+    flota = seleccionaCamiones(volumen, peso, camiones)
+    if(flota is None):
+        # Ninguna combinación cubre la carga: se carga lo que quepa en el camión de mayor capacidad
+        flota = np.array([np.argmax(np.minimum(camiones.volumen / max(volumen, TOLERANCIA), camiones.peso / max(peso, TOLERANCIA)))], dtype=np.int64)
+    for _ in range(max_intentos + 1):
+        orden = np.lexsort((-camiones.peso[flota], -camiones.volumen[flota]))
+        flota = flota[orden]
+        asignacion, no_asignadas = empacaPrimerAjusteDecreciente(cantidades, volumen_unitario, peso_unitario, camiones.volumen[flota], camiones.peso[flota])
+        if(not no_asignadas.any()):
+            break
+        # La carga no cupo por fragmentación: se agrega el camión más barato para lo que faltó (considerando los ya usados)
+        usados = np.bincount(flota, minlength=len(camiones))
+        extra = seleccionaCamiones(float(no_asignadas @ volumen_unitario), float(no_asignadas @ peso_unitario), camiones)
+        if(extra is None or len(extra) == 0 or (np.bincount(extra, minlength=len(camiones)) + usados > camiones.disponibles).any()):
+            break
+        flota = np.concatenate((flota, extra))
+    return PlanCarga(nombres, camiones, flota, asignacion, no_asignadas, volumen_unitario, peso_unitario)
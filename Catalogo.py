@@ -0,0 +1,54 @@
+import numpy as np
+
+'''
+Catálogo compacto de productos indexado por enteros (arreglos de NumPy)
+Se compila una sola vez a partir del dataframe de productos y se utiliza durante toda la simulación,
+así cada lectura o escritura por producto es un acceso por índice en lugar de una búsqueda por nombre en el dataframe
+'''
+class Catalogo:
+    # Columnas numéricas del dataframe de productos que se compilan en arreglos
+    COLUMNAS = ["precio", "peso", "dimensiones", "cantidad", "demanda_clientes", "productos_solicitados"]
+
+    # @param productos (DataFrame) dataframe con las columnas Nombre, precio, peso, dimensiones, cantidad, demanda_clientes y productos_solicitados
+    def __init__(self, productos):
+        # Nombres de los productos en el orden del dataframe y su índice entero
+        self.nombres = list(productos["Nombre"])
+        self.indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.precio = np.array(productos["precio"], dtype=float)
+        self.peso = np.array(productos["peso"], dtype=float)
+        self.dimensiones = np.array(productos["dimensiones"], dtype=float)
+        # Inventario con el que se cuenta de cada producto
+        self.cantidad = np.array(productos["cantidad"], dtype=float)
+        self.demanda_clientes = np.array(productos["demanda_clientes"], dtype=int)
+        # Cantidad solicitada de cada producto
+        self.solicitados = np.array(productos["productos_solicitados"], dtype=int)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    # Acceso por nombre de columna (compatible con las funciones que reciben el dataframe de productos)
+    def __getitem__(self, columna):
+        if(columna == "Nombre"):
+            return self.nombres
+        if(columna == "productos_solicitados"):
+            return self.solicitados
+        if(columna in self.COLUMNAS):
+            return getattr(self, columna)
+        raise KeyError(columna)
+
+    # Convierte un diccionario por producto (por ejemplo, limites_inferiores) en un arreglo en el orden del catálogo
+    def arreglo(self, diccionario, dtype = float):
+        return np.array([diccionario[nombre] for nombre in self.nombres], dtype=dtype)
+
+    # Convierte un arreglo en el orden del catálogo en un diccionario por producto
+    def diccionario(self, arreglo):
+        return {nombre: valor for nombre, valor in zip(self.nombres, arreglo.tolist())}
+
+    # Escribe el estado del catálogo (precio y productos solicitados) de regreso en el dataframe de productos
+    def escribeEnDataFrame(self, productos):
+        productos["precio"] = self.precio.copy()
+        productos["productos_solicitados"] = self.solicitados.copy()
+        return productos
+
+    def __str__(self):
+        return 'Catálogo: ' + str(len(self)) + ' productos ' + str(self.nombres)
@@ -0,0 +1,161 @@
+import os
+import gzip
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from Aleatorios import FlujosAleatorios
+from Descuentos import MotorDescuentos
+from Precios import MotorPrecios
+from Salida import EscritorTicks
+
+'''
+Puntos de control de una simulación: guardar, reanudar y bifurcar
+Una Simulacion se guarda completa (catálogo, clientes, libros, contadores, estado de los flujos aleatorios y estado del
+motor de la dinámica en el tiempo) como un pickle comprimido con gzip. Con el estado al terminar simulaPrimeraDinamica
+se pueden correr muchas variantes de la dinámica en el tiempo (ramas) sin repetir la primera dinámica, en memoria o en
+varios procesos; durante horizontes largos, un PuntoControl guarda la simulación cada cierto número de minutos y
+reanuda() la continúa desde el último punto guardado con los mismos resultados que una corrida sin interrupciones.
+'''
+
+# Atributos de la simulación que puede cambiar una rama (escenario) además de "semilla" y "engine"
+ATRIBUTOS_ESCENARIO = ["tiempo", "resolucion", "tasas_nuevos_clientes", "tasa_tota_nuevos_clientes", "cantidad_promedio", "forma_a", "forma_b", "limites_inferiores", "tabla_descuentos", "curva_precio", "parametros_curva"]
+
+
+# Serializa una simulación (pickle comprimido con gzip; nivel 0 no comprime)
+def serializa(simulacion, nivel = 6):
+    datos = pickle.dumps(simulacion, protocol=pickle.HIGHEST_PROTOCOL)
+    return gzip.compress(datos, compresslevel=nivel) if nivel > 0 else datos
+
+
+def deserializa(datos):
+    # Los datos comprimidos empiezan con la firma de gzip
+    return pickle.loads(gzip.decompress(datos) if datos[:2] == b"\x1f\x8b" else datos)
+
+
+# Guarda una simulación en disco (en un temporal que se renombra, así una caída a medio guardar no corrompe el punto anterior)
+def guardaSimulacion(simulacion, ruta, nivel = 6):
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    with os.fdopen(descriptor, "wb") as archivo:
+        archivo.write(serializa(simulacion, nivel))
+    os.replace(temporal, ruta)
+
+
+def cargaSimulacion(ruta):
+    with open(ruta, "rb") as archivo:
+        return deserializa(archivo.read())
+
+
+'''
+Punto de control periódico de la dinámica en el tiempo (se pasa a Simulacion.run o a reanuda)
+'''
+class PuntoControl:
+    # @param ruta (str) archivo del punto de control (se sobrescribe en cada guardado)
+    # @param cada (int) minutos (periodos de reporte en el motor por eventos) entre guardados
+    # @param nivel (int) nivel de compresión de gzip (bajo por defecto: se guarda muchas veces durante la simulación)
+    def __init__(self, ruta, cada = 100, nivel = 1):
+        self.ruta = ruta
+        self.cada = cada
+        self.nivel = nivel
+        self.minutos = 0
+        self.guardados = 0
+
+    # Cuenta un minuto e indica si toca guardar
+    def toca(self):
+        self.minutos += 1
+        return self.minutos % self.cada == 0
+
+    def guarda(self, simulacion):
+        guardaSimulacion(simulacion, self.ruta, self.nivel)
+        self.guardados += 1
+
+    def __str__(self):
+        return 'Punto de control: ' + self.ruta + ' cada ' + str(self.cada) + ' minutos (' + str(self.guardados) + ' guardados)'
+
+
+# Termina la dinámica en el tiempo de una simulación y regresa su resultado con la instrumentación
+def _terminaSegundaDinamica(simulacion, engine, salida, guardar_series, punto_control, reanuda):
+    try:
+        resultado = simulacion.simulaSegundaDinamica(engine, salida, guardar_series, punto_control, reanuda)
+    finally:
+        if(salida is not None):
+            salida.cierra()
+    simulacion.instrumentacion.termina()
+    resultado.instrumentacion = simulacion.instrumentacion.aDiccionario()
+    return resultado
+
+
+# Función que reanuda la dinámica en el tiempo desde un punto de control
+# La salida por minuto (si la corrida tenía una) se recorta a lo que se había escrito al guardar el punto y se continúa
+# @param punto_control (PuntoControl) para seguir guardando puntos durante el resto de la corrida (opcional)
+# @return (SimulationResult) resultado de la dinámica completa
+def reanuda(ruta, punto_control = None):
+    simulacion = cargaSimulacion(ruta)
+    if(simulacion.estado_motor is None):
+        raise ValueError(f'El punto de control {ruta} no tiene una dinámica en el tiempo en curso')
+    salida = None
+    if(simulacion.salida_parcial is not None):
+        parcial = simulacion.salida_parcial
+        salida = EscritorTicks(parcial["ruta"], parcial["formato"], parcial["tam_lote"], posicion = parcial["posicion"])
+    guardar_series = simulacion.series_parciales[-1] if simulacion.series_parciales is not None else True
+    return _terminaSegundaDinamica(simulacion, simulacion.estado_motor["engine"], salida, guardar_series, punto_control, True)
+
+
+# Aplica un escenario (cambios de parámetros de la dinámica en el tiempo) a una simulación
+# @param escenario (dict) "semilla" (flujos aleatorios nuevos para la rama) y cualquiera de ATRIBUTOS_ESCENARIO
+def aplicaEscenario(simulacion, escenario):
+    for llave, valor in escenario.items():
+        if(llave == "semilla"):
+            simulacion.flujos = FlujosAleatorios(valor)
+        elif(llave == "engine"):
+            continue
+        elif(llave in ("tabla_descuentos", "curva_precio", "parametros_curva")):
+            continue
+        elif(llave in ATRIBUTOS_ESCENARIO):
+            setattr(simulacion, llave, valor)
+        else:
+            raise ValueError(f'Parámetro de escenario desconocido: {llave}')
+    # Los motores de descuentos y precios se reconstruyen si cambian sus parámetros
+    if({"forma_a", "forma_b", "tabla_descuentos"} & set(escenario)):
+        tabla = escenario["tabla_descuentos"] if "tabla_descuentos" in escenario else simulacion.descuentos.tabla
+        simulacion.descuentos = MotorDescuentos(simulacion.forma_a, simulacion.forma_b, simulacion.catalogo.nombres, tabla)
+    if({"limites_inferiores", "curva_precio", "parametros_curva"} & set(escenario)):
+        curva = escenario.get("curva_precio", simulacion.precios.curva)
+        parametros = escenario.get("parametros_curva", simulacion.precios.parametros)
+        simulacion.precios = MotorPrecios(simulacion.catalogo.arreglo(simulacion.limites_inferiores), curva, parametros)
+    return simulacion
+
+
+# Función que bifurca una simulación: copia independiente (en memoria) con un escenario aplicado
+def bifurca(simulacion, escenario = None):
+    return aplicaEscenario(deserializa(serializa(simulacion, nivel = 0)), escenario or {})
+
+
+# Función que corre una rama a partir de la simulación serializada (se ejecuta en un proceso del pool)
+def _corraRama(tarea):
+    datos, escenario, engine, guardar_series = tarea
+    simulacion = aplicaEscenario(deserializa(datos), escenario)
+    return _terminaSegundaDinamica(simulacion, escenario.get("engine", engine), None, guardar_series, None, False)
+
+
+# Función que corre muchas ramas de la dinámica en el tiempo desde el mismo estado (por ejemplo, al terminar simulaPrimeraDinamica)
+# @param simulacion (Simulacion o str) simulación o ruta de un punto de control guardado
+# @param escenarios (list) un escenario por rama (ver aplicaEscenario; {} repite la dinámica con los mismos flujos)
+# @param workers (int) número de procesos (1 corre en el proceso actual; None utiliza todos los núcleos)
+# @return (list) resultado de cada rama
+def corraRamas(simulacion, escenarios, workers = 1, engine = "vectorizado", guardar_series = False):
+    if(isinstance(simulacion, str)):
+        with open(simulacion, "rb") as archivo:
+            datos = archivo.read()
+    else:
+        # La simulación se serializa una sola vez; cada rama la reconstruye
+        datos = serializa(simulacion, nivel = 1)
+    tareas = [(datos, escenario, engine, guardar_series) for escenario in escenarios]
+    if(workers is None):
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tareas)))
+    if(workers == 1):
+        return [_corraRama(tarea) for tarea in tareas]
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(_corraRama, tareas))
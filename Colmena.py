@@ -1,19 +1,21 @@
 import random 
-from Cliente import Cliente
 from AlgoritmosAuxiliares import simularTasaDescuento 
 
 # Función para aplicar un descuento a un cliente 
-def aplicaDescuentoIndividual(cliente, a, b, producto_descuento): 
+# Si el cliente es None solo se simula el descuento (quien llama lo registra, por ejemplo en PoblacionClientes)
+# @param rng generador del flujo de descuentos (numpy.random.Generator o GeneradorEnBloques); None utiliza el módulo random y np.random
+def aplicaDescuentoIndividual(cliente, a, b, producto_descuento, rng=None): 
     tipos_descuento = ["VideoJuego", "Cupón", "Trivia", "Sorteo"]
-    metodo = random.choice(tipos_descuento)
+    metodo = random.choice(tipos_descuento) if rng is None else tipos_descuento[rng.integers(0, len(tipos_descuento))]
     # Vamos a simular si el cliente posee un método de descuento o no 
-    tasa_descuento = simularTasaDescuento(a, b)
+    tasa_descuento = simularTasaDescuento(a, b, rng=rng)
     # Caso en el que se puede aplicar el descuento
-    if(random.random() < tasa_descuento):
+    if((random.random() if rng is None else rng.random()) < tasa_descuento):
         # Obtenemos el valor del descuento de forma aleatoria
-        valor_descuento = simularTasaDescuento(a, b)
+        valor_descuento = simularTasaDescuento(a, b, rng=rng)
         # Agregamos el método de descuento al cliente
-        cliente.agregarMetodoDescuento(producto_descuento, valor_descuento)
+        if(cliente is not None):
+            cliente.agregarMetodoDescuento(producto_descuento, valor_descuento)
         return valor_descuento, metodo 
     return 0, None
 
@@ -0,0 +1,150 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from Aleatorios import FlujosAleatorios, semillaRaiz
+from Simulacion import Simulacion
+from Replicaciones import resumeMuestra, valorMetrica
+
+'''
+Comparación de escenarios con reducción de varianza
+Para comparar variantes de una query (por ejemplo forma_a/forma_b o los límites inferiores) se simulan todas las variantes
+con las mismas semillas: números aleatorios comunes (CRN). Con flujos por inversión (Aleatorios.GeneradorInversion) cada
+extracción de llegadas, cantidades y descuentos consume un solo uniforme, así los flujos de las variantes siguen alineados
+aunque cambien los parámetros de las distribuciones. Además:
+- antitetico: cada semilla se simula también con los uniformes 1 - u y la unidad de la muestra es el promedio del par
+- control: las variables con media conocida (clientes de la primera dinámica, pool de extemporáneos y llegadas de la
+  segunda dinámica) corrigen la métrica con un estimador de variables de control (coeficientes por mínimos cuadrados)
+Cada diferencia se reporta con la varianza que tendría el mismo número de simulaciones independientes sin control, y
+la razón entre ambas (reduccion_varianza: cuántas veces menos simulaciones se necesitan para la misma confianza).
+'''
+
+METODOS = ("independiente", "crn", "antitetico")
+# Variables de control (en el orden en que las regresa corre_variante)
+CONTROLES = ("clientes", "clientes_extemporaneos", "llegadas")
+
+# Query del proceso trabajador (se copia una sola vez por trabajador en el inicializador del pool)
+_QUERY_TRABAJADOR = None
+
+
+def _inicializaTrabajador(query):
+    global _QUERY_TRABAJADOR
+    _QUERY_TRABAJADOR = query
+
+
+# Función que simula una variante de la query con los flujos de una semilla
+# @param cambios (dict) parámetros de la query que cambian en la variante
+# @param inversion (bool) flujos por inversión; antitetico (bool) réplica antitética de la semilla
+# @return (valor, controles, medias) métrica, variables de control observadas y sus medias conocidas
+def corre_variante(query, cambios, semilla, inversion = True, antitetico = False, engine = "vectorizado", metrica = "ingresos"):
+    query_variante = dict(query)
+    query_variante.update(cambios)
+    query_variante["productos"] = query_variante["productos"].copy()
+    simulacion = Simulacion(query_variante, FlujosAleatorios(semilla, inversion, antitetico))
+    # Las series de clientes nuevos dan las llegadas de la segunda dinámica
+    resultado = simulacion.run(engine = engine, mostrar = False, guardar_series = True)
+    tasas = simulacion.tasas_nuevos_clientes.values()
+    controles = [len(simulacion.CLIENTES), len(simulacion.CLIENTES_EXTEMPORANEOS), float(np.sum(resultado.clientes_nuevos_tiempo))]
+    # Llegadas esperadas: tasa promedio de cada producto (constante o por tramos) por el horizonte
+    medias = [simulacion.tasa_clientes_compran, simulacion.tasa_tota_nuevos_clientes, simulacion.tiempo * sum(float(np.mean(tasa)) for tasa in tasas)]
+    return valorMetrica(resultado.metricas(), metrica), controles, medias
+
+
+def _corre_variante_trabajador(cambios, semilla, inversion, antitetico, engine, metrica):
+    return corre_variante(_QUERY_TRABAJADOR, cambios, semilla, inversion, antitetico, engine, metrica)
+
+
+# Estimador de variables de control: métrica corregida por unidad, Y - (C - media) beta
+# Se omiten los controles sin variación (por ejemplo, si la variante no tiene llegadas)
+def corrigeConControles(valores, controles, medias):
+    centrados = controles - controles.mean(axis=0)
+    utiles = centrados.std(axis=0) > 0
+    if(not utiles.any() or len(valores) <= utiles.sum() + 1):
+        return valores, np.zeros(controles.shape[1])
+    beta = np.zeros(controles.shape[1])
+    beta[utiles] = np.linalg.lstsq(centrados[:, utiles], valores - valores.mean(), rcond=None)[0]
+    return valores - (controles - medias) @ beta, beta
+
+
+# Función que estima las medias de las variantes y sus diferencias contra la referencia a partir de las simulaciones
+# @param valores (array) métrica por variante (renglón) y simulación (columna)
+# @param controles (array) variante x simulación x control; medias (array) variante x control
+# @param pares (bool) simulaciones consecutivas forman un par antitético
+def estimaComparacion(nombres, valores, controles, medias, pares = False, control = True, nivel = 0.95):
+    n_variantes, n = valores.shape
+    unidades, controles_unidad = valores, controles
+    if(pares):
+        unidades = valores.reshape(n_variantes, n // 2, 2).mean(axis=2)
+        controles_unidad = controles.reshape(n_variantes, n // 2, 2, -1).mean(axis=2)
+    corregidos, betas = [], []
+    for v in range(n_variantes):
+        corregido, beta = corrigeConControles(unidades[v], controles_unidad[v], medias[v]) if control else (unidades[v], np.zeros(controles.shape[2]))
+        corregidos.append(corregido)
+        betas.append(beta)
+    n_unidades = unidades.shape[1]
+    varianzas = valores.var(axis=1, ddof=1)
+
+    resumen = {"n": n, "unidades": n_unidades, "variantes": {}, "diferencias": {}}
+    for v, nombre in enumerate(nombres):
+        varianza = corregidos[v].var(ddof=1) / n_unidades
+        resumen["variantes"][nombre] = dict(resumeMuestra(corregidos[v], nivel), coeficientes_control = dict(zip(CONTROLES, betas[v].tolist())), reduccion_varianza = _razon(varianzas[v] / n, varianza))
+        if(v == 0):
+            continue
+        diferencia = corregidos[v] - corregidos[0]
+        varianza = diferencia.var(ddof=1) / n_unidades
+        # Las mismas n simulaciones por variante, independientes y sin control: Var(Y_v)/n + Var(Y_0)/n
+        varianza_independiente = (varianzas[v] + varianzas[0]) / n
+        reduccion = _razon(varianza_independiente, varianza)
+        resumen["diferencias"][nombre] = dict(resumeMuestra(diferencia, nivel), referencia = nombres[0], varianza = float(varianza), varianza_independiente = float(varianza_independiente), reduccion_varianza = reduccion, replicas_equivalentes = reduccion * n)
+    return resumen
+
+
+def _razon(numerador, denominador):
+    return float(numerador / denominador) if denominador > 0 else float("inf")
+
+
+# Función que compara variantes de una query con números aleatorios comunes y, opcionalmente, variables antitéticas y de control
+# @param query (dict) query base de Simulacion
+# @param variantes (dict) nombre: cambios a la query; la primera variante es la referencia de las diferencias
+# @param n (int) simulaciones por variante (con "antitetico", n / 2 pares)
+# @param metodo (str) "independiente" (semillas distintas por variante), "crn" o "antitetico"
+# @param inversion (bool) flujos por inversión (alinean las extracciones entre variantes; siempre con "antitetico")
+# @param control (bool) estimador de variables de control
+# @param metrica (str) métrica escalar a comparar (ver valorMetrica)
+# @return (dict) {"metodo", "control", "n", "unidades", "variantes": resumen por variante, "diferencias": resumen por variante contra la referencia, "replicas"}
+def comparaEscenarios(query, variantes, n = 100, metodo = "crn", workers = None, semilla = None, engine = "vectorizado", control = True, inversion = True, metrica = "ingresos", nivel = 0.95):
+    if(metodo not in METODOS):
+        raise ValueError(f'Método desconocido: {metodo} (se esperaba uno de {METODOS})')
+    if(metodo == "antitetico" and n % 2 != 0):
+        raise ValueError('Con variables antitéticas el número de simulaciones por variante debe ser par')
+    semilla = semillaRaiz(semilla)
+    nombres = list(variantes)
+    pares = metodo == "antitetico"
+    semillas = semilla.spawn(n // 2 if pares else n)
+
+    # Tareas en orden (simulación, variante): con "independiente" cada variante recibe su propia semilla derivada
+    tareas = []
+    for s in semillas:
+        semillas_variante = s.spawn(len(nombres)) if metodo == "independiente" else [s] * len(nombres)
+        for antitetico in ((False, True) if pares else (False,)):
+            for nombre, semilla_variante in zip(nombres, semillas_variante):
+                tareas.append((variantes[nombre], semilla_variante, inversion or pares, antitetico))
+
+    if(workers is None):
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tareas)))
+    argumentos = [[tarea[i] for tarea in tareas] for i in range(4)] + [[engine] * len(tareas), [metrica] * len(tareas)]
+    if(workers == 1):
+        salidas = [corre_variante(query, *args) for args in zip(*argumentos)]
+    else:
+        with ProcessPoolExecutor(max_workers = workers, initializer = _inicializaTrabajador, initargs = (query,)) as pool:
+            chunksize = max(1, len(tareas) // (4 * workers))
+            salidas = list(pool.map(_corre_variante_trabajador, *argumentos, chunksize = chunksize))
+
+    # Arreglos variante x simulación (las simulaciones de un par antitético quedan consecutivas)
+    n_variantes = len(nombres)
+    valores = np.array([salida[0] for salida in salidas]).reshape(n, n_variantes).T
+    controles = np.array([salida[1] for salida in salidas], dtype=float).reshape(n, n_variantes, -1).transpose(1, 0, 2)
+    medias = np.array([salida[2] for salida in salidas[:n_variantes]], dtype=float)
+    resumen = estimaComparacion(nombres, valores, controles, medias, pares, control, nivel)
+    resumen.update({"metodo": metodo, "control": control, "metrica": metrica, "replicas": {nombre: valores[v].tolist() for v, nombre in enumerate(nombres)}})
+    return resumen
@@ -0,0 +1,208 @@
+import os
+import json
+from Precios import CURVAS
+
+'''
+Queries de la simulación de Colmena en archivos JSON o YAML (para la línea de comandos y el servicio)
+El archivo trae el mismo diccionario que recibe Simulacion; los productos pueden venir como registros, como
+columnas o como la ruta de un CSV (relativa al archivo de la query). validaQuery revisa los parámetros y
+construye el dataframe de productos; pandas (y yaml) se importan hasta que se lee una query.
+En lugar de "tiempo" la query puede traer una "ruta" [origen, destino] con las aristas del grafo de carreteras en "rutas"
+(tripletas [origen, destino, minutos], registros, columnas o la ruta de un CSV relativa al archivo de la query). La "segmentacion" viene como sus perfiles
+(ver Segmentacion.aDiccionario) y las tasas_nuevos_clientes pueden ser listas de tasas por tramo (solo con el motor de eventos).
+'''
+
+MOTORES = ("clasico", "vectorizado", "eventos")
+
+# Parámetros escalares de la query: (requerido, mínimo permitido)
+ESCALARES = {
+    "tasa_clientes_compran": (True, 0),
+    "forma_a": (True, 0),
+    "forma_b": (True, 0),
+    "tasa_clientes_compran_nuevos": (True, 0),
+    "tasa_tota_nuevos_clientes": (True, 0),
+    "tiempo": (False, 0),
+    "resolucion": (False, 0),
+}
+# Parámetros por producto (diccionarios producto: valor)
+POR_PRODUCTO = ["cantidad_promedio", "tasas_nuevos_clientes", "limites_inferiores"]
+# Columnas del dataframe de productos (productos_solicitados e Id se completan si faltan)
+COLUMNAS_PRODUCTOS = ["Nombre", "precio", "peso", "dimensiones", "cantidad", "demanda_clientes"]
+# Otros parámetros opcionales que se aceptan por JSON
+OPCIONALES = ["semilla", "curva_precio", "parametros_curva", "tabla_descuentos", "camiones", "ruta", "rutas", "cache_rutas", "segmentacion"]
+# Parámetros por producto que aceptan una lista de tasas por tramo del horizonte (ver Eventos.tasaEn)
+POR_TRAMO = ["tasas_nuevos_clientes"]
+# Columnas de las aristas del grafo de carreteras
+COLUMNAS_RUTAS = ["origen", "destino", "minutos"]
+
+def esNumero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+# Función que valida una query recibida por JSON y la convierte en la query de Simulacion (productos como DataFrame)
+# @param datos (dict) query con los productos como lista de registros o como diccionario de columnas
+# @return (dict) query lista para Simulacion (ValueError si no es válida)
+def validaQuery(datos):
+    import pandas as pd
+    if(not isinstance(datos, dict)):
+        raise ValueError('La query debe ser un objeto JSON')
+    desconocidos = set(datos) - set(ESCALARES) - set(POR_PRODUCTO) - set(OPCIONALES) - {"productos"}
+    if(desconocidos):
+        raise ValueError(f'Parámetros desconocidos en la query: {sorted(desconocidos)}')
+    query = {}
+    for llave, (requerido, minimo) in ESCALARES.items():
+        if(llave not in datos):
+            if(requerido):
+                raise ValueError(f'Falta el parámetro {llave}')
+            continue
+        if(not esNumero(datos[llave]) or datos[llave] < minimo or (llave in ("forma_a", "forma_b", "resolucion") and datos[llave] == 0)):
+            raise ValueError(f'{llave} debe ser un número positivo')
+        query[llave] = datos[llave]
+    if("tiempo" in query):
+        if(not isinstance(query["tiempo"], int) and not float(query["tiempo"]).is_integer()):
+            raise ValueError('tiempo debe ser un número entero de minutos')
+        query["tiempo"] = int(query["tiempo"])
+    elif("ruta" not in datos):
+        raise ValueError('Falta el parámetro tiempo (o una ruta con sus rutas)')
+
+    if("productos" not in datos):
+        raise ValueError('Falta el parámetro productos')
+    try:
+        productos = pd.DataFrame(datos["productos"])
+    except (ValueError, TypeError) as error:
+        raise ValueError(f'productos no es una tabla válida: {error}')
+    faltantes = [columna for columna in COLUMNAS_PRODUCTOS if columna not in productos.columns]
+    if(len(productos) == 0 or faltantes):
+        raise ValueError(f'productos debe tener al menos un renglón y las columnas {COLUMNAS_PRODUCTOS} (faltan {faltantes})')
+    if(productos["Nombre"].duplicated().any()):
+        raise ValueError('Los nombres de los productos deben ser únicos')
+    for columna in COLUMNAS_PRODUCTOS[1:]:
+        if(not pd.api.types.is_numeric_dtype(productos[columna]) or (productos[columna] < 0).any()):
+            raise ValueError(f'La columna {columna} de productos debe ser numérica y no negativa')
+    if("productos_solicitados" not in productos.columns):
+        productos["productos_solicitados"] = 0
+    if("Id" not in productos.columns):
+        productos.insert(0, "Id", range(len(productos)))
+    productos["precio"] = productos["precio"].astype(float)
+    query["productos"] = productos
+
+    nombres = list(productos["Nombre"])
+    for llave in POR_PRODUCTO:
+        valores = datos.get(llave)
+        if(not isinstance(valores, dict)):
+            raise ValueError(f'{llave} debe ser un objeto producto: valor')
+        faltantes = [nombre for nombre in nombres if nombre not in valores]
+        if(faltantes or not all(esValorProducto(valor, llave in POR_TRAMO) for valor in valores.values())):
+            raise ValueError(f'{llave} debe tener un valor no negativo para cada producto (faltan {faltantes})')
+        query[llave] = valores
+
+    if("semilla" in datos):
+        if(not isinstance(datos["semilla"], int) or isinstance(datos["semilla"], bool) or datos["semilla"] < 0):
+            raise ValueError('semilla debe ser un entero no negativo')
+        query["semilla"] = datos["semilla"]
+    if("curva_precio" in datos):
+        if(datos["curva_precio"] not in CURVAS):
+            raise ValueError(f'curva_precio debe ser una de {list(CURVAS)}')
+        query["curva_precio"] = datos["curva_precio"]
+    for llave in ("parametros_curva", "tabla_descuentos"):
+        if(llave in datos):
+            if(not isinstance(datos[llave], dict)):
+                raise ValueError(f'{llave} debe ser un objeto')
+            query[llave] = datos[llave]
+    if(datos.get("camiones") is not None):
+        query["camiones"] = pd.DataFrame(datos["camiones"])
+    query.update(validaRuta(datos))
+    if(datos.get("segmentacion") is not None):
+        from Segmentacion import segmentacionDeDiccionario
+        query["segmentacion"] = segmentacionDeDiccionario(datos["segmentacion"])
+    return query
+
+
+# Valor no negativo de un parámetro por producto (o lista no vacía de valores por tramo, si se permite)
+def esValorProducto(valor, por_tramo = False):
+    if(por_tramo and isinstance(valor, list)):
+        return len(valor) > 0 and all(esNumero(v) and v >= 0 for v in valor)
+    return esNumero(valor) and valor >= 0
+
+
+# Función que valida la ruta de la query y las aristas de su grafo de carreteras
+# @return (dict) ruta (tupla origen, destino), rutas (dataframe de aristas) y cache_rutas; vacío si la query no trae ruta
+def validaRuta(datos):
+    import pandas as pd
+    if(datos.get("ruta") is None):
+        if(datos.get("rutas") is not None):
+            raise ValueError('rutas solo se usa junto con una ruta [origen, destino]')
+        return {}
+    ruta = datos["ruta"]
+    if(not isinstance(ruta, (list, tuple)) or len(ruta) != 2 or not all(isinstance(nodo, (str, int)) and not isinstance(nodo, bool) for nodo in ruta)):
+        raise ValueError('ruta debe ser una lista [origen, destino]')
+    aristas = datos.get("rutas")
+    if(aristas is None):
+        raise ValueError('Una ruta necesita las aristas del grafo de carreteras en rutas')
+    try:
+        if(isinstance(aristas, list) and all(isinstance(arista, (list, tuple)) for arista in aristas)):
+            aristas = pd.DataFrame(aristas, columns = COLUMNAS_RUTAS)
+        else:
+            aristas = pd.DataFrame(aristas)
+    except (ValueError, TypeError) as error:
+        raise ValueError(f'rutas no es una tabla de aristas válida: {error}')
+    faltantes = [columna for columna in COLUMNAS_RUTAS if columna not in aristas.columns]
+    if(len(aristas) == 0 or faltantes):
+        raise ValueError(f'rutas debe tener al menos una arista y las columnas {COLUMNAS_RUTAS} (faltan {faltantes})')
+    if(not pd.api.types.is_numeric_dtype(aristas["minutos"]) or (aristas["minutos"] < 0).any()):
+        raise ValueError('Los minutos de las aristas deben ser numéricos y no negativos')
+    nodos = set(aristas["origen"]) | set(aristas["destino"])
+    desconocidos = [nodo for nodo in ruta if nodo not in nodos]
+    if(desconocidos):
+        raise ValueError(f'Nodos de la ruta que no están en rutas: {desconocidos}')
+    validada = {"ruta": tuple(ruta), "rutas": aristas[COLUMNAS_RUTAS]}
+    if(datos.get("cache_rutas") is not None):
+        if(not isinstance(datos["cache_rutas"], str)):
+            raise ValueError('cache_rutas debe ser la ruta de un directorio')
+        validada["cache_rutas"] = datos["cache_rutas"]
+    return validada
+
+
+# Función que revisa que el motor pueda simular la query (las tasas por tramo solo las simula el motor de eventos)
+# @return (str) el motor (ValueError si no es válido para la query)
+def validaMotor(query, engine):
+    if(engine not in MOTORES):
+        raise ValueError(f'engine debe ser uno de {list(MOTORES)}')
+    por_tramo = [llave for llave in POR_TRAMO if any(isinstance(valor, list) for valor in query.get(llave, {}).values())]
+    if(por_tramo and engine != "eventos"):
+        raise ValueError(f'{por_tramo} con tasas por tramo solo se pueden simular con engine "eventos"')
+    return engine
+
+
+
+
+# Función que lee una query de un archivo JSON o YAML
+# @param ruta (str) archivo .json, .yaml o .yml
+# @param productos (str) CSV de productos (reemplaza los productos del archivo)
+# @return (dict) query validada (ver validaQuery)
+def leeQuery(ruta, productos = None):
+    with open(ruta, encoding="utf-8") as archivo:
+        if(ruta.endswith((".yaml", ".yml"))):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError('Leer queries en YAML requiere PyYAML (pip install pyyaml)')
+            datos = yaml.safe_load(archivo)
+        else:
+            datos = json.load(archivo)
+    if(not isinstance(datos, dict)):
+        raise ValueError(f'{ruta} no contiene una query')
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    if(productos is None and isinstance(datos.get("productos"), str)):
+        productos = os.path.join(directorio, datos["productos"])
+    datos = dict(datos)
+    if(productos is not None):
+        import pandas as pd
+        datos["productos"] = pd.read_csv(productos)
+    # El CSV de aristas y el directorio de la caché de rutas también son relativos al archivo de la query
+    if(isinstance(datos.get("rutas"), str)):
+        import pandas as pd
+        datos["rutas"] = pd.read_csv(os.path.join(directorio, datos["rutas"]))
+    if(isinstance(datos.get("cache_rutas"), str)):
+        datos["cache_rutas"] = os.path.join(directorio, datos["cache_rutas"])
+    return validaQuery(datos)
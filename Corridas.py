@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from Consultas import MOTORES, leeQuery, validaMotor
+from Simulacion import Simulacion
+from Salida import EscritorTicks
+
+'''
+Corridas por lotes de la simulación de Colmena desde la línea de comandos (sin gráficas)
+Cada query (JSON o YAML, con sus productos en un CSV) se simula y sus resultados se escriben en
+<salida>/<nombre de la query>/: resultado.json (métricas, contadores y, con --series, las series de tiempo),
+productos.csv (dataframe de productos al terminar) y, con --ticks, la salida por minuto (ticks.csv o ticks.parquet/).
+
+    python Corridas.py escenario.yaml otro.json --productos productos.csv --salida resultados --workers 4
+'''
+
+
+# Función que simula una query y escribe sus resultados en un directorio
+# @param ruta (str) archivo de la query (ver Consultas.leeQuery)
+# @param productos (str) CSV de productos (si no viene en la query)
+# @param ticks (str) formato de la salida por minuto ("csv" o "parquet"; None no la escribe)
+# @return (dict) resumen de la corrida: query, directorio, ingresos y segundos
+def corraQuery(ruta, directorio, productos = None, engine = "vectorizado", semilla = None, series = False, ticks = None, instrumentacion = False):
+    inicio = time.perf_counter()
+    query = leeQuery(ruta, productos)
+    validaMotor(query, engine)
+    os.makedirs(directorio, exist_ok=True)
+    salida = EscritorTicks(os.path.join(directorio, "ticks." + ticks), ticks) if ticks is not None else None
+    try:
+        resultado = Simulacion(query, semilla, instrumentacion = instrumentacion).run(engine = engine, mostrar = False, salida = salida, guardar_series = series)
+    finally:
+        if(salida is not None):
+            salida.cierra()
+    with open(os.path.join(directorio, "resultado.json"), "w", encoding="utf-8") as archivo:
+        json.dump(resultado.aDiccionario(series), archivo, indent=2, ensure_ascii=False)
+    resultado.productos.to_csv(os.path.join(directorio, "productos.csv"), index=False)
+    return {"query": ruta, "directorio": directorio, "ingresos": float(resultado.ingresosFinales()[0]), "segundos": time.perf_counter() - inicio}
+
+
+# Corre una query del lote (en un proceso del pool): los errores se regresan en el resumen para no detener el lote
+def _corraTarea(tarea):
+    try:
+        return corraQuery(**tarea)
+    except Exception as error:
+        return {"query": tarea["ruta"], "directorio": tarea["directorio"], "error": f'{type(error).__name__}: {error}'}
+
+
+# Función que corre un lote de queries
+# @param rutas (list) archivos de las queries; cada una escribe en <salida>/<nombre del archivo sin extensión>
+# @param workers (int) número de procesos (1 corre en el proceso actual)
+# @return (list) resumen de cada corrida (con "error" si falló)
+def corraLote(rutas, salida = "resultados", workers = 1, **opciones):
+    tareas = [dict(opciones, ruta = ruta, directorio = os.path.join(salida, os.path.splitext(os.path.basename(ruta))[0])) for ruta in rutas]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tareas)))
+    if(workers == 1):
+        return [_corraTarea(tarea) for tarea in tareas]
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(_corraTarea, tareas))
+
+
+def main(argumentos = None):
+    parser = argparse.ArgumentParser(description = "Corridas por lotes de la simulación de Colmena")
+    parser.add_argument("queries", nargs = "+", help = "archivos de las queries (JSON o YAML)")
+    parser.add_argument("--productos", help = "CSV de productos (si la query no indica el suyo)")
+    parser.add_argument("--salida", default = "resultados", help = "directorio de resultados")
+    parser.add_argument("--engine", default = "vectorizado", choices = MOTORES)
+    parser.add_argument("--semilla", type = int, default = None, help = "semilla (por defecto, la de la query)")
+    parser.add_argument("--series", action = "store_true", help = "incluye las series de tiempo en resultado.json")
+    parser.add_argument("--ticks", choices = ("csv", "parquet"), help = "escribe la salida por minuto")
+    parser.add_argument("--instrumentacion", action = "store_true", help = "incluye el tiempo por fase y la memoria")
+    parser.add_argument("--workers", type = int, default = 1, help = "procesos para correr varias queries a la vez (0 utiliza todos los núcleos)")
+    argumentos = parser.parse_args(argumentos)
+
+    resumenes = corraLote(argumentos.queries, argumentos.salida, argumentos.workers, productos = argumentos.productos, engine = argumentos.engine, semilla = argumentos.semilla, series = argumentos.series, ticks = argumentos.ticks, instrumentacion = argumentos.instrumentacion)
+    for resumen in resumenes:
+        if("error" in resumen):
+            print(f'ERROR {resumen["query"]}: {resumen["error"]}', file = sys.stderr)
+        else:
+            print(f'{resumen["query"]}: ingresos {resumen["ingresos"]:.2f} en {resumen["segundos"]:.2f} s -> {resumen["directorio"]}')
+    return 1 if any("error" in resumen for resumen in resumenes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import numpy as np
+from AlgoritmosAuxiliares import simularTasaDescuento
+from Colmena import aplicaDescuentoIndividual
+
+'''
+Descuentos en bloque
+En lugar de simular el descuento de cada compra con aplicaDescuentoIndividual (una elección del método, dos betas y una
+comparación por compra), se simulan los descuentos de todas las compras de un minuto con una extracción vectorizada y el
+método se regresa como un código entero (índice en TIPOS_DESCUENTO, -1 sin descuento), así el conteo por método es un bincount.
+Opcionalmente, una tabla estática por producto reemplaza la simulación (ver TablaDescuentos).
+'''
+
+# Métodos de descuento; el código de cada método es su índice
+TIPOS_DESCUENTO = ["VideoJuego", "Cupón", "Trivia", "Sorteo"]
+# Código de una compra sin descuento
+SIN_DESCUENTO = -1
+
+
+'''
+Tabla estática de descuentos por producto ("si los descuentos son estáticos ... de acuerdo a un diccionario regrese un valor predeterminado")
+Cada producto de la tabla recibe siempre el mismo descuento con el mismo método (con una probabilidad opcional);
+los productos que no están en la tabla conservan el descuento simulado con la beta.
+'''
+class TablaDescuentos:
+    # @param tabla (dict) producto: valor del descuento (método Cupón), (método, valor) o {"metodo", "valor", "probabilidad"}
+    # @param nombres (list) productos del catálogo (en su orden)
+    def __init__(self, tabla, nombres):
+        self.tabla = dict(tabla)
+        n_productos = len(nombres)
+        self.estatico = np.zeros(n_productos, dtype=bool)
+        self.valor = np.zeros(n_productos)
+        self.metodo = np.full(n_productos, SIN_DESCUENTO, dtype=np.int64)
+        self.probabilidad = np.ones(n_productos)
+        for k, producto in enumerate(nombres):
+            if(producto not in self.tabla):
+                continue
+            entrada = self.tabla[producto]
+            if(isinstance(entrada, dict)):
+                metodo, valor, probabilidad = entrada.get("metodo", "Cupón"), entrada["valor"], entrada.get("probabilidad", 1.0)
+            elif(isinstance(entrada, (tuple, list))):
+                (metodo, valor), probabilidad = entrada, 1.0
+            else:
+                metodo, valor, probabilidad = "Cupón", entrada, 1.0
+            if(metodo not in TIPOS_DESCUENTO):
+                raise ValueError(f'Método de descuento desconocido: {metodo}')
+            if(not 0 <= valor <= 1 or not 0 <= probabilidad <= 1):
+                raise ValueError(f'El descuento y la probabilidad de {producto} deben estar entre 0 y 1')
+            self.estatico[k] = True
+            self.valor[k] = valor
+            self.metodo[k] = TIPOS_DESCUENTO.index(metodo)
+            self.probabilidad[k] = probabilidad
+
+    def __str__(self):
+        return 'Tabla de descuentos: ' + str(self.tabla)
+
+
+'''
+Motor de descuentos de una simulación: descuentos simulados con la beta (forma_a, forma_b) o de una tabla estática
+'''
+class MotorDescuentos:
+    # @param nombres (list) productos del catálogo (en su orden)
+    # @param tabla (dict o TablaDescuentos) tabla estática de descuentos por producto (opcional)
+    def __init__(self, forma_a, forma_b, nombres, tabla = None):
+        self.forma_a = forma_a
+        self.forma_b = forma_b
+        self.nombres = list(nombres)
+        self.tabla = tabla if tabla is None or isinstance(tabla, TablaDescuentos) else TablaDescuentos(tabla, self.nombres)
+
+    # Descuentos de un lote de compras
+    # @param productos (array) índice del producto de cada compra
+    # @param rng generador del flujo de descuentos
+    # @param rng_estaticos generador de la probabilidad de los descuentos de la tabla estática (None la extrae de rng)
+    # @return (valores, metodos) valor del descuento de cada compra (0 sin descuento) y código del método (SIN_DESCUENTO sin descuento)
+    def lote(self, productos, rng, rng_estaticos = None):
+        n = len(productos)
+        # Método, elegibilidad y valor simulados en bloque: un arreglo por campo para todo el lote (no intercalados compra por compra
+        # como en individual, así que los dos caminos coinciden en distribución pero no extracción por extracción)
+        metodos = rng.integers(0, len(TIPOS_DESCUENTO), n)
+        tasa_descuento = simularTasaDescuento(self.forma_a, self.forma_b, n, rng)
+        elegible = rng.random(n) < tasa_descuento
+        valores = np.where(elegible, simularTasaDescuento(self.forma_a, self.forma_b, n, rng), 0)
+        metodos = np.where(elegible, metodos, SIN_DESCUENTO)
+        if(self.tabla is not None and self.tabla.estatico.any()):
+            # La probabilidad de la tabla se extrae para todo el lote aunque ningún producto del lote sea estático, así
+            # las extracciones siguientes no dependen de qué productos del catálogo están en la tabla
+            aplica = (rng if rng_estaticos is None else rng_estaticos).random(n) < self.tabla.probabilidad[productos]
+            estatico = self.tabla.estatico[productos]
+            valores = np.where(estatico, np.where(aplica, self.tabla.valor[productos], 0), valores)
+            metodos = np.where(estatico, np.where(aplica, self.tabla.metodo[productos], SIN_DESCUENTO), metodos)
+        return valores, metodos
+
+    # Descuento de una sola compra del producto k (para los motores que simulan cliente por cliente)
+    # @return (valor, tipo) como aplicaDescuentoIndividual: (0, None) sin descuento
+    def individual(self, k, rng):
+        if(self.tabla is not None and self.tabla.estatico[k]):
+            if(self.tabla.probabilidad[k] < 1 and rng.random() >= self.tabla.probabilidad[k]):
+                return 0, None
+            return float(self.tabla.valor[k]), TIPOS_DESCUENTO[self.tabla.metodo[k]]
+        return aplicaDescuentoIndividual(None, self.forma_a, self.forma_b, self.nombres[k], rng)
+
+
+# Conteo de compras por método de descuento (arreglo en el orden de TIPOS_DESCUENTO)
+def cuentaMetodos(metodos):
+    metodos = np.asarray(metodos)
+    return np.bincount(metodos[metodos != SIN_DESCUENTO], minlength=len(TIPOS_DESCUENTO))
+
+
+# Agrega un conteo por método al diccionario método: compras (como METODOS_DESCUENTO); solo aparecen los métodos utilizados
+def acumulaMetodos(metodos_descuento, conteo):
+    for metodo, n in zip(TIPOS_DESCUENTO, np.asarray(conteo).tolist()):
+        if(n > 0):
+            metodos_descuento[metodo] = metodos_descuento.get(metodo, 0) + int(n)
+    return metodos_descuento
@@ -0,0 +1,73 @@
+import heapq
+import numpy as np
+
+'''
+Agenda de eventos discretos de la simulación de Colmena (cola de prioridad sobre un heap)
+Los eventos se atienden en orden de tiempo; cuando coinciden en el tiempo se atienden por tipo (PRIORIDADES)
+y, dentro del mismo tipo, en el orden en que se agendaron.
+No hay un evento de compra: la compra (cantidad, límite de inventario y descuento) se resuelve al atender la llegada del
+cliente, porque ocurre en el mismo instante y ningún otro evento puede quedar entre las dos. Es una simplificación deliberada;
+si se modela un tiempo de servicio, la compra se agendaría como un tipo propio después de la llegada.
+'''
+
+# Prioridad de cada tipo de evento cuando coinciden en el tiempo (menor se atiende primero)
+# Al cierre de un periodo primero se registran los agotamientos, luego se actualizan los precios y al final se reporta el estado
+PRIORIDADES = {"agotamiento": 0, "precio": 1, "reporte": 2, "llegada": 3}
+
+
+class AgendaEventos:
+    def __init__(self):
+        self._heap = []
+        # Contador que desempata los eventos del mismo tipo en el mismo tiempo (orden de llegada a la agenda)
+        # (un entero, así la agenda se puede guardar en un punto de control)
+        self._contador = 0
+        self.atendidos = 0
+
+    # Agenda un evento
+    # @param tiempo (float) tiempo del evento en minutos
+    # @param tipo (str) tipo de evento ("llegada", "precio", "agotamiento" o "reporte")
+    # @param producto (int) índice del producto del evento (None si no corresponde a un producto)
+    def agenda(self, tiempo, tipo, producto = None):
+        heapq.heappush(self._heap, (tiempo, PRIORIDADES[tipo], self._contador, tipo, producto))
+        self._contador += 1
+
+    # Saca el siguiente evento de la agenda
+    # @return (tiempo, tipo, producto)
+    def siguiente(self):
+        tiempo, _, _, tipo, producto = heapq.heappop(self._heap)
+        self.atendidos += 1
+        return tiempo, tipo, producto
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __str__(self):
+        return 'Agenda de eventos: ' + str(len(self)) + ' pendientes y ' + str(self.atendidos) + ' atendidos'
+
+
+# Función que regresa la tasa de llegadas vigente en el tiempo t y el tiempo en el que deja de estar vigente
+# @param tasa (float o list) tasa constante por minuto, o tasas por tramo que dividen el horizonte en tramos de la misma duración
+# @param tiempo (float) horizonte de la simulación en minutos
+def tasaEn(tasa, t, tiempo):
+    if(np.isscalar(tasa)):
+        return tasa, np.inf
+    duracion = tiempo / len(tasa)
+    tramo = min(int(t // duracion), len(tasa) - 1)
+    return tasa[tramo], (tramo + 1) * duracion
+
+
+# Función que simula el tiempo de la siguiente llegada de un proceso de Poisson (tiempos entre llegadas exponenciales)
+# Con tasas por tramo, si la llegada cae después del fin del tramo se vuelve a extraer desde el inicio del siguiente (pérdida de memoria de la exponencial)
+# @param rng (np.random.Generator) generador de números aleatorios
+# @param t (float) tiempo actual en minutos
+# @return (float) tiempo de la siguiente llegada (None si ya no hay llegadas antes del fin del horizonte)
+def siguienteLlegada(rng, tasa, t, tiempo):
+    while(t < tiempo):
+        valor, fin = tasaEn(tasa, t, tiempo)
+        fin = min(fin, tiempo)
+        if(valor > 0):
+            llegada = t + rng.exponential() / valor
+            if(llegada < fin):
+                return llegada
+        t = fin
+    return None
@@ -0,0 +1,116 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from Simulacion import Simulacion
+from Aleatorios import FlujosAleatorios, semillaRaiz
+from AlgoritmosAuxiliares import simulaPoblacionClientes
+from PoblacionClientes import combinaPoblaciones
+from Rutas import MatrizDistancias, tiemposDeRuta
+
+'''
+Simulación de una flota de camiones en el mismo horizonte de tiempo
+"El procedimiento anterior se hará por camión": cada camión tiene su propia query (tiempo de ruta, inventario y tasas)
+y su pool de clientes; opcionalmente, los camiones de una misma región comparten un pool regional de clientes extemporáneos.
+El tiempo de ruta de los camiones con origen y destino se calcula en bloque con la matriz de distancias de la flota.
+Los camiones se reparten entre procesos y sus resultados se combinan al final.
+'''
+class Flota:
+    # @param regiones (dict) región: {"tasa_tota_nuevos_clientes": tasa del pool regional de clientes extemporáneos}
+    # @param rutas (MatrizDistancias, DataFrame o str) matriz de distancias (o aristas del grafo de carreteras) para los tiempos de ruta
+    # @param cache_rutas (str) con aristas, directorio de la caché de distancias en disco (None la mantiene solo en memoria)
+    def __init__(self, regiones = None, rutas = None, cache_rutas = None):
+        # Lista de camiones: {"nombre", "query", "region", "ruta"}
+        self.camiones = []
+        self.regiones = regiones or {}
+        self.rutas = rutas if rutas is None or isinstance(rutas, MatrizDistancias) else MatrizDistancias(rutas, cache_rutas)
+
+    # Agrega un camión a la flota
+    # @param query (dict) la misma query que recibe Simulacion (tiempo de ruta, productos del camión, tasas, etc.)
+    # @param region (str) región cuyo pool de clientes extemporáneos comparte el camión (None para un pool propio)
+    # @param ruta (tuple) (origen, destino) en el grafo de carreteras; el tiempo de ruta de la query se calcula con la matriz de distancias
+    def agregaCamion(self, nombre, query, region = None, ruta = None):
+        if(region is not None and region not in self.regiones):
+            raise ValueError(f'Región desconocida: {region}')
+        if(ruta is not None and self.rutas is None):
+            raise ValueError('La flota no tiene grafo de carreteras para calcular la ruta')
+        self.camiones.append({"nombre": nombre, "query": query, "region": region, "ruta": ruta})
+
+    # Tiempo de ruta de cada camión: el de su query o, si tiene ruta, el calculado en bloque con la matriz de distancias
+    def tiemposDeRuta(self):
+        tiempos = [camion["query"].get("tiempo") for camion in self.camiones]
+        con_ruta = [i for i, camion in enumerate(self.camiones) if camion["ruta"] is not None]
+        if(con_ruta):
+            calculados = tiemposDeRuta(self.rutas, [self.camiones[i]["ruta"][0] for i in con_ruta], [self.camiones[i]["ruta"][1] for i in con_ruta])
+            for i, tiempo in zip(con_ruta, calculados):
+                tiempos[i] = tiempo
+        return tiempos
+
+    def __len__(self):
+        return len(self.camiones)
+
+    # Simula todos los camiones de la flota en un pool de procesos
+    # @param workers (int) número de procesos (None utiliza todos los núcleos; 1 corre en el proceso actual)
+    # @param semilla (int o SeedSequence) semilla de la flota (de ella se derivan las semillas de camiones y regiones; una SeedSequence no se modifica)
+    # @param guardar_series (bool) indica si los resultados de los camiones guardan sus series de tiempo (False mantiene la memoria
+    #        constante con muchos camiones o rutas largas; las métricas de la flota solo usan los totales)
+    # @return (dict) "camiones": resultado por camión, "flota": métricas combinadas, "regiones": canastas combinadas por región
+    def run(self, workers = None, semilla = None, engine = "vectorizado", tiempo_bool = True, tiempo_cero = True, guardar_series = False):
+        raiz = semillaRaiz(semilla)
+        semillas_camiones = raiz.spawn(len(self.camiones))
+        semillas_regiones = dict(zip(sorted(self.regiones), raiz.spawn(len(self.regiones))))
+        tareas = []
+        for camion, semilla_camion, tiempo in zip(self.camiones, semillas_camiones, self.tiemposDeRuta()):
+            region = camion["region"]
+            pool_regional = None if region is None else (self.regiones[region]["tasa_tota_nuevos_clientes"], semillas_regiones[region])
+            query = camion["query"] if camion["ruta"] is None else dict(camion["query"], tiempo = tiempo)
+            tareas.append((query, semilla_camion, pool_regional, engine, tiempo_bool, tiempo_cero, guardar_series))
+
+        if(workers is None):
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(tareas)))
+        if(workers == 1):
+            salidas = [_simulaCamion(tarea) for tarea in tareas]
+        else:
+            with ProcessPoolExecutor(max_workers = workers) as pool:
+                salidas = list(pool.map(_simulaCamion, tareas, chunksize = max(1, len(tareas) // (4 * workers))))
+
+        resultados = {camion["nombre"]: resultado for camion, (resultado, _) in zip(self.camiones, salidas)}
+        regiones = {}
+        for region in self.regiones:
+            canastas = [canasta for camion, (_, canasta) in zip(self.camiones, salidas) if camion["region"] == region and canasta is not None]
+            if(canastas):
+                regiones[region] = combinaPoblaciones(canastas)
+        return {"camiones": resultados, "flota": combinaResultados(resultados.values()), "regiones": regiones}
+
+
+# Función que simula un camión (se ejecuta en un proceso del pool)
+def _simulaCamion(tarea):
+    query, semilla, pool_regional, engine, tiempo_bool, tiempo_cero, guardar_series = tarea
+    # La simulación modifica el dataframe de productos, por lo que cada camión trabaja sobre una copia
+    query = dict(query)
+    query["productos"] = query["productos"].copy()
+    clientes_extemporaneos = None
+    if(pool_regional is not None):
+        # Todos los camiones de la región reconstruyen el mismo pool (mismos clientes y clusters) a partir de la semilla regional;
+        # con segmentación en la query los clusters del pool se muestrean de sus proporciones, como en el pool propio de Simulacion
+        tasa, semilla_region = pool_regional
+        nombres = list(query["productos"]["Nombre"])
+        clientes_extemporaneos = simulaPoblacionClientes(tasa, nombres, FlujosAleatorios(semilla_region).generador("clientes_extemporaneos"), query.get("segmentacion"))
+    simulacion = Simulacion(query, semilla, clientes_extemporaneos)
+    resultado = simulacion.run(tiempo_bool = tiempo_bool, tiempo_cero = tiempo_cero, engine = engine, mostrar = False, guardar_series = guardar_series)
+    return resultado, clientes_extemporaneos if pool_regional is not None and tiempo_bool else None
+
+
+# Función que combina los resultados de varios camiones en métricas de la flota (los productos se combinan por nombre)
+def combinaResultados(resultados):
+    flota = {"ingresos": 0.0, "ingresos_x_producto": {}, "CANTIDADES_SOLICITADAS": {}, "CANTIDADES_NO_SATISFECHAS": {}, "METODOS_DESCUENTO": {}, "espacio": 0.0, "peso_total": 0.0, "camiones": 0}
+    for resultado in resultados:
+        ingresos, ingresos_x_producto = resultado.ingresosFinales()
+        flota["ingresos"] += float(ingresos)
+        for llave, valores in [("ingresos_x_producto", ingresos_x_producto), ("CANTIDADES_SOLICITADAS", resultado.CANTIDADES_SOLICITADAS), ("CANTIDADES_NO_SATISFECHAS", resultado.CANTIDADES_NO_SATISFECHAS), ("METODOS_DESCUENTO", resultado.METODOS_DESCUENTO)]:
+            for nombre, valor in valores.items():
+                flota[llave][nombre] = flota[llave].get(nombre, 0) + valor
+        flota["espacio"] += float(resultado.espacio)
+        flota["peso_total"] += float(resultado.peso_total)
+        flota["camiones"] += 1
+    return flota
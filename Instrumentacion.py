@@ -0,0 +1,144 @@
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import nullcontext
+try:
+    import resource
+except ImportError:
+    # resource no existe en Windows; ahí solo se reporta la memoria de tracemalloc
+    resource = None
+
+'''
+Instrumentación opcional de la simulación de Colmena: tiempo por fase, contadores y memoria máxima
+Las fases se miden con un administrador de contexto (with instrumentacion.fase("muestreo"): ...) y los contadores se
+incrementan en bloque. SinInstrumentacion tiene la misma interfaz y no hace nada, así el costo con la instrumentación
+apagada es solo el de la llamada al método.
+'''
+
+
+# Memoria residente máxima del proceso en bytes (None si no está disponible)
+def memoriaResidenteMaxima():
+    if(resource is None):
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta kilobytes y macOS bytes
+    return maximo if sys.platform == "darwin" else maximo * 1024
+
+
+'''
+Medición de una fase: al salir acumula su tiempo y una llamada en la instrumentación
+'''
+class _MedicionFase:
+    __slots__ = ("instrumentacion", "nombre", "inicio")
+
+    def __init__(self, instrumentacion, nombre):
+        self.instrumentacion = instrumentacion
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.instrumentacion.registraFase(self.nombre, time.perf_counter() - self.inicio)
+
+
+class Instrumentacion:
+    # @param trazar_memoria (bool) utiliza tracemalloc para medir la memoria pico de Python (más preciso, pero hace más lenta la simulación)
+    def __init__(self, trazar_memoria = False):
+        self.activa = True
+        # fase: [segundos, llamadas]
+        self.fases = {}
+        self.contadores = {}
+        self.trazar_memoria = trazar_memoria
+        self._inicio_traza = False
+        if(trazar_memoria and not tracemalloc.is_tracing()):
+            tracemalloc.start()
+            self._inicio_traza = True
+
+    # Administrador de contexto que mide una fase (las fases se pueden anidar; cada una acumula su propio tiempo)
+    def fase(self, nombre):
+        return _MedicionFase(self, nombre)
+
+    def registraFase(self, nombre, segundos):
+        medicion = self.fases.get(nombre)
+        if(medicion is None):
+            self.fases[nombre] = [segundos, 1]
+        else:
+            medicion[0] += segundos
+            medicion[1] += 1
+
+    # Incrementa un contador (llegadas, compras, agotamientos, actualizaciones de precio, etc.)
+    def cuenta(self, nombre, n = 1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + int(n)
+
+    # Memoria máxima: residente del proceso y, si se trazó, el pico de Python según tracemalloc
+    def memoria(self):
+        memoria = {"residente_maxima": memoriaResidenteMaxima()}
+        if(self.trazar_memoria and tracemalloc.is_tracing()):
+            memoria["pico_python"] = tracemalloc.get_traced_memory()[1]
+        return memoria
+
+    # Detiene la traza de memoria si esta instrumentación la inició
+    def termina(self):
+        if(self._inicio_traza):
+            self.pico_python = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self._inicio_traza = False
+
+    # Resumen de la instrumentación como diccionario
+    def aDiccionario(self):
+        memoria = self.memoria()
+        if(hasattr(self, "pico_python")):
+            memoria["pico_python"] = self.pico_python
+        return {
+            "fases": {nombre: {"segundos": segundos, "llamadas": llamadas} for nombre, (segundos, llamadas) in self.fases.items()},
+            "contadores": dict(self.contadores),
+            "memoria": memoria,
+        }
+
+    def aJSON(self, **kwargs):
+        return json.dumps(self.aDiccionario(), **kwargs)
+
+    # Texto en el formato de exposición de Prometheus
+    def aPrometheus(self, prefijo = "colmena"):
+        return aPrometheus(self.aDiccionario(), prefijo)
+
+    def __str__(self):
+        return 'Instrumentación: ' + ', '.join(f'{nombre} {segundos:.4f} s' for nombre, (segundos, _) in self.fases.items())
+
+
+'''
+Instrumentación apagada: misma interfaz que Instrumentacion, sin efecto
+'''
+class SinInstrumentacion:
+    activa = False
+    _CONTEXTO = nullcontext()
+
+    def fase(self, nombre):
+        return self._CONTEXTO
+
+    def cuenta(self, nombre, n = 1):
+        pass
+
+    def termina(self):
+        pass
+
+    def aDiccionario(self):
+        return None
+
+
+# Función que convierte el resumen de una instrumentación (Instrumentacion.aDiccionario) al formato de texto de Prometheus
+def aPrometheus(resumen, prefijo = "colmena"):
+    lineas = [f'# TYPE {prefijo}_fase_segundos counter']
+    lineas += [f'{prefijo}_fase_segundos{{fase="{nombre}"}} {fase["segundos"]}' for nombre, fase in resumen["fases"].items()]
+    lineas.append(f'# TYPE {prefijo}_fase_llamadas counter')
+    lineas += [f'{prefijo}_fase_llamadas{{fase="{nombre}"}} {fase["llamadas"]}' for nombre, fase in resumen["fases"].items()]
+    lineas.append(f'# TYPE {prefijo}_eventos_total counter')
+    lineas += [f'{prefijo}_eventos_total{{contador="{nombre}"}} {valor}' for nombre, valor in resumen["contadores"].items()]
+    for nombre, valor in resumen["memoria"].items():
+        if(valor is not None):
+            lineas.append(f'# TYPE {prefijo}_memoria_{nombre}_bytes gauge')
+            lineas.append(f'{prefijo}_memoria_{nombre}_bytes {valor}')
+    return '\n'.join(lineas) + '\n'
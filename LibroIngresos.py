@@ -0,0 +1,52 @@
+import numpy as np
+
+'''
+Libro de ingresos: lleva por producto la suma acumulada de unidades con descuento aplicado (cantidad * (1 - descuento))
+Sustituye a las listas de DESCUENTOS_APLICADOS, de modo que actualizar los ingresos en cada tiempo cuesta O(productos)
+en lugar de recorrer todas las ventas registradas desde el inicio de la simulación
+'''
+class LibroIngresos:
+    # @param nombres (list) nombres de los productos (en el orden del catálogo)
+    def __init__(self, nombres):
+        self.nombres = list(nombres)
+        self.indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+        # Suma de unidades con descuento por producto
+        self.unidades = np.zeros(len(self.nombres))
+        # Cantidad de ventas registradas por producto
+        self.ventas = np.zeros(len(self.nombres), dtype=int)
+
+    # Registra una venta del producto k (índice en el catálogo)
+    def registra(self, k, unidades):
+        self.unidades[k] += unidades
+        self.ventas[k] += 1
+
+    # Registra en bloque un arreglo de ventas (índice del producto de cada venta y sus unidades con descuento)
+    def registraLote(self, productos, unidades):
+        self.unidades += np.bincount(productos, weights=unidades, minlength=len(self.nombres))
+        self.ventas += np.bincount(productos, minlength=len(self.nombres))
+
+    # Ingresos totales y por producto (arreglo) dados los precios actuales en el orden del catálogo
+    def ingresos(self, precios):
+        ingresos_por_producto = np.asarray(precios, dtype=float) * self.unidades
+        return ingresos_por_producto.sum(), ingresos_por_producto
+
+    # Ingresos de una trayectoria de precios (por ejemplo, MotorPrecios.trayectoria) sin registrar las ventas en el libro
+    # @param precios (array) precio por periodo (renglón) y producto (columna)
+    # @param unidades (array) unidades con descuento vendidas en cada periodo y producto (se suman a las ya registradas)
+    # @return (ingresos, ingresos_por_producto) ingresos totales por periodo y por periodo y producto
+    def ingresosTrayectoria(self, precios, unidades):
+        ingresos_por_producto = np.asarray(precios, dtype=float) * (self.unidades + np.cumsum(unidades, axis=0))
+        return ingresos_por_producto.sum(axis=1), ingresos_por_producto
+
+    # Acceso por nombre de producto: regresa la suma de unidades con descuento (compatible con calculaIngresosConDescuento)
+    def __getitem__(self, producto):
+        return float(self.unidades[self.indice[producto]])
+
+    def __contains__(self, producto):
+        return producto in self.indice
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __str__(self):
+        return 'Libro de ingresos: ' + str({nombre: float(u) for nombre, u in zip(self.nombres, self.unidades)})
@@ -0,0 +1,52 @@
+import numpy as np
+
+'''
+Muestreo sin reemplazo de índices de clientes con un Generator de NumPy
+Se muestrean enteros (posiciones en la población), nunca listas de objetos Cliente, y se hace en bloque para todos los productos de un tiempo
+'''
+
+# Si la demanda de un producto es mayor a esta fracción de la población se utiliza un barajado parcial en lugar del rechazo de duplicados
+FRACCION_DENSA = 0.1
+
+
+# Función que muestrea k índices distintos de una población de tamaño n
+# Generator.choice sin reemplazo utiliza el algoritmo de Floyd cuando k es pequeño respecto a n y un barajado parcial en otro caso
+# @param rng (np.random.Generator) generador de números aleatorios
+def muestreaSinReemplazo(rng, n, k):
+    k = min(k, n)
+    if(k == 0):
+        return np.zeros(0, dtype=np.int64)
+    return rng.choice(n, k, replace=False)
+
+
+# Función que muestrea, para todos los productos de un tiempo a la vez, los clientes que compran cada producto
+# Cada producto obtiene demandas[p] índices distintos de la población (las muestras de productos distintos son independientes)
+# @param rng (np.random.Generator) generador de números aleatorios
+# @param tam_poblacion (int) tamaño de la población de clientes
+# @param demandas (array) cantidad de clientes por producto (se corrige para no superar el tamaño de la población)
+# @return (clientes, productos) índice del cliente y del producto de cada compra, agrupados por producto
+def muestreaPorProducto(rng, tam_poblacion, demandas):
+    demandas = np.minimum(np.asarray(demandas, dtype=np.int64), tam_poblacion)
+    productos = np.repeat(np.arange(len(demandas)), demandas)
+    clientes = np.empty(len(productos), dtype=np.int64)
+    if(len(productos) == 0):
+        return clientes, productos
+    inicio = np.cumsum(demandas) - demandas
+
+    # Productos con demanda cercana al tamaño de la población: barajado parcial por producto
+    densos = demandas > FRACCION_DENSA * tam_poblacion
+    for p in np.nonzero(densos)[0]:
+        clientes[inicio[p]:inicio[p] + demandas[p]] = rng.choice(tam_poblacion, demandas[p], replace=False)
+
+    # Resto de los productos: una sola extracción con reemplazo y se vuelven a extraer los duplicados dentro de cada producto
+    posiciones = np.nonzero(~densos[productos])[0]
+    clientes[posiciones] = rng.integers(0, tam_poblacion, len(posiciones))
+    while(len(posiciones) > 0):
+        llave = productos[posiciones] * tam_poblacion + clientes[posiciones]
+        orden = np.argsort(llave, kind="stable")
+        repetido = llave[orden][1:] == llave[orden][:-1]
+        repetidos = posiciones[orden[1:][repetido]]
+        if(len(repetidos) == 0):
+            break
+        clientes[repetidos] = rng.integers(0, tam_poblacion, len(repetidos))
+    return clientes, productos
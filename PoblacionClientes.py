@@ -0,0 +1,165 @@
+import numpy as np
+from Cliente import Cliente
+
+'''
+Población de clientes en formato columnar (estructura de arreglos)
+En lugar de un objeto Cliente por llegada, se guardan los ids y clusters en arreglos, y las canastas como una
+matriz dispersa cliente x producto (formato de coordenadas) con el valor del descuento aplicado.
+Los textos de despliegue (nombre, dirección, teléfono) y los objetos Cliente se construyen solo cuando se solicitan.
+'''
+class PoblacionClientes:
+    # Capacidad inicial de los arreglos de compras (crecen al doble cuando se llenan)
+    CAPACIDAD_INICIAL = 1024
+
+    # @param clusters (array) cluster de cada cliente (el id del cliente es su posición)
+    # @param nombres_productos (list) nombres de los productos (en el orden del catálogo)
+    def __init__(self, clusters, nombres_productos):
+        self.clusters = np.asarray(clusters, dtype=np.int16)
+        self.ids = np.arange(len(self.clusters))
+        self.nombres_productos = list(nombres_productos)
+        self.indice_productos = {nombre: i for i, nombre in enumerate(self.nombres_productos)}
+        # Compras en formato de coordenadas: (cliente, producto, cantidad, descuento); NaN indica que no hubo descuento
+        self._clientes = np.empty(self.CAPACIDAD_INICIAL, dtype=np.int64)
+        self._productos = np.empty(self.CAPACIDAD_INICIAL, dtype=np.int32)
+        self._cantidades = np.empty(self.CAPACIDAD_INICIAL, dtype=np.int64)
+        self._descuentos = np.empty(self.CAPACIDAD_INICIAL)
+        self.n_compras = 0
+        # Número de compras (al inicio de los arreglos) que ya están ordenadas por cliente
+        self._ordenadas = 0
+
+    def __len__(self):
+        return len(self.clusters)
+
+    # Textos de despliegue de un cliente (se construyen bajo demanda)
+    def nombre(self, i):
+        return 'Cliente ' + str(i)
+
+    def direccion(self, i):
+        return 'Direccion ' + str(i)
+
+    def telefono(self, i):
+        return 'Telefono ' + str(i)
+
+    # Método que asegura espacio para n compras adicionales
+    def _asegura(self, n):
+        requerido = self.n_compras + n
+        if(requerido <= len(self._clientes)):
+            return
+        capacidad = max(requerido, 2 * len(self._clientes))
+        for nombre in ["_clientes", "_productos", "_cantidades", "_descuentos"]:
+            anterior = getattr(self, nombre)
+            nuevo = np.empty(capacidad, dtype=anterior.dtype)
+            nuevo[:self.n_compras] = anterior[:self.n_compras]
+            setattr(self, nombre, nuevo)
+
+    # Método que agrega en bloque compras a las canastas de los clientes
+    # @param clientes (array) índice del cliente de cada compra
+    # @param productos (array) índice del producto de cada compra (o un solo índice para todas)
+    # @param cantidades (array) cantidad de cada compra
+    # @param descuentos (array) valor del descuento de cada compra (NaN o None si no hubo descuento)
+    def agregaCompras(self, clientes, productos, cantidades, descuentos = None):
+        clientes = np.asarray(clientes)
+        n = len(clientes)
+        if(n == 0):
+            return
+        self._asegura(n)
+        fin = self.n_compras + n
+        self._clientes[self.n_compras:fin] = clientes
+        self._productos[self.n_compras:fin] = productos
+        self._cantidades[self.n_compras:fin] = cantidades
+        self._descuentos[self.n_compras:fin] = np.nan if descuentos is None else descuentos
+        self.n_compras = fin
+
+    # Método que agrega un producto a la canasta de un cliente (equivalente a Cliente.agregarProducto)
+    def agregarProducto(self, i, producto, cantidad, descuento = np.nan):
+        self.agregaCompras([i], self.indice_productos[producto], [cantidad], [descuento])
+
+    # Método que ordena las compras por cliente (orden estable: las compras de cada cliente conservan el orden en que se registraron)
+    # Solo se ordena si hubo compras nuevas; con las compras ordenadas, las de un cliente (o de un intervalo de clientes) son un tramo contiguo
+    def ordenaPorCliente(self):
+        if(self._ordenadas == self.n_compras):
+            return
+        orden = np.argsort(self._clientes[:self.n_compras], kind="stable")
+        for nombre in ["_clientes", "_productos", "_cantidades", "_descuentos"]:
+            arreglo = getattr(self, nombre)
+            arreglo[:self.n_compras] = arreglo[:self.n_compras][orden]
+        self._ordenadas = self.n_compras
+
+    # Tramo [inicio, fin) de las compras (ya ordenadas por cliente) de los clientes primero a ultimo - 1
+    def tramoClientes(self, primero, ultimo):
+        self.ordenaPorCliente()
+        inicio, fin = np.searchsorted(self._clientes[:self.n_compras], [primero, ultimo])
+        return int(inicio), int(fin)
+
+    # Compras registradas (sin agregar) en formato de coordenadas: (clientes, productos, cantidades, descuentos)
+    def compras(self):
+        return self._clientes[:self.n_compras], self._productos[:self.n_compras], self._cantidades[:self.n_compras], self._descuentos[:self.n_compras]
+
+    # Canasta agregada por (cliente, producto): cantidad total y último descuento registrado (NaN si no hubo)
+    # @return (clientes, productos, cantidades, descuentos) arreglos en formato de coordenadas sin duplicados
+    def canasta(self):
+        return self.canastaDeClientes(0, len(self))
+
+    # Canasta agregada de los clientes primero a ultimo - 1: solo se agrega su tramo de las compras ordenadas,
+    # así la memoria depende de las compras de esos clientes y no de todas las de la población
+    def canastaDeClientes(self, primero, ultimo):
+        inicio, fin = self.tramoClientes(primero, ultimo)
+        clientes = self._clientes[inicio:fin]
+        productos = self._productos[inicio:fin]
+        llave = (clientes - primero) * len(self.nombres_productos) + productos
+        llaves, inverso = np.unique(llave, return_inverse=True)
+        cantidades = np.bincount(inverso, weights=self._cantidades[inicio:fin], minlength=len(llaves)).astype(np.int64)
+        # Último descuento por (cliente, producto), como en Cliente.METODOS_DESCUENTO
+        descuentos = np.full(len(llaves), np.nan)
+        con_descuento = ~np.isnan(self._descuentos[inicio:fin])
+        descuentos[inverso[con_descuento]] = self._descuentos[inicio:fin][con_descuento]
+        return primero + llaves // len(self.nombres_productos), llaves % len(self.nombres_productos), cantidades, descuentos
+
+    # Matriz densa cliente x producto con las cantidades compradas (solo para poblaciones pequeñas)
+    def matrizCanasta(self):
+        clientes, productos, cantidades, _ = self.canasta()
+        matriz = np.zeros((len(self), len(self.nombres_productos)), dtype=np.int64)
+        matriz[clientes, productos] = cantidades
+        return matriz
+
+    # Matriz dispersa (scipy.sparse.csr_matrix) cliente x producto con las cantidades o los descuentos
+    # @param valores (str) "cantidades" o "descuentos"
+    def matrizDispersa(self, valores = "cantidades"):
+        from scipy.sparse import csr_matrix
+        clientes, productos, cantidades, descuentos = self.canasta()
+        datos = cantidades if valores == "cantidades" else np.nan_to_num(descuentos)
+        return csr_matrix((datos, (clientes, productos)), shape=(len(self), len(self.nombres_productos)))
+
+    # Vista de un solo cliente como objeto Cliente (se construye bajo demanda)
+    def cliente(self, i):
+        cliente = Cliente(int(self.ids[i]), self.nombre(i), self.direccion(i), self.telefono(i), int(self.clusters[i]))
+        # Las compras del cliente son un tramo de las compras ordenadas (búsqueda binaria en lugar de recorrer todas las compras)
+        inicio, fin = self.tramoClientes(i, i + 1)
+        for j in range(inicio, fin):
+            producto = self.nombres_productos[self._productos[j]]
+            cliente.agregarProducto(producto, int(self._cantidades[j]))
+            if(not np.isnan(self._descuentos[j])):
+                cliente.agregarMetodoDescuento(producto, float(self._descuentos[j]))
+        return cliente
+
+    # Iteración sobre los clientes como objetos Cliente (para código que requiere objetos individuales)
+    def __iter__(self):
+        self.ordenaPorCliente()
+        for i in range(len(self)):
+            yield self.cliente(i)
+
+    def __str__(self):
+        return 'Población de clientes: ' + str(len(self)) + ' clientes y ' + str(self.n_compras) + ' compras'
+
+
+# Función que combina las compras de varias poblaciones con los mismos clientes (por ejemplo, un pool regional compartido por varios camiones)
+# Los productos se identifican por nombre, por lo que cada población puede tener su propio catálogo
+def combinaPoblaciones(poblaciones):
+    nombres = list(dict.fromkeys(nombre for poblacion in poblaciones for nombre in poblacion.nombres_productos))
+    combinada = PoblacionClientes(poblaciones[0].clusters, nombres)
+    for poblacion in poblaciones:
+        # Índice de cada producto de la población en el catálogo combinado
+        mapa = np.array([combinada.indice_productos[nombre] for nombre in poblacion.nombres_productos], dtype=np.int32)
+        clientes, productos, cantidades, descuentos = poblacion.compras()
+        combinada.agregaCompras(clientes, mapa[productos], cantidades, descuentos)
+    return combinada
@@ -0,0 +1,91 @@
+import numpy as np
+
+'''
+Trayectorias de precios con piso (límite inferior) y curvas de respuesta intercambiables
+Los precios de todos los productos se actualizan como arreglos: el precio de cada producto responde a sus llegadas de
+clientes según una curva de respuesta y se acota por abajo con su límite inferior (antes el precio podía quedar debajo
+del límite, o volverse negativo con más de 1000 llegadas). Como las llegadas no dependen del precio, con las llegadas
+de todo el horizonte se puede calcular la trayectoria completa de una vez (ver MotorPrecios.trayectoria).
+'''
+
+
+# Curvas de respuesta: precio nuevo a partir del precio actual y de las llegadas del periodo (arreglos o escalares)
+# Las curvas multiplicativas (precio x factor con factor en [0, 1]) exponen el factor en su atributo "factor";
+# eso permite calcular trayectorias completas con un producto acumulado
+
+# Respuesta lineal de Colmena.ajusta_precio: el precio baja 1 / escala por cada llegada (sin volverse negativo)
+def factorLineal(llegadas, escala = 1000):
+    return np.maximum(1 - llegadas / escala, 0)
+
+def respuestaLineal(precios, llegadas, escala = 1000):
+    return precios * factorLineal(llegadas, escala)
+
+respuestaLineal.factor = factorLineal
+
+
+# Respuesta exponencial: el precio baja en proporción exp(-llegadas / escala) (nunca llega a cero)
+def factorExponencial(llegadas, escala = 1000):
+    return np.exp(-np.asarray(llegadas, dtype=float) / escala)
+
+def respuestaExponencial(precios, llegadas, escala = 1000):
+    return precios * factorExponencial(llegadas, escala)
+
+respuestaExponencial.factor = factorExponencial
+
+
+# Curvas de respuesta por nombre
+CURVAS = {
+    "lineal": respuestaLineal,
+    "exponencial": respuestaExponencial,
+}
+
+
+'''
+Motor de precios de una simulación: límites inferiores por producto y curva de respuesta
+'''
+class MotorPrecios:
+    # @param limites (array) límite inferior del precio de cada producto (en el orden del catálogo)
+    # @param curva (str o function) nombre en CURVAS o función (precios, llegadas, **parametros) -> precios nuevos
+    # @param parametros (dict) parámetros adicionales de la curva (por ejemplo, escala)
+    def __init__(self, limites, curva = "lineal", parametros = None):
+        self.limites = np.asarray(limites, dtype=float)
+        if(isinstance(curva, str)):
+            if(curva not in CURVAS):
+                raise ValueError(f'Curva de respuesta de precio desconocida: {curva}')
+            curva = CURVAS[curva]
+        self.curva = curva
+        self.parametros = parametros or {}
+
+    # Actualiza los precios de todos los productos con las llegadas del periodo
+    # Solo se actualizan los productos cuyo precio es mayor o igual a su límite, y el precio nuevo no baja del límite
+    # @return (precios, actualiza) precios nuevos y productos actualizados
+    def actualiza(self, precios, llegadas):
+        actualiza = precios >= self.limites
+        nuevos = np.maximum(self.curva(precios, llegadas, **self.parametros), self.limites)
+        return np.where(actualiza, nuevos, precios), actualiza
+
+    # Actualiza el precio de un solo producto (para los motores que recorren los productos uno por uno)
+    # @return (precio, actualizado)
+    def actualizaProducto(self, k, precio, llegadas):
+        if(precio < self.limites[k]):
+            return precio, False
+        return max(float(self.curva(precio, llegadas, **self.parametros)), self.limites[k]), True
+
+    # Trayectoria de precios de todo un horizonte a partir de las llegadas de cada periodo
+    # @param precios (array) precio inicial de cada producto
+    # @param llegadas (array) llegadas por periodo (renglón) y producto (columna)
+    # @return (array) precio al cierre de cada periodo (mismas dimensiones que llegadas)
+    def trayectoria(self, precios, llegadas):
+        precios = np.asarray(precios, dtype=float)
+        llegadas = np.asarray(llegadas)
+        factor = getattr(self.curva, "factor", None)
+        if(factor is not None):
+            # Con factores en [0, 1] el precio solo baja y una vez en el límite se queda ahí:
+            # precio_t = max(precio_0 x producto de los factores hasta t, límite) para los productos que empiezan sobre el límite
+            acumulado = precios * np.cumprod(factor(llegadas, **self.parametros), axis=0)
+            return np.where(precios >= self.limites, np.maximum(acumulado, self.limites), precios)
+        trayectoria = np.empty(llegadas.shape)
+        for t in range(len(llegadas)):
+            precios = self.actualiza(precios, llegadas[t])[0]
+            trayectoria[t] = precios
+        return trayectoria
@@ -0,0 +1,199 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from Aleatorios import semillaRaiz
+from Simulacion import Simulacion
+
+'''
+Replicaciones independientes (Monte Carlo) de la simulación de Colmena en un pool de procesos
+Con run_adaptive_replications las réplicas se agregan por lotes hasta que las métricas indicadas alcanzan un semiancho
+relativo del intervalo de confianza (o hasta agotar el presupuesto de réplicas o de tiempo).
+'''
+
+# Cuantiles que se reportan por métrica
+CUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Query del proceso trabajador (se copia una sola vez por trabajador en el inicializador del pool)
+_QUERY_TRABAJADOR = None
+
+
+def _inicializaTrabajador(query):
+    global _QUERY_TRABAJADOR
+    _QUERY_TRABAJADOR = query
+
+
+# Función que ejecuta una réplica con su propia semilla sobre una copia de la query
+# @param semilla (SeedSequence) semilla independiente de la réplica
+def corre_replica(query, semilla, tiempo_bool = True, tiempo_cero = True, engine = "vectorizado"):
+    # La simulación modifica el dataframe de productos, por lo que cada réplica trabaja sobre una copia local
+    query_replica = dict(query)
+    query_replica["productos"] = query["productos"].copy()
+    # Las métricas solo requieren el estado final, por lo que no se guardan las series de tiempo
+    resultado = Simulacion(query_replica, semilla).run(tiempo_bool = tiempo_bool, tiempo_cero = tiempo_cero, engine = engine, mostrar = False, guardar_series = False)
+    return resultado.metricas()
+
+
+def _corre_replica_trabajador(semilla, tiempo_bool, tiempo_cero, engine):
+    return corre_replica(_QUERY_TRABAJADOR, semilla, tiempo_bool, tiempo_cero, engine)
+
+
+# Función que resume una muestra de valores: media, desviación, cuantiles e intervalo de confianza (aproximación normal)
+def resumeMuestra(valores, nivel = 0.95):
+    valores = np.asarray(valores, dtype=float)
+    n = len(valores)
+    media = float(valores.mean())
+    desviacion = float(valores.std(ddof=1)) if n > 1 else 0.0
+    z = NormalDist().inv_cdf(0.5 + nivel / 2)
+    error = float(z * desviacion / np.sqrt(n))
+    return {
+        "media": media,
+        "desviacion": desviacion,
+        "cuantiles": {q: float(c) for q, c in zip(CUANTILES, np.quantile(valores, CUANTILES))},
+        "intervalo": (media - error, media + error),
+        "n": n,
+    }
+
+
+# Valor de una métrica escalar de una réplica: llave de SimulationResult.metricas() o "llave.nombre" (por ejemplo "ingresos_x_producto.Leche")
+def valorMetrica(metricas, metrica):
+    valor = metricas
+    for llave in metrica.split("."):
+        valor = valor[llave]
+    return float(valor)
+
+
+# Función que agrega las métricas de todas las réplicas
+def agregaMetricas(metricas, nivel = 0.95):
+    resumen = {"n": len(metricas), "ingresos": resumeMuestra([m["ingresos"] for m in metricas], nivel)}
+    for llave in ["ingresos_x_producto", "CANTIDADES_NO_SATISFECHAS", "METODOS_DESCUENTO"]:
+        resumen[llave] = {nombre: resumeMuestra([m[llave][nombre] for m in metricas], nivel) for nombre in metricas[0][llave]}
+    return resumen
+
+
+# Función que ejecuta n réplicas independientes de la simulación y regresa sus estadísticas agregadas
+# @param query (dict) la misma query que recibe Simulacion
+# @param n (int) número de réplicas
+# @param workers (int) número de procesos (None utiliza todos los núcleos; 1 corre en el proceso actual)
+# @param semilla (int o SeedSequence) semilla de la que se derivan las semillas independientes de cada réplica (una SeedSequence no se modifica)
+# @param nivel (float) nivel de confianza de los intervalos
+def run_replications(query, n, workers = None, semilla = None, tiempo_bool = True, tiempo_cero = True, engine = "vectorizado", nivel = 0.95):
+    semilla = semillaRaiz(semilla)
+    semillas = semilla.spawn(n)
+    if(workers is None):
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n))
+
+    if(workers == 1):
+        metricas = _corre_lote(None, query, semillas, tiempo_bool, tiempo_cero, engine)
+    else:
+        # El dataframe de productos viaja una sola vez a cada trabajador; las tareas solo llevan la semilla
+        with ProcessPoolExecutor(max_workers = workers, initializer = _inicializaTrabajador, initargs = (query,)) as pool:
+            metricas = _corre_lote(pool, query, semillas, tiempo_bool, tiempo_cero, engine, workers)
+
+    resumen = agregaMetricas(metricas, nivel)
+    resumen["replicas"] = metricas
+    return resumen
+
+
+# Corre un lote de réplicas en el proceso actual (pool None) o en el pool
+def _corre_lote(pool, query, semillas, tiempo_bool, tiempo_cero, engine, workers = 1):
+    n = len(semillas)
+    if(pool is None):
+        return [corre_replica(query, s, tiempo_bool, tiempo_cero, engine) for s in semillas]
+    chunksize = max(1, n // (4 * workers))
+    return list(pool.map(_corre_replica_trabajador, semillas, [tiempo_bool] * n, [tiempo_cero] * n, [engine] * n, chunksize = chunksize))
+
+
+# Métricas de los objetivos: "llave.*" se expande a todos los nombres de la llave (por ejemplo, todos los productos)
+def expandeObjetivos(objetivos, metricas):
+    expandidos = {}
+    for metrica, objetivo in objetivos.items():
+        if(metrica.endswith(".*")):
+            llave = metrica[:-2]
+            for nombre in metricas[llave]:
+                expandidos.setdefault(llave + "." + nombre, objetivo)
+        else:
+            valorMetrica(metricas, metrica)
+            expandidos[metrica] = objetivo
+    return expandidos
+
+
+# Estado de los objetivos con las réplicas hasta ahora: semiancho relativo del intervalo (semiancho / |media|) de cada métrica
+# Una métrica alcanza su objetivo si el semiancho es a lo más objetivo x |media| o la tolerancia absoluta
+# (una métrica constante, por ejemplo sin demanda no satisfecha en ninguna réplica, tiene semiancho 0 y siempre lo alcanza)
+def revisaObjetivos(metricas, objetivos, nivel = 0.95, tolerancia_absoluta = 0.0):
+    estado = {}
+    for metrica, objetivo in objetivos.items():
+        resumen = resumeMuestra([valorMetrica(m, metrica) for m in metricas], nivel)
+        semiancho = (resumen["intervalo"][1] - resumen["intervalo"][0]) / 2
+        media = abs(resumen["media"])
+        estado[metrica] = {
+            "objetivo": objetivo,
+            "media": resumen["media"],
+            "semiancho": semiancho,
+            "semiancho_relativo": semiancho / media if media > 0 else (0.0 if semiancho == 0 else float("inf")),
+            "alcanzado": len(metricas) > 1 and semiancho <= max(objetivo * media, tolerancia_absoluta),
+            # Réplicas que se proyectan para alcanzar el objetivo con la desviación actual: (z s / (objetivo |media|))^2
+            "replicas_proyectadas": int(np.ceil((semiancho * np.sqrt(len(metricas)) / (objetivo * media)) ** 2)) if media > 0 and objetivo > 0 else None,
+        }
+    return estado
+
+
+# Función que agrega réplicas por lotes hasta que cada métrica alcanza su semiancho relativo objetivo o se agota el presupuesto
+# Las réplicas usan las mismas semillas que run_replications con la misma semilla (las primeras n réplicas coinciden)
+# @param objetivos (dict) métrica (ver valorMetrica; "llave.*" para todos los nombres de la llave): semiancho relativo objetivo,
+#   por ejemplo {"ingresos": 0.01, "CANTIDADES_NO_SATISFECHAS.*": 0.1, "METODOS_DESCUENTO.*": 0.05}
+# @param n_min (int) réplicas del primer lote; lote (int) réplicas mínimas por lote siguiente
+# @param n_max (int) presupuesto de réplicas; tiempo_maximo (float) presupuesto en segundos (opcional)
+# @param tolerancia_absoluta (float) semiancho que basta aunque la media sea cercana a cero
+# @return (dict) estadísticas como run_replications más "objetivos" (estado final por métrica, con "replicas_necesarias":
+#   réplicas con las que alcanzó su objetivo, None si no lo alcanzó), "lotes" (réplicas acumuladas por lote) y "motivo"
+def run_adaptive_replications(query, objetivos, n_min = 10, lote = 10, n_max = 1000, tiempo_maximo = None, workers = None, semilla = None, tiempo_bool = True, tiempo_cero = True, engine = "vectorizado", nivel = 0.95, tolerancia_absoluta = 0.0):
+    if(n_min < 2 or lote < 1 or n_max < n_min):
+        raise ValueError('Se requiere n_min >= 2, lote >= 1 y n_max >= n_min')
+    semilla = semillaRaiz(semilla)
+    if(workers is None):
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n_max))
+    inicio = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers = workers, initializer = _inicializaTrabajador, initargs = (query,)) if workers > 1 else None
+    metricas, lotes, necesarias = [], [], {}
+    try:
+        tam_lote = n_min
+        while(True):
+            metricas += _corre_lote(pool, query, semilla.spawn(tam_lote), tiempo_bool, tiempo_cero, engine, workers)
+            lotes.append(len(metricas))
+            if(len(lotes) == 1):
+                objetivos = expandeObjetivos(objetivos, metricas[0])
+            estado = revisaObjetivos(metricas, objetivos, nivel, tolerancia_absoluta)
+            for metrica, revision in estado.items():
+                # Réplicas con las que la métrica pasó de no alcanzar a alcanzar su objetivo (se olvidan si lo pierde)
+                if(not revision["alcanzado"]):
+                    necesarias.pop(metrica, None)
+                elif(metrica not in necesarias):
+                    necesarias[metrica] = len(metricas)
+            pendientes = [revision for revision in estado.values() if not revision["alcanzado"]]
+            if(not pendientes):
+                motivo = "objetivos"
+                break
+            if(len(metricas) >= n_max):
+                motivo = "presupuesto"
+                break
+            if(tiempo_maximo is not None and time.perf_counter() - inicio >= tiempo_maximo):
+                motivo = "tiempo"
+                break
+            # Siguiente lote: lo que falta según la proyección más exigente, sin más que duplicar las réplicas ni exceder el presupuesto
+            proyectadas = [revision["replicas_proyectadas"] for revision in pendientes if revision["replicas_proyectadas"] is not None]
+            faltantes = max(proyectadas) - len(metricas) if proyectadas else lote
+            tam_lote = int(min(max(faltantes, lote), len(metricas), n_max - len(metricas)))
+    finally:
+        if(pool is not None):
+            pool.shutdown()
+
+    resumen = agregaMetricas(metricas, nivel)
+    for metrica, revision in estado.items():
+        revision["replicas_necesarias"] = necesarias.get(metrica)
+    resumen.update({"objetivos": estado, "lotes": lotes, "motivo": motivo, "segundos": time.perf_counter() - inicio, "replicas": metricas})
+    return resumen
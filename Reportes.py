@@ -0,0 +1,130 @@
+import numpy as np
+
+'''
+Capa de reportes de la simulación de Colmena: gráficas (plotly) y despliegue de resultados.
+Se invoca únicamente cuando se desea ver los resultados, por lo que plotly e IPython se importan hasta ese momento.
+'''
+
+# Función que despliega los resultados de la primera dinámica (tiempo cero)
+# @param resultado (SimulationResult) resultado de la simulación
+def reportaPrimeraDinamica(resultado):
+    import plotly.graph_objects as go
+    from IPython.display import display
+
+    # Imprimimos los métodos de descuento que los clientes aplicaron durante la simulación 
+    print(f'Métodos de descuento aplicados: {resultado.METODOS_DESCUENTO}')
+    # Vamos a hacer una piechart utilizando plotly para desplegar los métodos de descuento
+    fig = go.Figure(data=[go.Pie(labels=list(resultado.METODOS_DESCUENTO.keys()), values=list(resultado.METODOS_DESCUENTO.values()))], layout=go.Layout(title="Métodos de descuento aplicados"))
+    # Cabiamos la tiografía de la gráfica
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 2.2 Se calculan los ingresos de ventas en total y por producto ya considerando los descuentos y cantidad de personas que solicitan cada producto 
+    print(f'Ingresos totales: {resultado.ingresos} y por producto: {resultado.ingresos_x_producto}')
+
+    # Vamos a hacer un piechart utilizando plotly para desplegar los ingresos por producto
+    fig = go.Figure(data=[go.Pie(labels=list(resultado.ingresos_x_producto.keys()), values=list(resultado.ingresos_x_producto.values()))], layout=go.Layout(title="Ingresos por producto"))
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 3. Dependiendo del total de productos demandados, se va a escoger un camión que cuente con la capacidad suficiente para transportarlos (CAMIONES)
+    print(f'Espacio total: {resultado.espacio} y peso total: {resultado.peso_total}')
+    if(resultado.plan_carga is not None):
+        print(resultado.plan_carga)
+
+    # 4. Gráfica de los productos no satisfechos (de barra y por producto) de resultado.CANTIDADES_NO_SATISFECHAS 
+    fig = go.Figure(data=[go.Bar(x=list(resultado.CANTIDADES_NO_SATISFECHAS.keys()), y=list(resultado.CANTIDADES_NO_SATISFECHAS.values()))], layout=go.Layout(title="Cantidad de productos no satisfechos"))
+    fig.update_traces(marker_color='rgb(158,202,225)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.6)
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # Vamos a hacer una gráfica de barras para desplegar la cantidad de productos solicitados 
+    fig = go.Figure(data=[go.Bar(x=list(resultado.CANTIDADES_SOLICITADAS.keys()), y=list(resultado.CANTIDADES_SOLICITADAS.values()))], layout=go.Layout(title="Cantidad de productos solicitados"))
+    # Agregamos diferentes colores a la gráfica
+    fig.update_traces(marker_color='rgb(158,202,225)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.6)
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+    # Display de los productos
+    display(resultado.productos)
+
+
+# Función que despliega los resultados de la dinámica en el tiempo
+# @param resultado (SimulationResult) resultado de la simulación con las series de tiempo
+def reportaSegundaDinamica(resultado):
+    import plotly.graph_objects as go
+    from IPython.display import display
+
+    # Productos que se agotaron durante la simulación (un renglón por producto, con el minuto del agotamiento)
+    tiempos_agotamiento = resultado.agotamientos.tiempos_agotamiento if resultado.agotamientos is not None else {}
+    for producto, cantidad in resultado.CANTIDADES_NO_SATISFECHAS.items():
+        if(cantidad > 0):
+            print(f'Se han agotado las existencias del producto {producto} en el minuto {tiempos_agotamiento.get(producto)} (cantidad no satisfecha: {cantidad})')
+
+    display(resultado.productos)
+
+    # 1. Gráfica del precio por producto a lo largo del tiempo 
+    fig = go.Figure()
+    for producto in resultado.cantidades_solicitadas_en_tiempo:
+        fig.add_trace(go.Scatter(x=np.arange(len(resultado.cantidades_solicitadas_en_tiempo[producto][1:])), y=resultado.cantidades_solicitadas_en_tiempo[producto][1:], name=producto))
+
+    fig.update_layout(title="Cantidad de productos solicitados por producto a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Cantidad de productos solicitados")
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 2. Gráfica de los ingresos por ventas a lo largo del tiempo 
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=np.arange(len(resultado.ingresos_en_tiempo[1:])), y=resultado.ingresos_en_tiempo[1:], name="Ingresos"))
+    fig.update_layout(title="Ingresos por ventas a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Ingresos")
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 3. Gráfica de los ingresos por ventas por producto a lo largo del tiempo
+    fig = go.Figure()
+    for producto in resultado.ingresos_por_producto_en_tiempo:
+        fig.add_trace(go.Scatter(x=np.arange(len(resultado.ingresos_por_producto_en_tiempo[producto][1:])), y=resultado.ingresos_por_producto_en_tiempo[producto][1:], name=producto))
+    fig.update_layout(title="Ingresos por ventas por producto a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Ingresos")
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 4. Gráfica de los precios por producto a lo largo del tiempo
+    fig = go.Figure()
+    for producto in resultado.precios_por_producto_en_tiempo:
+        fig.add_trace(go.Scatter(x=np.arange(len(resultado.precios_por_producto_en_tiempo[producto])), y=resultado.precios_por_producto_en_tiempo[producto], name=producto))
+        # Vamos a agregar una línea horizontal punteada que sea el límite inferior del precio del producto y que sea del mismo color que la línea del producto
+        fig.add_shape(type="line", x0=0, y0= resultado.limites_inferiores[producto], x1=len(resultado.precios_por_producto_en_tiempo[producto]), y1= resultado.limites_inferiores[producto], line=dict(color=fig.data[-1].line.color, width=1, dash="dash"))
+    fig.update_layout(title="Precios por producto a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Precios")
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 5. Gráfica de la cantidad de clientes que en el tiempo decide comprar un producto
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=np.arange(len(resultado.clientes_nuevos_tiempo)), y=resultado.clientes_nuevos_tiempo, name="Clientes"))
+    fig.update_layout(title="Cantidad de clientes que en el tiempo decide comprar un producto", xaxis_title="Tiempo", yaxis_title="Cantidad de clientes")
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 6. Gráfica de pie para los métodos de descuento aplicados
+    fig = go.Figure(data=[go.Pie(labels=list(resultado.METODOS_DESCUENTO.keys()), values=list(resultado.METODOS_DESCUENTO.values()))])
+    fig.update_layout(title="Métodos de descuento aplicados")
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 7. Gráfica de la cantidad de descuentos aplicados a lo largo del tiempo
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=np.arange(len(resultado.cantidad_de_descuentos_aplicados_tiempo)), y=resultado.cantidad_de_descuentos_aplicados_tiempo, name="Descuentos"))
+    fig.update_layout(title="Cantidad de descuentos aplicados a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Cantidad de descuentos")
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 8. Gráfica de barras de los productos solicitados 
+    fig = go.Figure(data=[go.Bar(x=list(resultado.CANTIDADES_SOLICITADAS.keys()), y=list(resultado.CANTIDADES_SOLICITADAS.values()))], layout=go.Layout(title="Cantidad de productos solicitados"))
+    # Agregamos diferentes colores a la gráfica
+    fig.update_traces(marker_color='rgb(158,202,225)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.6)
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
+
+    # 9. Gráfica de los productos que fueron solicitados y que no pudieron ser colocados debido a que el producto se había agoatado
+    fig = go.Figure(data=[go.Bar(x=list(resultado.CANTIDADES_NO_SATISFECHAS.keys()), y=list(resultado.CANTIDADES_NO_SATISFECHAS.values()))], layout=go.Layout(title="Cantidad de productos no satisfechos"))
+    fig.update_traces(marker_color='rgb(158,202,225)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.6)
+    fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
+    fig.show()
@@ -0,0 +1,99 @@
+'''
+Resultado estructurado de una simulación de Colmena (series de tiempo y contadores), independiente de las gráficas
+'''
+class SimulationResult:
+    def __init__(self, productos, limites_inferiores, ingresos, ingresos_x_producto, CANTIDADES_SOLICITADAS, CANTIDADES_NO_SATISFECHAS, METODOS_DESCUENTO, espacio, peso_total, series = None, instrumentacion = None, agotamientos = None, plan_carga = None):
+        # Dataframe de productos al terminar la simulación
+        self.productos = productos
+        # (Dict) Límite inferior del precio del producto
+        self.limites_inferiores = limites_inferiores
+        # Ingresos totales y por producto ya considerando los descuentos
+        self.ingresos = ingresos
+        self.ingresos_x_producto = ingresos_x_producto
+        # Contadores por producto y por método de descuento
+        self.CANTIDADES_SOLICITADAS = CANTIDADES_SOLICITADAS
+        self.CANTIDADES_NO_SATISFECHAS = CANTIDADES_NO_SATISFECHAS
+        self.METODOS_DESCUENTO = METODOS_DESCUENTO
+        # Espacio y peso total del cargamento
+        self.espacio = espacio
+        self.peso_total = peso_total
+        # Camiones escogidos y asignación de la carga (PlanCarga; None si la query no incluye un catálogo de camiones)
+        self.plan_carga = plan_carga
+
+        # Series de tiempo de la segunda dinámica (None si solo se simuló la primera dinámica)
+        series = series or {}
+        self.cantidades_solicitadas_en_tiempo = series.get("cantidades_solicitadas_en_tiempo")
+        self.precios_por_producto_en_tiempo = series.get("precios_por_producto_en_tiempo")
+        self.ingresos_por_producto_en_tiempo = series.get("ingresos_por_producto_en_tiempo")
+        self.ingresos_en_tiempo = series.get("ingresos_en_tiempo")
+        self.clientes_nuevos_tiempo = series.get("clientes_nuevos_tiempo")
+        self.cantidad_de_descuentos_aplicados_tiempo = series.get("cantidad_de_descuentos_aplicados_tiempo")
+        # Tiempo por fase, contadores y memoria de la simulación (None si se simuló sin instrumentación)
+        self.instrumentacion = instrumentacion
+        # Registro de agotamientos (RegistroAgotamientos): tiempo, producto y cantidad no satisfecha
+        self.agotamientos = agotamientos
+
+    # Indica si el resultado contiene las series de la dinámica en el tiempo
+    def tieneSeries(self):
+        return self.ingresos_en_tiempo is not None
+
+    # Ingresos totales y por producto al final de la simulación (último punto de las series si existen)
+    def ingresosFinales(self):
+        if(self.tieneSeries()):
+            return self.ingresos_en_tiempo[-1], {producto: serie[-1] for producto, serie in self.ingresos_por_producto_en_tiempo.items()}
+        return self.ingresos, dict(self.ingresos_x_producto)
+
+    # Métricas escalares del resultado (para agregarlas entre réplicas)
+    # @param tipos_descuento (list) métodos de descuento que se reportan aunque no se hayan utilizado
+    def metricas(self, tipos_descuento = ("VideoJuego", "Cupón", "Trivia", "Sorteo")):
+        ingresos, ingresos_x_producto = self.ingresosFinales()
+        return {
+            "ingresos": float(ingresos),
+            "ingresos_x_producto": {producto: float(valor) for producto, valor in ingresos_x_producto.items()},
+            "CANTIDADES_NO_SATISFECHAS": {producto: float(valor) for producto, valor in self.CANTIDADES_NO_SATISFECHAS.items()},
+            "METODOS_DESCUENTO": {metodo: int(self.METODOS_DESCUENTO.get(metodo, 0)) for metodo in tipos_descuento},
+        }
+
+    # Resultado como diccionario de tipos básicos (serializable a JSON): métricas, contadores y, opcionalmente, las series
+    def aDiccionario(self, series = True):
+        diccionario = self.metricas()
+        diccionario["CANTIDADES_SOLICITADAS"] = {producto: int(valor) for producto, valor in self.CANTIDADES_SOLICITADAS.items()}
+        diccionario["espacio"] = float(self.espacio)
+        diccionario["peso_total"] = float(self.peso_total)
+        if(series and self.tieneSeries()):
+            diccionario["series"] = {
+                "cantidades_solicitadas_en_tiempo": self.cantidades_solicitadas_en_tiempo,
+                "precios_por_producto_en_tiempo": self.precios_por_producto_en_tiempo,
+                "ingresos_por_producto_en_tiempo": self.ingresos_por_producto_en_tiempo,
+                "ingresos_en_tiempo": [float(valor) for valor in self.ingresos_en_tiempo],
+                "clientes_nuevos_tiempo": [int(valor) for valor in self.clientes_nuevos_tiempo],
+                "cantidad_de_descuentos_aplicados_tiempo": [int(valor) for valor in self.cantidad_de_descuentos_aplicados_tiempo],
+            }
+        if(self.instrumentacion is not None):
+            diccionario["instrumentacion"] = self.instrumentacion
+        return diccionario
+
+    # Exporta la instrumentación de la simulación
+    # @param formato (str) "json" o "prometheus" (formato de texto de exposición de Prometheus)
+    def exportaInstrumentacion(self, formato = "json"):
+        if(self.instrumentacion is None):
+            raise ValueError('La simulación se ejecutó sin instrumentación')
+        if(formato == "json"):
+            import json
+            return json.dumps(self.instrumentacion, indent=2)
+        elif(formato == "prometheus"):
+            from Instrumentacion import aPrometheus
+            return aPrometheus(self.instrumentacion)
+        raise ValueError(f'Formato desconocido: {formato}')
+
+    # Despliega las gráficas del resultado (la capa de reportes se importa hasta este momento)
+    def grafica(self):
+        from Reportes import reportaPrimeraDinamica, reportaSegundaDinamica
+        if(self.tieneSeries()):
+            reportaSegundaDinamica(self)
+        else:
+            reportaPrimeraDinamica(self)
+
+    def __str__(self):
+        ingresos, _ = self.ingresosFinales()
+        return 'Resultado: Ingresos: ' + str(ingresos) + ' Solicitadas: ' + str(self.CANTIDADES_SOLICITADAS) + ' No satisfechas: ' + str(self.CANTIDADES_NO_SATISFECHAS) + ' Métodos de descuento: ' + str(self.METODOS_DESCUENTO)
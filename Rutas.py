@@ -0,0 +1,193 @@
+import os
+import heapq
+import hashlib
+import tempfile
+import numpy as np
+
+'''
+Tiempos de ruta calculados localmente (paso 4 de la dinámica en el tiempo)
+En lugar de consultar un servicio externo, se carga un grafo de carreteras local (lista de aristas con los minutos de
+cada tramo) y se calculan los tiempos de viaje más cortos con Dijkstra. Las distancias de cada origen se guardan en una
+matriz de distancias (un renglón por origen, una columna por nodo) en memoria. Solo si se indica un directorio (o
+query["cache_rutas"]) la matriz se persiste en disco, en <directorio>/<huella del grafo>.npz: los pares origen-destino que
+se repiten entre corridas se sirven de la caché sin volver a calcularse.
+'''
+
+# Directorio sugerido para la caché de distancias en disco (relativo al directorio de trabajo); la caché en disco es opcional
+DIRECTORIO_CACHE = os.path.join(".cache_colmena", "rutas")
+
+
+'''
+Grafo de carreteras en formato CSR (arreglos de NumPy)
+'''
+class GrafoCarreteras:
+    # @param aristas (DataFrame, str o list) dataframe (o ruta a un CSV, o lista de tuplas) con las columnas origen, destino y minutos
+    # @param dirigido (bool) si es False cada arista se puede recorrer en ambos sentidos
+    def __init__(self, aristas, dirigido = False):
+        import pandas as pd
+        if(isinstance(aristas, str)):
+            aristas = pd.read_csv(aristas)
+        elif(not isinstance(aristas, pd.DataFrame)):
+            aristas = pd.DataFrame(list(aristas), columns = ["origen", "destino", "minutos"])
+        minutos = np.asarray(aristas["minutos"], dtype=float)
+        if((minutos < 0).any()):
+            raise ValueError('Los minutos de las aristas no pueden ser negativos')
+        # Nodos: etiquetas ordenadas y su índice
+        self.nodos, indices = np.unique(np.concatenate((np.asarray(aristas["origen"]), np.asarray(aristas["destino"]))), return_inverse=True)
+        self.indice = {nodo: i for i, nodo in enumerate(self.nodos.tolist())}
+        origenes, destinos = indices[:len(minutos)], indices[len(minutos):]
+        if(not dirigido):
+            origenes, destinos, minutos = np.concatenate((origenes, destinos)), np.concatenate((destinos, origenes)), np.concatenate((minutos, minutos))
+        # Aristas repetidas entre los mismos nodos: se conserva la más corta
+        orden = np.lexsort((minutos, destinos, origenes))
+        origenes, destinos, minutos = origenes[orden], destinos[orden], minutos[orden]
+        unicas = np.ones(len(minutos), dtype=bool)
+        unicas[1:] = (origenes[1:] != origenes[:-1]) | (destinos[1:] != destinos[:-1])
+        origenes, destinos, minutos = origenes[unicas], destinos[unicas], minutos[unicas]
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(origenes, minlength=len(self.nodos)))))
+        self.destinos = destinos.astype(np.int64)
+        self.minutos = minutos
+        self.dirigido = dirigido
+
+    def __len__(self):
+        return len(self.nodos)
+
+    # Índice de un nodo a partir de su etiqueta
+    def indiceDe(self, nodo):
+        if(nodo not in self.indice):
+            raise ValueError(f'Nodo desconocido: {nodo}')
+        return self.indice[nodo]
+
+    # Huella del grafo: identifica la caché de distancias (cambia si cambia cualquier nodo, arista o tiempo)
+    def huella(self):
+        huella = hashlib.sha1()
+        huella.update(repr(self.nodos.tolist()).encode())
+        for arreglo in [self.indptr, self.destinos, self.minutos]:
+            huella.update(np.ascontiguousarray(arreglo).tobytes())
+        return huella.hexdigest()
+
+    # Minutos más cortos desde varios orígenes (índices) a todos los nodos (inf si no hay camino)
+    # @return (array) matriz orígenes x nodos
+    def dijkstra(self, origenes):
+        origenes = np.asarray(origenes, dtype=np.int64)
+        try:
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.csgraph import dijkstra
+        except ImportError:
+            dijkstra = None
+        if(dijkstra is not None and len(origenes) > 0):
+            matriz = csr_matrix((self.minutos, self.destinos, self.indptr), shape = (len(self), len(self)))
+            return np.atleast_2d(dijkstra(matriz, directed = True, indices = origenes))
+        indptr, destinos, minutos = self.indptr.tolist(), self.destinos.tolist(), self.minutos.tolist()
+        return np.array([_dijkstraDesde(indptr, destinos, minutos, origen, len(self)) for origen in origenes.tolist()]).reshape(len(origenes), len(self))
+
+    # Llave del contenido del grafo (para la caché de resultados; ver Barrido.llaveQuery)
+    def llave(self):
+        return self.huella()
+
+    def __str__(self):
+        return 'Grafo de carreteras: ' + str(len(self)) + ' nodos, ' + str(len(self.minutos)) + ' aristas' + (' dirigidas' if self.dirigido else '')
+
+
+# Dijkstra con montículo desde un origen sobre listas de Python (cuando SciPy no está instalado)
+def _dijkstraDesde(indptr, destinos, minutos, origen, n_nodos):
+    distancias = [np.inf] * n_nodos
+    distancias[origen] = 0.0
+    pendientes = [(0.0, origen)]
+    while pendientes:
+        distancia, nodo = heapq.heappop(pendientes)
+        if(distancia > distancias[nodo]):
+            continue
+        for j in range(indptr[nodo], indptr[nodo + 1]):
+            vecino = destinos[j]
+            nueva = distancia + minutos[j]
+            if(nueva < distancias[vecino]):
+                distancias[vecino] = nueva
+                heapq.heappush(pendientes, (nueva, vecino))
+    return distancias
+
+
+'''
+Matriz de distancias muchos-a-muchos con caché en memoria y, opcionalmente, en disco
+Solo se ejecuta Dijkstra para los orígenes que no están en la caché; cada origen calculado agrega su renglón completo
+(todos los destinos), así las consultas futuras desde ese origen a cualquier destino ya no calculan nada.
+'''
+class MatrizDistancias:
+    # @param grafo (GrafoCarreteras, DataFrame o str) grafo de carreteras (o sus aristas)
+    # @param directorio (str) directorio de la caché en disco (por ejemplo DIRECTORIO_CACHE); None la mantiene solo en memoria
+    def __init__(self, grafo, directorio = None):
+        self.grafo = grafo if isinstance(grafo, GrafoCarreteras) else GrafoCarreteras(grafo)
+        self.ruta_cache = None if directorio is None else os.path.join(directorio, self.grafo.huella() + ".npz")
+        # Índice de nodo de origen: renglón de la matriz
+        self.renglones = {}
+        self.distancias = np.zeros((0, len(self.grafo)))
+        # Orígenes servidos de la caché y orígenes calculados con Dijkstra
+        self.aciertos = 0
+        self.calculados = 0
+        if(self.ruta_cache is not None and os.path.exists(self.ruta_cache)):
+            with np.load(self.ruta_cache) as cache:
+                self.distancias = cache["distancias"]
+                self.renglones = {int(origen): renglon for renglon, origen in enumerate(cache["origenes"])}
+
+    # Guarda la caché (se escribe a un archivo temporal y se reemplaza, así una corrida interrumpida no la corrompe)
+    def guarda(self):
+        if(self.ruta_cache is None):
+            return
+        directorio = os.path.dirname(self.ruta_cache)
+        os.makedirs(directorio, exist_ok=True)
+        origenes = np.array(sorted(self.renglones, key=self.renglones.get), dtype=np.int64)
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".npz")
+        with os.fdopen(descriptor, "wb") as archivo:
+            np.savez(archivo, origenes=origenes, distancias=self.distancias)
+        os.replace(temporal, self.ruta_cache)
+
+    # Asegura que los renglones de los orígenes (índices) estén en la matriz, calculando en bloque los que falten
+    def _asegura(self, origenes):
+        unicos = np.unique(origenes).tolist()
+        faltantes = [origen for origen in unicos if origen not in self.renglones]
+        self.aciertos += len(unicos) - len(faltantes)
+        if(not faltantes):
+            return
+        inicio = len(self.distancias)
+        self.distancias = np.vstack((self.distancias, self.grafo.dijkstra(faltantes)))
+        self.renglones.update({origen: inicio + i for i, origen in enumerate(faltantes)})
+        self.calculados += len(faltantes)
+        self.guarda()
+
+    # Minutos más cortos para pares origen-destino (etiquetas de nodo); inf si no hay camino
+    # @return (array) un tiempo por par
+    def tiempos(self, origenes, destinos):
+        origenes = np.array([self.grafo.indiceDe(nodo) for nodo in origenes], dtype=np.int64)
+        destinos = np.array([self.grafo.indiceDe(nodo) for nodo in destinos], dtype=np.int64)
+        if(len(origenes) != len(destinos)):
+            raise ValueError('Se necesita el mismo número de orígenes y destinos')
+        self._asegura(origenes)
+        renglones = np.array([self.renglones[origen] for origen in origenes.tolist()], dtype=np.int64)
+        return self.distancias[renglones, destinos] if len(renglones) else np.zeros(0)
+
+    # Matriz de minutos de todos los orígenes a todos los destinos (etiquetas de nodo)
+    def matriz(self, origenes, destinos):
+        origenes, destinos = list(origenes), list(destinos)
+        return self.tiempos(np.repeat(np.array(origenes, dtype=object), len(destinos)), destinos * len(origenes)).reshape(len(origenes), len(destinos))
+
+    # Minutos más cortos entre dos nodos
+    def tiempo(self, origen, destino):
+        return float(self.tiempos([origen], [destino])[0])
+
+    # Llave del contenido de la matriz: los tiempos solo dependen del grafo (no de los renglones ya calculados ni de los contadores)
+    def llave(self):
+        return self.grafo.huella()
+
+    def __str__(self):
+        return 'Matriz de distancias: ' + str(len(self.renglones)) + ' orígenes en caché (' + str(self.aciertos) + ' aciertos, ' + str(self.calculados) + ' calculados)'
+
+
+# Función que convierte los minutos de ruta al tiempo de simulación (minutos enteros, redondeando hacia arriba)
+# @return (list) tiempo de cada ruta; ValueError si alguna ruta no tiene camino en el grafo
+def tiemposDeRuta(rutas, origenes, destinos):
+    minutos = rutas.tiempos(origenes, destinos)
+    sin_camino = ~np.isfinite(minutos)
+    if(sin_camino.any()):
+        i = int(np.argmax(sin_camino))
+        raise ValueError(f'No hay camino de {list(origenes)[i]} a {list(destinos)[i]} en el grafo de carreteras')
+    return np.ceil(minutos - 1e-9).astype(np.int64).tolist()
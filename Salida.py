@@ -0,0 +1,112 @@
+import os
+import csv
+import numpy as np
+
+'''
+Salida por minuto de la dinámica en el tiempo a un archivo columnar (CSV o Parquet)
+Cada minuto se convierte en una fila por producto (formato largo) y las filas se escriben por lotes, así la memoria
+no crece con el tiempo de simulación y los minutos ya escritos se pueden leer mientras la simulación continúa.
+'''
+
+# Columnas de la salida (una fila por minuto y producto)
+COLUMNAS = ["tiempo", "producto", "cantidad_solicitada", "precio", "ingreso", "clientes_nuevos", "descuentos"]
+
+# Llave del estado de un minuto de la que se toma cada columna por producto
+LLAVES = {"cantidad_solicitada": "cantidades_solicitadas", "precio": "precios", "ingreso": "ingresos_x_producto", "clientes_nuevos": "clientes_nuevos", "descuentos": "descuentos"}
+
+
+'''
+Escritor por lotes del estado de cada minuto de la simulación
+En CSV las filas se agregan a un solo archivo; en Parquet cada lote se escribe como una parte del directorio indicado
+(parte-00000.parquet, parte-00001.parquet, ...), que se puede leer como un solo conjunto de datos.
+'''
+class EscritorTicks:
+    # @param ruta (str) archivo CSV o directorio de Parquet
+    # @param formato (str) "csv" o "parquet" (si no se indica se toma de la extensión de la ruta)
+    # @param tam_lote (int) minutos que se acumulan en memoria antes de escribirlos
+    # @param posicion (int) posición de una salida existente que se continúa (EscritorTicks.posicion, por ejemplo al reanudar
+    # desde un punto de control): lo escrito después de esa posición se descarta
+    def __init__(self, ruta, formato = None, tam_lote = 256, posicion = None):
+        if(formato is None):
+            formato = "parquet" if ruta.endswith(".parquet") else "csv"
+        if(formato not in ("csv", "parquet")):
+            raise ValueError(f'Formato de salida desconocido: {formato}')
+        self.ruta = ruta
+        self.formato = formato
+        self.tam_lote = tam_lote
+        self._lote = []
+        self.partes = 0
+        self.minutos = 0
+        if(posicion is not None):
+            self._continua(posicion)
+        elif(formato == "csv"):
+            # El encabezado se escribe al abrir, así el archivo se puede leer desde el primer lote
+            with open(ruta, "w", newline="") as archivo:
+                csv.writer(archivo).writerow(COLUMNAS)
+        else:
+            os.makedirs(ruta, exist_ok=True)
+
+    # Posición de lo escrito en disco: bytes del CSV o número de partes de Parquet (los minutos en memoria no cuentan)
+    def posicion(self):
+        return os.path.getsize(self.ruta) if self.formato == "csv" else self.partes
+
+    # Continúa una salida existente en una posición: se recorta el CSV o se borran las partes posteriores
+    def _continua(self, posicion):
+        if(self.formato == "csv"):
+            with open(self.ruta, "r+b") as archivo:
+                archivo.truncate(posicion)
+        else:
+            os.makedirs(self.ruta, exist_ok=True)
+            for nombre in os.listdir(self.ruta):
+                if(nombre.startswith("parte-") and nombre.endswith(".parquet") and int(nombre[6:11]) >= posicion):
+                    os.remove(os.path.join(self.ruta, nombre))
+            self.partes = posicion
+
+    # Agrega el estado de un minuto (el formato de Simulacion.iteraSegundaDinamica) y escribe el lote si ya está lleno
+    def escribe(self, tick):
+        self._lote.append(tick)
+        self.minutos += 1
+        if(len(self._lote) >= self.tam_lote):
+            self.vacia()
+
+    # Columnas del lote actual en formato largo (una fila por minuto y producto)
+    def columnas(self):
+        n_productos = len(self._lote[0]["productos"])
+        columnas = {
+            "tiempo": np.repeat([tick["tiempo"] for tick in self._lote], n_productos),
+            "producto": np.tile(np.asarray(self._lote[0]["productos"], dtype=object), len(self._lote)),
+        }
+        for columna, llave in LLAVES.items():
+            columnas[columna] = np.concatenate([np.asarray(tick[llave]) for tick in self._lote])
+        return columnas
+
+    # Escribe en disco los minutos acumulados
+    def vacia(self):
+        if(not self._lote):
+            return
+        columnas = self.columnas()
+        if(self.formato == "csv"):
+            with open(self.ruta, "a", newline="") as archivo:
+                csv.writer(archivo).writerows(zip(*[columnas[columna].tolist() for columna in COLUMNAS]))
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabla = pa.table({columna: columnas[columna] for columna in COLUMNAS})
+            # Cada parte se escribe a un temporal y se renombra, así un lector nunca encuentra una parte incompleta
+            ruta = os.path.join(self.ruta, f'parte-{self.partes:05d}.parquet')
+            pq.write_table(tabla, ruta + ".tmp")
+            os.replace(ruta + ".tmp", ruta)
+            self.partes += 1
+        self._lote = []
+
+    def cierra(self):
+        self.vacia()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cierra()
+
+    def __str__(self):
+        return 'Salida ' + self.formato + ': ' + self.ruta + ' (' + str(self.minutos) + ' minutos)'
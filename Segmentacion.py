@@ -0,0 +1,233 @@
+import hashlib
+import numpy as np
+
+'''
+Segmentación de clientes por las canastas de productos que compran
+"Se puede aplicar una clusterización de usuarios para clasificarlos en grupos que compran ciertos paquetes de productos":
+las canastas de una PoblacionClientes (cliente x producto, con las cantidades y los descuentos) se recorren por bloques de
+clientes con k-medias por mini-lotes, así la memoria depende del tamaño del bloque y no del número de clientes.
+Los clusters aprendidos regresan a la simulación como proporciones de clientes por cluster y perfiles de cantidad por
+cluster y producto (ver simulaPoblacionClientes y Simulacion).
+'''
+
+
+'''
+K-medias por mini-lotes (Sculley, 2010): cada lote mueve los centros hacia el promedio de sus puntos con una tasa
+de aprendizaje 1 / (puntos acumulados del centro)
+'''
+class KMediasMiniLote:
+    # @param n_clusters (int) número de clusters
+    # @param rng (np.random.Generator) generador para la inicialización y la reasignación de centros vacíos
+    def __init__(self, n_clusters, rng = None):
+        self.n_clusters = n_clusters
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.centros = None
+        # Puntos acumulados por centro
+        self.conteos = np.zeros(n_clusters)
+
+    # Inicialización k-means++ con los puntos del primer lote
+    def _inicializa(self, X):
+        centros = [X[self.rng.integers(0, len(X))]]
+        distancias = ((X - centros[0]) ** 2).sum(axis=1)
+        for _ in range(1, self.n_clusters):
+            total = distancias.sum()
+            i = self.rng.choice(len(X), p=distancias / total) if total > 0 else self.rng.integers(0, len(X))
+            centros.append(X[i])
+            distancias = np.minimum(distancias, ((X - X[i]) ** 2).sum(axis=1))
+        self.centros = np.array(centros, dtype=float)
+
+    # Distancias cuadradas de cada punto a cada centro (puntos x centros)
+    def distancias(self, X):
+        return np.maximum((X ** 2).sum(axis=1)[:, None] - 2 * X @ self.centros.T + (self.centros ** 2).sum(axis=1)[None, :], 0)
+
+    # Centro más cercano de cada punto (0 a n_clusters - 1)
+    def predice(self, X):
+        return np.argmin(self.distancias(X), axis=1)
+
+    # Actualiza los centros con un lote de puntos
+    def ajustaParcial(self, X):
+        X = np.asarray(X, dtype=float)
+        if(len(X) == 0):
+            return self
+        if(self.centros is None):
+            self._inicializa(X)
+        etiquetas = self.predice(X)
+        puntos = np.bincount(etiquetas, minlength=self.n_clusters)
+        sumas = np.zeros_like(self.centros)
+        np.add.at(sumas, etiquetas, X)
+        self.conteos += puntos
+        # Promedio móvil: centro + (suma del lote - puntos * centro) / puntos acumulados
+        con_puntos = puntos > 0
+        self.centros[con_puntos] += (sumas[con_puntos] - puntos[con_puntos, None] * self.centros[con_puntos]) / self.conteos[con_puntos, None]
+        # Los centros que no han recibido puntos se reubican en puntos del lote
+        vacios = np.nonzero(self.conteos == 0)[0]
+        if(len(vacios) > 0):
+            self.centros[vacios] = X[self.rng.integers(0, len(X), len(vacios))]
+        return self
+
+    # Suma de las distancias cuadradas de los puntos a su centro
+    def inercia(self, X):
+        return float(self.distancias(np.asarray(X, dtype=float)).min(axis=1).sum())
+
+
+'''
+Resultado de la segmentación: etiqueta de cada cliente y perfiles por cluster
+Las etiquetas van de 1 a n_clusters (como Cliente.cluster); 0 indica un cliente sin compras.
+'''
+class Segmentacion:
+    # @param perfil_cantidades (array) unidades promedio de cada producto (columna) por cliente del cluster que lo compra (renglón)
+    def __init__(self, modelo, nombres_productos, etiquetas, proporciones, perfil_cantidades, cantidad_global):
+        self.modelo = modelo
+        self.nombres_productos = list(nombres_productos)
+        self.etiquetas = etiquetas
+        self.proporciones = proporciones
+        self.perfil_cantidades = perfil_cantidades
+        # Unidades promedio de cada producto por cliente que lo compra (sin distinguir clusters)
+        self.cantidad_global = cantidad_global
+
+    @property
+    def n_clusters(self):
+        return len(self.proporciones)
+
+    # Etiquetas (1 a n_clusters) para n clientes nuevos según las proporciones aprendidas
+    def muestreaClusters(self, n, rng = None):
+        return (1 + (rng or np.random.default_rng()).choice(self.n_clusters, size=n, p=self.proporciones)).astype(np.int16)
+
+    # Tabla del límite superior de la cantidad uniforme que solicita un cliente por etiqueta (renglón) y producto (columna)
+    # El límite base (cantidad_promedio de la query) se escala por la razón entre las unidades promedio del cluster y las globales;
+    # las etiquetas que no son clusters aprendidos (y los productos que no estaban en las canastas) conservan el límite base
+    # @param nombres (list) productos del catálogo de la simulación; cantidad_promedio (array) límite base por producto
+    # @param n_etiquetas (int) número mínimo de renglones de la tabla (la mayor etiqueta de la población + 1)
+    def tablaCantidades(self, nombres, cantidad_promedio, n_etiquetas):
+        cantidad_promedio = np.asarray(cantidad_promedio)
+        tabla = np.tile(cantidad_promedio, (max(n_etiquetas, self.n_clusters + 1), 1))
+        indice = {nombre: j for j, nombre in enumerate(self.nombres_productos)}
+        columnas = np.array([indice.get(nombre, -1) for nombre in nombres], dtype=np.int64)
+        conocidos = columnas >= 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = self.perfil_cantidades[:, columnas[conocidos]] / self.cantidad_global[columnas[conocidos]]
+        factor = np.where(np.isfinite(factor) & (factor > 0), factor, 1.0)
+        # Límite mínimo de 2 para que la cantidad uniforme en [1, límite) de la primera dinámica esté definida
+        tabla[1:self.n_clusters + 1, conocidos] = np.maximum(np.rint(cantidad_promedio[conocidos] * factor), 2).astype(tabla.dtype)
+        return tabla
+
+    # Perfiles como dataframe: un renglón por cluster con su proporción y las unidades promedio por producto
+    def aDataFrame(self):
+        import pandas as pd
+        perfiles = pd.DataFrame(self.perfil_cantidades, columns=self.nombres_productos)
+        perfiles.insert(0, "proporcion", self.proporciones)
+        perfiles.insert(0, "cluster", np.arange(1, self.n_clusters + 1))
+        return perfiles
+
+    # Perfiles como diccionario de JSON (lo que lee la simulación; ver segmentacionDeDiccionario)
+    def aDiccionario(self):
+        return {
+            "nombres_productos": self.nombres_productos,
+            "proporciones": np.asarray(self.proporciones, dtype=float).tolist(),
+            "perfil_cantidades": np.asarray(self.perfil_cantidades, dtype=float).tolist(),
+            "cantidad_global": np.asarray(self.cantidad_global, dtype=float).tolist(),
+        }
+
+    # Llave del contenido de la segmentación (para la caché de resultados; ver Barrido.llaveQuery)
+    # Incluye todo lo que lee la simulación: productos, proporciones y perfiles por cluster
+    def llave(self):
+        h = hashlib.sha256(repr(self.nombres_productos).encode())
+        for arreglo in [self.proporciones, self.perfil_cantidades, self.cantidad_global]:
+            arreglo = np.ascontiguousarray(arreglo, dtype=float)
+            h.update(repr(arreglo.shape).encode())
+            h.update(arreglo.tobytes())
+        return h.hexdigest()
+
+    def __str__(self):
+        return 'Segmentación: ' + str(self.n_clusters) + ' clusters con proporciones ' + str(np.round(self.proporciones, 3).tolist())
+
+
+# Función que reconstruye una segmentación a partir de sus perfiles (por ejemplo, de una query en JSON)
+# Sin modelo ni etiquetas: solo lo que lee la simulación (proporciones y perfiles por cluster)
+# @param datos (dict) {"nombres_productos", "proporciones", "perfil_cantidades", "cantidad_global"} (ver Segmentacion.aDiccionario)
+# @return (Segmentacion) ValueError si los perfiles no son consistentes
+def segmentacionDeDiccionario(datos):
+    llaves = ["nombres_productos", "proporciones", "perfil_cantidades", "cantidad_global"]
+    if(not isinstance(datos, dict) or set(datos) != set(llaves)):
+        raise ValueError(f'La segmentación debe ser un objeto con las llaves {llaves}')
+    nombres = datos["nombres_productos"]
+    try:
+        proporciones = np.asarray(datos["proporciones"], dtype=float)
+        perfil_cantidades = np.asarray(datos["perfil_cantidades"], dtype=float)
+        cantidad_global = np.asarray(datos["cantidad_global"], dtype=float)
+    except (ValueError, TypeError):
+        raise ValueError('Las proporciones y los perfiles de la segmentación deben ser numéricos')
+    if(not isinstance(nombres, list) or proporciones.ndim != 1 or len(proporciones) == 0 or perfil_cantidades.shape != (len(proporciones), len(nombres)) or cantidad_global.shape != (len(nombres),)):
+        raise ValueError('La segmentación necesita una proporción por cluster, un perfil por cluster y producto, y una cantidad global por producto')
+    if((proporciones < 0).any() or not np.isclose(proporciones.sum(), 1) or (perfil_cantidades < 0).any() or (cantidad_global < 0).any()):
+        raise ValueError('Las proporciones de la segmentación deben sumar 1 y los perfiles no pueden ser negativos')
+    return Segmentacion(None, nombres, None, proporciones, perfil_cantidades, cantidad_global)
+
+
+# Matriz de características de una canasta agregada: (clientes con compras, matriz clientes x 2 productos)
+# Las características son la composición de la canasta (cantidades normalizadas a que sumen 1) y el descuento de cada producto
+# multiplicado por peso_descuentos
+def caracteristicasCanasta(canasta, n_productos, peso_descuentos = 0.5):
+    clientes, productos, cantidades, descuentos = canasta
+    con_compras, fila = np.unique(clientes, return_inverse=True)
+    X = np.zeros((len(con_compras), 2 * n_productos))
+    X[fila, productos] = cantidades
+    totales = X[:, :n_productos].sum(axis=1, keepdims=True)
+    X[:, :n_productos] /= np.where(totales > 0, totales, 1)
+    X[fila, n_productos + productos] = peso_descuentos * np.nan_to_num(descuentos)
+    return con_compras, X
+
+
+# Generador de bloques de clientes: (número de bloque, canasta agregada de los clientes del bloque)
+# Cada bloque se agrega a partir de su tramo de las compras ordenadas por cliente, así nunca se construye la canasta completa
+def bloquesCanasta(poblacion, tam_lote = 4096, orden = None):
+    n_bloques = int(np.ceil(len(poblacion) / tam_lote))
+    for b in (range(n_bloques) if orden is None else orden):
+        canasta = poblacion.canastaDeClientes(b * tam_lote, min((b + 1) * tam_lote, len(poblacion)))
+        if(len(canasta[0]) > 0):
+            yield b, canasta
+
+
+# Generador de bloques de la matriz de canastas: (clientes del bloque, matriz de características bloque x 2 productos)
+# Solo se incluyen los clientes con compras (ver caracteristicasCanasta)
+def lotesCanastas(poblacion, tam_lote = 4096, peso_descuentos = 0.5, orden = None):
+    n_productos = len(poblacion.nombres_productos)
+    for _, canasta in bloquesCanasta(poblacion, tam_lote, orden):
+        yield caracteristicasCanasta(canasta, n_productos, peso_descuentos)
+
+
+# Función que segmenta a los clientes de una población por sus canastas con k-medias por mini-lotes
+# @param poblacion (PoblacionClientes) clientes con sus canastas (simuladas o registradas)
+# @param tam_lote (int) clientes por bloque (la memoria de cada bloque es proporcional a tam_lote x productos)
+# @param epocas (int) pasadas de entrenamiento sobre todos los bloques (en orden aleatorio)
+# @param asigna (bool) escribe las etiquetas aprendidas en poblacion.clusters
+# @return (Segmentacion) etiquetas y perfiles por cluster
+def segmentaClientes(poblacion, n_clusters = 4, tam_lote = 4096, epocas = 2, peso_descuentos = 0.5, rng = None, asigna = True):
+    rng = rng if rng is not None else np.random.default_rng()
+    n_productos = len(poblacion.nombres_productos)
+    n_bloques = int(np.ceil(len(poblacion) / tam_lote))
+    modelo = KMediasMiniLote(n_clusters, rng)
+    for _ in range(epocas):
+        for _, X in lotesCanastas(poblacion, tam_lote, peso_descuentos, rng.permutation(n_bloques)):
+            modelo.ajustaParcial(X)
+
+    # Pasada final por bloques: etiqueta de cada cliente y acumulados por cluster para los perfiles
+    etiquetas = np.zeros(len(poblacion), dtype=np.int16)
+    unidades = np.zeros((n_clusters, n_productos))
+    compradores = np.zeros((n_clusters, n_productos))
+    if(modelo.centros is not None):
+        for _, canasta in bloquesCanasta(poblacion, tam_lote):
+            con_compras, X = caracteristicasCanasta(canasta, n_productos, peso_descuentos)
+            etiquetas[con_compras] = 1 + modelo.predice(X)
+            clientes, productos, cantidades, _ = canasta
+            cluster_compra = etiquetas[clientes].astype(np.int64) - 1
+            np.add.at(unidades, (cluster_compra, productos), cantidades)
+            np.add.at(compradores, (cluster_compra, productos), cantidades > 0)
+    clientes_cluster = np.bincount(etiquetas[etiquetas > 0] - 1, minlength=n_clusters).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        proporciones = clientes_cluster / clientes_cluster.sum() if clientes_cluster.sum() > 0 else np.full(n_clusters, 1 / n_clusters)
+        perfil_cantidades = np.where(compradores > 0, unidades / compradores, 0)
+        cantidad_global = np.where(compradores.sum(axis=0) > 0, unidades.sum(axis=0) / compradores.sum(axis=0), 0)
+    if(asigna):
+        poblacion.clusters = etiquetas
+    return Segmentacion(modelo, poblacion.nombres_productos, etiquetas, proporciones, perfil_cantidades, cantidad_global)
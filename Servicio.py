@@ -0,0 +1,454 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from Barrido import llaveQuery
+from Consultas import validaMotor, validaQuery
+from Simulacion import Simulacion
+
+'''
+Servicio local de simulaciones "qué pasaría si" (HTTP/JSON sobre asyncio, sin dependencias adicionales)
+Cada solicitud trae una query (el mismo diccionario que recibe Simulacion, con los productos como registros JSON y, si
+la trae, la ruta con sus aristas y la segmentación como sus perfiles; ver Consultas); la query se valida, la
+simulación se ejecuta en un pool acotado de procesos y el resultado se regresa como JSON.
+Las solicitudes idénticas que llegan mientras una simulación está en curso esperan esa misma simulación (no se repite) y
+los resultados recientes se guardan en una caché LRU en memoria. Con ?progreso=1 la respuesta es NDJSON: una línea por
+minuto simulado y al final una línea con el resultado.
+
+    POST /simula            {"query": {...}, "engine": "vectorizado", "semilla": 0, "series": false}
+    POST /simula?progreso=1 la misma solicitud, con el progreso por minuto
+    GET  /salud             estado del servicio (pool, simulaciones en curso, caché)
+
+Solo se guardan en caché y se combinan las solicitudes con semilla (en la solicitud o en la query): sin semilla cada
+simulación es distinta.
+'''
+
+# Tamaño máximo del cuerpo de una solicitud (bytes)
+TAM_MAXIMO_CUERPO = 16 * 1024 * 1024
+
+
+# Función que valida una solicitud completa del servicio
+# @return (dict) {"query", "engine", "semilla", "series"}
+def validaSolicitud(datos):
+    if(not isinstance(datos, dict) or "query" not in datos):
+        raise ValueError('La solicitud debe ser un objeto JSON con la llave "query"')
+    desconocidos = set(datos) - {"query", "engine", "semilla", "series"}
+    if(desconocidos):
+        raise ValueError(f'Llaves desconocidas en la solicitud: {sorted(desconocidos)}')
+    query = validaQuery(datos["query"])
+    engine = validaMotor(query, datos.get("engine", "vectorizado"))
+    semilla = datos.get("semilla", query.get("semilla"))
+    if(semilla is not None and (not isinstance(semilla, int) or isinstance(semilla, bool) or semilla < 0)):
+        raise ValueError('semilla debe ser un entero no negativo')
+    return {"query": query, "engine": engine, "semilla": semilla, "series": bool(datos.get("series", False))}
+
+
+'''
+Caché LRU en memoria: al llenarse se desaloja el resultado usado hace más tiempo
+'''
+class CacheLRU:
+    def __init__(self, capacidad = 128):
+        self.capacidad = capacidad
+        self._valores = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtiene(self, llave):
+        if(llave not in self._valores):
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        self._valores.move_to_end(llave)
+        return self._valores[llave]
+
+    def guarda(self, llave, valor):
+        self._valores[llave] = valor
+        self._valores.move_to_end(llave)
+        while(len(self._valores) > self.capacidad):
+            self._valores.popitem(last=False)
+
+    def __len__(self):
+        return len(self._valores)
+
+    def aDiccionario(self):
+        return {"capacidad": self.capacidad, "tamano": len(self), "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+# Resumen de un minuto de la simulación para el progreso
+def resumenTick(tick):
+    return {
+        "tiempo": float(tick["tiempo"]),
+        "ingresos": float(tick["ingresos"]),
+        "cantidades_solicitadas": int(tick["cantidades_solicitadas"].sum()),
+        "clientes_nuevos": int(tick["clientes_nuevos"].sum()),
+        "descuentos": int(tick["descuentos"].sum()),
+    }
+
+
+'''
+Salida de la dinámica en el tiempo que manda el resumen de cada minuto a la cola de progreso del servicio
+(misma interfaz que EscritorTicks)
+'''
+class _SalidaProgreso:
+    def __init__(self, cola, id_trabajo):
+        self.cola = cola
+        self.id_trabajo = id_trabajo
+
+    def escribe(self, tick):
+        self.cola.put((self.id_trabajo, resumenTick(tick)))
+
+    def vacia(self):
+        pass
+
+
+# Función que ejecuta una simulación en un proceso del pool y regresa el resultado como diccionario JSON
+# @param cola (Queue) cola de progreso compartida (None sin progreso); al terminar se manda (id_trabajo, None)
+def _corraSolicitud(query, engine, semilla, series, cola = None, id_trabajo = None):
+    try:
+        salida = _SalidaProgreso(cola, id_trabajo) if cola is not None else None
+        resultado = Simulacion(query, semilla).run(engine = engine, mostrar = False, salida = salida, guardar_series = series)
+        return resultado.aDiccionario(series)
+    finally:
+        if(cola is not None):
+            cola.put((id_trabajo, None))
+
+
+'''
+Simulación en curso: las solicitudes idénticas comparten su resultado y su progreso
+'''
+class _Trabajo:
+    def __init__(self, id_trabajo, llave, progreso, loop):
+        self.id_trabajo = id_trabajo
+        self.llave = llave
+        self.progreso = progreso
+        self.futuro = loop.create_future()
+        # Progreso recibido hasta ahora (se repite a los suscriptores que llegan tarde) y colas de los suscriptores
+        self.eventos = []
+        self.suscriptores = []
+        self.fin_progreso = asyncio.Event()
+        if(not progreso):
+            self.fin_progreso.set()
+
+
+'''
+Servicio de simulaciones: pool de procesos, combinación de solicitudes en curso, caché LRU y servidor HTTP
+'''
+class ServicioSimulacion:
+    # @param workers (int) procesos del pool (None utiliza todos los núcleos)
+    # @param capacidad_cache (int) resultados que se conservan en la caché LRU
+    # @param max_pendientes (int) simulaciones distintas en curso o en espera; arriba de este número se responde 503
+    def __init__(self, workers = None, capacidad_cache = 128, max_pendientes = 256):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = CacheLRU(capacidad_cache)
+        self.max_pendientes = max_pendientes
+        self.en_curso = {}
+        self.estadisticas = {"solicitudes": 0, "aciertos_cache": 0, "combinadas": 0, "simulaciones": 0, "errores": 0, "rechazadas": 0}
+        self._trabajos = {}
+        self._siguiente_id = 0
+        self._pool = None
+        self._manager = None
+        self._cola = None
+        self._hilo_progreso = None
+        self._servidor = None
+        self._loop = None
+
+    # Inicia el pool y el hilo que reparte el progreso de los procesos (y el servidor HTTP si se indica un puerto)
+    async def inicia(self, host = "127.0.0.1", puerto = None):
+        self._loop = asyncio.get_running_loop()
+        self._pool = ProcessPoolExecutor(max_workers = self.workers)
+        self._manager = multiprocessing.Manager()
+        self._cola = self._manager.Queue()
+        self._hilo_progreso = threading.Thread(target = self._reparteProgreso, daemon = True)
+        self._hilo_progreso.start()
+        if(puerto is not None):
+            self._servidor = await asyncio.start_server(self._atiende, host, puerto)
+        return self
+
+    # Puerto en el que escucha el servidor (útil con puerto = 0)
+    @property
+    def puerto(self):
+        return self._servidor.sockets[0].getsockname()[1] if self._servidor is not None else None
+
+    async def cierra(self):
+        if(self._servidor is not None):
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        if(self._pool is not None):
+            self._pool.shutdown(wait = True, cancel_futures = True)
+        if(self._cola is not None):
+            self._cola.put(None)
+            await asyncio.to_thread(self._hilo_progreso.join)
+            self._manager.shutdown()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excepcion):
+        await self.cierra()
+
+    # Hilo que lee la cola de progreso de los procesos y lo entrega en el loop de asyncio
+    def _reparteProgreso(self):
+        while(True):
+            try:
+                elemento = self._cola.get()
+            except (EOFError, OSError):
+                return
+            if(elemento is None):
+                return
+            self._loop.call_soon_threadsafe(self._recibeProgreso, *elemento)
+
+    def _recibeProgreso(self, id_trabajo, evento):
+        trabajo = self._trabajos.get(id_trabajo)
+        if(trabajo is None):
+            return
+        if(evento is None):
+            trabajo.fin_progreso.set()
+            return
+        trabajo.eventos.append(evento)
+        for suscriptor in trabajo.suscriptores:
+            suscriptor.put_nowait(evento)
+
+    # Ejecuta una solicitud ya validada
+    # @param progreso (asyncio.Queue) recibe el resumen de cada minuto (solo si la simulación se inicia o ya se inició con progreso)
+    # @return (dict) {"llave", "en_cache", "combinada", "resultado"}
+    async def simula(self, solicitud, progreso = None):
+        self.estadisticas["solicitudes"] += 1
+        llave = None
+        if(solicitud["semilla"] is not None):
+            llave = llaveQuery(solicitud["query"], {"engine": solicitud["engine"], "semilla": solicitud["semilla"], "series": solicitud["series"]})
+            resultado = self.cache.obtiene(llave)
+            if(resultado is not None):
+                self.estadisticas["aciertos_cache"] += 1
+                return {"llave": llave, "en_cache": True, "combinada": False, "resultado": resultado}
+            if(llave in self.en_curso):
+                self.estadisticas["combinadas"] += 1
+                resultado = await self._espera(self.en_curso[llave], progreso)
+                return {"llave": llave, "en_cache": False, "combinada": True, "resultado": resultado}
+        if(len(self._trabajos) >= self.max_pendientes):
+            self.estadisticas["rechazadas"] += 1
+            raise ServicioOcupado(f'Hay {len(self._trabajos)} simulaciones pendientes')
+
+        trabajo = _Trabajo(self._siguiente_id, llave, progreso is not None, self._loop)
+        self._siguiente_id += 1
+        self._trabajos[trabajo.id_trabajo] = trabajo
+        if(llave is not None):
+            self.en_curso[llave] = trabajo
+        self.estadisticas["simulaciones"] += 1
+        self._loop.create_task(self._ejecuta(trabajo, solicitud))
+        resultado = await self._espera(trabajo, progreso)
+        return {"llave": llave, "en_cache": False, "combinada": False, "resultado": resultado}
+
+    async def _ejecuta(self, trabajo, solicitud):
+        try:
+            cola = self._cola if trabajo.progreso else None
+            resultado = await self._loop.run_in_executor(self._pool, _corraSolicitud, solicitud["query"], solicitud["engine"], solicitud["semilla"], solicitud["series"], cola, trabajo.id_trabajo)
+            # El resultado llega antes de que el hilo reparta el último progreso
+            await trabajo.fin_progreso.wait()
+            if(trabajo.llave is not None):
+                self.cache.guarda(trabajo.llave, resultado)
+            trabajo.futuro.set_result(resultado)
+        except asyncio.CancelledError:
+            trabajo.futuro.cancel()
+            raise
+        except Exception as error:
+            self.estadisticas["errores"] += 1
+            if(isinstance(error, BrokenProcessPool)):
+                # Un proceso murió: se reemplaza el pool para las siguientes solicitudes
+                self._pool = ProcessPoolExecutor(max_workers = self.workers)
+            trabajo.futuro.set_exception(error)
+        finally:
+            del self._trabajos[trabajo.id_trabajo]
+            if(trabajo.llave is not None and self.en_curso.get(trabajo.llave) is trabajo):
+                del self.en_curso[trabajo.llave]
+
+    async def _espera(self, trabajo, progreso):
+        if(progreso is not None):
+            for evento in trabajo.eventos:
+                progreso.put_nowait(evento)
+            trabajo.suscriptores.append(progreso)
+        return await asyncio.shield(trabajo.futuro)
+
+    def salud(self):
+        return {"estado": "ok", "workers": self.workers, "en_curso": len(self._trabajos), "cache": self.cache.aDiccionario(), "estadisticas": dict(self.estadisticas)}
+
+    # Atiende una conexión HTTP (una solicitud por conexión)
+    async def _atiende(self, lector, escritor):
+        try:
+            try:
+                metodo, ruta, cuerpo = await _leeSolicitud(lector)
+            except ValueError as error:
+                await _responde(escritor, 400, {"error": str(error)})
+                return
+            ruta, _, consulta = ruta.partition("?")
+            if(ruta == "/salud" and metodo == "GET"):
+                await _responde(escritor, 200, self.salud())
+            elif(ruta == "/simula" and metodo == "POST"):
+                await self._atiendeSimulacion(escritor, cuerpo, "progreso=1" in consulta.split("&"))
+            elif(ruta in ("/salud", "/simula")):
+                await _responde(escritor, 405, {"error": f'Método no permitido: {metodo}'})
+            else:
+                await _responde(escritor, 404, {"error": f'Ruta desconocida: {ruta}'})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _atiendeSimulacion(self, escritor, cuerpo, con_progreso):
+        try:
+            solicitud = validaSolicitud(json.loads(cuerpo or b"null"))
+        except ValueError as error:
+            await _responde(escritor, 400, {"error": str(error)})
+            return
+        if(not con_progreso):
+            try:
+                respuesta = await self.simula(solicitud)
+            except ServicioOcupado as error:
+                await _responde(escritor, 503, {"error": str(error)})
+                return
+            except Exception as error:
+                await _responde(escritor, _estadoError(error), {"error": f'{type(error).__name__}: {error}'})
+                return
+            await _responde(escritor, 200, respuesta)
+            return
+
+        # Respuesta NDJSON: una línea por minuto y la última con el resultado (o el error)
+        progreso = asyncio.Queue()
+        tarea = asyncio.ensure_future(self.simula(solicitud, progreso))
+        escritor.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        while(True):
+            espera = asyncio.ensure_future(progreso.get())
+            await asyncio.wait([espera, tarea], return_when = asyncio.FIRST_COMPLETED)
+            if(not espera.done()):
+                espera.cancel()
+                break
+            await _escribeLinea(escritor, {"tipo": "progreso", **espera.result()})
+        while(not progreso.empty()):
+            await _escribeLinea(escritor, {"tipo": "progreso", **progreso.get_nowait()})
+        try:
+            await _escribeLinea(escritor, {"tipo": "resultado", **tarea.result()})
+        except Exception as error:
+            await _escribeLinea(escritor, {"tipo": "error", "estado": 503 if isinstance(error, ServicioOcupado) else _estadoError(error), "error": f'{type(error).__name__}: {error}'})
+        escritor.write(b"0\r\n\r\n")
+        await escritor.drain()
+
+
+'''
+Error del servicio cuando hay demasiadas simulaciones pendientes (HTTP 503)
+'''
+class ServicioOcupado(RuntimeError):
+    pass
+
+
+# Los errores de datos de la simulación son errores de la solicitud (400); los demás son del servicio (500)
+def _estadoError(error):
+    return 400 if isinstance(error, (ValueError, KeyError)) else 500
+
+
+async def _leeSolicitud(lector):
+    linea = await lector.readline()
+    partes = linea.decode("latin-1").split()
+    if(len(partes) != 3):
+        raise ValueError('Línea de solicitud HTTP inválida')
+    metodo, ruta, _ = partes
+    encabezados = {}
+    while(True):
+        linea = await lector.readline()
+        if(linea in (b"\r\n", b"\n", b"")):
+            break
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        encabezados[nombre.strip().lower()] = valor.strip()
+    longitud = int(encabezados.get("content-length", 0))
+    if(longitud > TAM_MAXIMO_CUERPO):
+        raise ValueError(f'El cuerpo de la solicitud excede {TAM_MAXIMO_CUERPO} bytes')
+    cuerpo = await lector.readexactly(longitud) if longitud > 0 else b""
+    return metodo, ruta, cuerpo
+
+
+RAZONES = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+async def _responde(escritor, estado, cuerpo):
+    datos = json.dumps(cuerpo, ensure_ascii=False).encode()
+    escritor.write(f'HTTP/1.1 {estado} {RAZONES[estado]}\r\nContent-Type: application/json; charset=utf-8\r\nContent-Length: {len(datos)}\r\nConnection: close\r\n\r\n'.encode() + datos)
+    await escritor.drain()
+
+
+async def _escribeLinea(escritor, objeto):
+    datos = json.dumps(objeto, ensure_ascii=False).encode() + b"\n"
+    escritor.write(f'{len(datos):x}\r\n'.encode() + datos + b"\r\n")
+    await escritor.drain()
+
+
+# Cliente síncrono del servicio (por ejemplo, desde un notebook o una prueba en localhost)
+# @param solicitud (dict) {"query" (productos como registros o DataFrame), "engine", "semilla", "series"}
+# @param progreso (function) recibe el resumen de cada minuto; si se indica se pide la respuesta NDJSON
+# @return (dict) respuesta del servicio (RuntimeError con el estado HTTP si la solicitud falla)
+def solicita(solicitud, host = "127.0.0.1", puerto = 8765, progreso = None, timeout = None):
+    import http.client
+    solicitud = dict(solicitud)
+    query = dict(solicitud["query"])
+    if(hasattr(query.get("productos"), "to_dict")):
+        query["productos"] = query["productos"].to_dict(orient = "records")
+    solicitud["query"] = query
+    conexion = http.client.HTTPConnection(host, puerto, timeout = timeout)
+    try:
+        conexion.request("POST", "/simula?progreso=1" if progreso is not None else "/simula", json.dumps(solicitud, default = _tipoBasico), {"Content-Type": "application/json"})
+        respuesta = conexion.getresponse()
+        if(progreso is None):
+            cuerpo = json.loads(respuesta.read())
+            if(respuesta.status != 200):
+                raise RuntimeError(f'{respuesta.status}: {cuerpo.get("error")}')
+            return cuerpo
+        for linea in respuesta:
+            evento = json.loads(linea)
+            tipo = evento.pop("tipo")
+            if(tipo == "progreso"):
+                progreso(evento)
+            elif(tipo == "error"):
+                raise RuntimeError(f'{evento["estado"]}: {evento["error"]}')
+            else:
+                return evento
+        raise RuntimeError('La respuesta terminó sin resultado')
+    finally:
+        conexion.close()
+
+
+# Convierte los escalares de NumPy (por ejemplo, de un DataFrame) a tipos de JSON
+def _tipoBasico(valor):
+    if(hasattr(valor, "item")):
+        return valor.item()
+    raise TypeError(f'{type(valor).__name__} no es serializable a JSON')
+
+
+async def _sirve(host, puerto, workers, capacidad_cache, max_pendientes):
+    servicio = ServicioSimulacion(workers, capacidad_cache, max_pendientes)
+    async with servicio:
+        await servicio.inicia(host, puerto)
+        print(f'Servicio de simulación en http://{host}:{servicio.puerto} ({servicio.workers} procesos)')
+        await servicio._servidor.serve_forever()
+
+
+# Línea de comandos: python Servicio.py --puerto 8765 --workers 8
+def main(argumentos = None):
+    parser = argparse.ArgumentParser(description = "Servicio local de simulaciones de Colmena")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--puerto", type = int, default = 8765)
+    parser.add_argument("--workers", type = int, default = None, help = "procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--cache", type = int, default = 128, help = "resultados en la caché LRU")
+    parser.add_argument("--max-pendientes", type = int, default = 256, help = "simulaciones pendientes antes de responder 503")
+    argumentos = parser.parse_args(argumentos)
+    try:
+        asyncio.run(_sirve(argumentos.host, argumentos.puerto, argumentos.workers, argumentos.cache, argumentos.max_pendientes))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,28 @@
 import numpy as np
-import pandas as pd
-import random
-import plotly.graph_objects as go
-from Cliente import Cliente
-from Producto import Producto
-from AlgoritmosAuxiliares import simulaClientes, calculaEspacioCargamento, simularDemanda, calculaIngresosConDescuento
-from Colmena import ajusta_precio, aplicaDescuentoIndividual
-from IPython.display import display
+from AlgoritmosAuxiliares import simulaPoblacionClientes, calculaEspacioCargamento, simularDemanda, calculaIngresosConDescuento, simulaCantidadNoSatisfecha, atiendeEnOrden
+from Precios import MotorPrecios
+from Descuentos import MotorDescuentos, cuentaMetodos, acumulaMetodos, TIPOS_DESCUENTO, SIN_DESCUENTO
+from Catalogo import Catalogo
+from LibroIngresos import LibroIngresos
+from Agotamientos import RegistroAgotamientos
+from Cargamento import CatalogoCamiones, planificaCarga
+from Rutas import MatrizDistancias, tiemposDeRuta
+from Resultados import SimulationResult
+from Muestreo import muestreaSinReemplazo, muestreaPorProducto
+from Aleatorios import FlujosAleatorios
+from Eventos import AgendaEventos, siguienteLlegada
+from Instrumentacion import Instrumentacion, SinInstrumentacion
 
 '''
 Clase que emula la simulación del worflow de Colmena 
 '''
 class Simulacion: 
     # Constructor de la clase de Simulación 
-    def __init__(self, query):
+    # @param semilla (int, SeedSequence o FlujosAleatorios) semilla de la simulación o sus flujos ya construidos (por ejemplo,
+    # por inversión o antitéticos); si no se indica se toma query["semilla"] (opcional)
+    # @param clientes_extemporaneos (PoblacionClientes) pool de clientes extemporáneos compartido (por ejemplo, regional); None lo simula
+    # @param instrumentacion (bool o Instrumentacion) mide el tiempo por fase, contadores y memoria (apagada por defecto)
+    def __init__(self, query, semilla = None, clientes_extemporaneos = None, instrumentacion = None):
         
         # (INT) Tasa de clientes que están utilizando la aplicación 
         self.tasa_clientes_compran = query["tasa_clientes_compran"]
@@ -26,23 +35,66 @@ class Simulacion:
         self.tasa_clientes_compran_nuevos = query["tasa_clientes_compran_nuevos"] 
         # (Dict) Diccionario que indica la tasa con la que nuevos clientes demandan por producto
         self.tasas_nuevos_clientes = query["tasas_nuevos_clientes"] 
-        # (INT) Tiempo de simulación (en minutos)
-        self.tiempo = query["tiempo"] 
+        # (INT) Tiempo de simulación (en minutos); si la query trae una ruta se calcula con el grafo de carreteras (ver abajo)
+        self.tiempo = query.get("tiempo")
+        # Ruta del camión (origen, destino) y matriz de distancias (MatrizDistancias, o las aristas del grafo) (opcional)
+        # Con aristas, query["cache_rutas"] es el directorio de la caché de distancias en disco (None la mantiene solo en memoria)
+        self.ruta = query.get("ruta")
+        # (FLOAT) Minutos entre actualizaciones de precio y reportes del motor por eventos (puede ser menor a un minuto)
+        self.resolucion = query.get("resolucion", 1)
         # (INT) Tasa de clientes a la que se podrá alcanzar por medio de publicidad en el intervalo de tiempo (variable de arriba)
         self.tasa_tota_nuevos_clientes = query["tasa_tota_nuevos_clientes"] 
         # (Dict) Límite inferior del precio del producto 
         self.limites_inferiores = query["limites_inferiores"]
         # Dataframe que contiene los productos
         self.productos = query["productos"]
-
-        # Estructura que contiene los precios ajustados con los descuentos
-        self.DESCUENTOS_APLICADOS = {}
+        # Clusters aprendidos de las canastas (Segmentacion): proporciones de clientes y perfiles de cantidad por cluster (opcional)
+        self.segmentacion = query.get("segmentacion")
+        # Catálogo de camiones disponibles (DataFrame o ruta a un CSV) para planear la carga (opcional)
+        self.camiones = CatalogoCamiones(query["camiones"]) if query.get("camiones") is not None else None
+        self.plan_carga = None
+        # Catálogo indexado por enteros que se utiliza durante la simulación (se escribe al dataframe al terminar cada dinámica)
+        self.catalogo = Catalogo(self.productos)
+        # Descuentos simulados con la beta (forma_a, forma_b) o, para los productos de query["tabla_descuentos"], estáticos (opcional)
+        self.descuentos = MotorDescuentos(self.forma_a, self.forma_b, self.catalogo.nombres, query.get("tabla_descuentos"))
+        # Curva de respuesta del precio a las llegadas ("lineal" como ajusta_precio, "exponencial" o una función) con piso en los límites inferiores
+        self.precios = MotorPrecios(self.catalogo.arreglo(self.limites_inferiores), query.get("curva_precio", "lineal"), query.get("parametros_curva"))
+
+        # Libro que acumula por producto las unidades vendidas ya con los descuentos aplicados
+        self.DESCUENTOS_APLICADOS = LibroIngresos(self.catalogo.nombres)
         # Estructura que contiene la cantidad solicitada por producto 
         self.CANTIDADES_SOLICITADAS = {}
         # Estructura que contiene la cantidad por producto que fue demandado y que no se pudo satisfacer (por agotamiento de inventario)
         self.CANTIDADES_NO_SATISFECHAS = {}
         # Estructura que cuenta los métodos de descuento utilizados 
         self.METODOS_DESCUENTO = {}
+        # Registro de agotamientos: (tiempo, producto, cantidad no satisfecha) por producto y minuto
+        self.AGOTAMIENTOS = RegistroAgotamientos(self.catalogo.nombres)
+        # Flujos aleatorios independientes por fase y por producto (una misma semilla reproduce la simulación bit a bit)
+        if(isinstance(semilla, FlujosAleatorios)):
+            self.flujos = semilla
+        else:
+            self.flujos = FlujosAleatorios(query.get("semilla") if semilla is None else semilla)
+        # Pool de clientes extemporáneos fijo (si no se indica, se simula al inicio de la dinámica en el tiempo)
+        self.clientes_extemporaneos = clientes_extemporaneos
+        # Estado de la dinámica en el tiempo al cierre del último minuto (lo actualiza cada motor; permite reanudar desde un punto de control)
+        self.estado_motor = None
+        # Series parciales y posición de la salida guardadas en el último punto de control
+        self.series_parciales = None
+        self.salida_parcial = None
+        # Instrumentación de la simulación (sin costo cuando está apagada)
+        if(isinstance(instrumentacion, (Instrumentacion, SinInstrumentacion))):
+            self.instrumentacion = instrumentacion
+        else:
+            self.instrumentacion = Instrumentacion() if instrumentacion else SinInstrumentacion()
+
+        # 4. El tiempo de llegada se estima con la ruta más corta en el grafo de carreteras local
+        if(self.ruta is not None):
+            with self.instrumentacion.fase("rutas"):
+                rutas = query["rutas"] if isinstance(query["rutas"], MatrizDistancias) else MatrizDistancias(query["rutas"], query.get("cache_rutas"))
+                self.tiempo = tiemposDeRuta(rutas, [self.ruta[0]], [self.ruta[1]])[0]
+        if(self.tiempo is None):
+            raise ValueError('La query necesita "tiempo" o una "ruta" con sus "rutas"')
 
     # Método que simula la cantidad de clientes que están utilizando la aplicación antes de la simulación dinámica 
     # @param tiempo_cero (bool) indica si se desea que exista el tiempo cero o no 
@@ -50,286 +102,684 @@ class Simulacion:
         # Observación: el precio del producto va a ir disminuyendo a medida que hay más clientes que lo soliciten 
 
         # 1. Se simulan los clientes que están en un periodo determinado usando la app para comprar (CLIENTES)
-        CLIENTES = simulaClientes(self.tasa_clientes_compran)
+        with self.instrumentacion.fase("clientes"):
+            CLIENTES = simulaPoblacionClientes(self.tasa_clientes_compran, self.catalogo.nombres, self.flujos.generador("clientes"), self.segmentacion)
+        self.CLIENTES = CLIENTES
+        # Agregamos los productos al libro de descuentos aplicados (vacío)
+        self.DESCUENTOS_APLICADOS = LibroIngresos(self.catalogo.nombres)
         # 2. Para cada producto,de los clientes simulados, se simula la cantidad de clientes que lo van a comprar y se muestrea esa cantidad de clientes de (CLIENTES)
-        for producto, demanda in zip(self.productos["Nombre"], self.productos["demanda_clientes"]): 
-            # Agregamos el producto a los descuentos aplicados
-            self.DESCUENTOS_APLICADOS[producto] = []
-            # Agregamos el producto a las cantidades solicitadas
-            self.CANTIDADES_SOLICITADAS[producto] = 0 
-            # Agregamos el producto a las cantidades no satisfechas
-            self.CANTIDADES_NO_SATISFECHAS[producto] = 0
-            # Vamos a muestrear sin reemplazo de CLIENTES 
-
-            # Corrección de la variable demanda para que no sea mayor a la longitud de la población 
-            if(demanda > len(CLIENTES)):
-                demanda = len(CLIENTES)
-
-            clientes_compran = random.sample(CLIENTES, demanda)
-            # Extraemos la cantidad con la que se cuenta de ese producto 
-            cantidad_del_producto = self.productos.loc[self.productos['Nombre'] == producto, 'cantidad'].values[0]
+        # Vamos a muestrear sin reemplazo de CLIENTES los índices de los clientes de todos los productos a la vez
+        # (la demanda se corrige para que no sea mayor a la longitud de la población)
+        demandas = np.minimum(self.catalogo.demanda_clientes, len(CLIENTES))
+        with self.instrumentacion.fase("muestreo"):
+            clientes_por_producto, _ = muestreaPorProducto(self.flujos.generador("muestreo"), len(CLIENTES), demandas)
+        cortes = np.concatenate(([0], np.cumsum(demandas)))
+        # Límite de la cantidad que solicita cada cliente según su cluster (renglón) y el producto (columna)
+        tabla_cantidades = self.tablaCantidades(CLIENTES)
+        clusters = CLIENTES.clusters.tolist()
+        compras = 0
+        with self.instrumentacion.fase("compras"):
+            for k, producto in enumerate(self.catalogo.nombres): 
+                # Agregamos el producto a las cantidades solicitadas
+                self.CANTIDADES_SOLICITADAS[producto] = 0 
+                # Agregamos el producto a las cantidades no satisfechas
+                self.CANTIDADES_NO_SATISFECHAS[producto] = 0
+                # Índices de los clientes que compran el producto 
+                clientes_compran = clientes_por_producto[cortes[k]:cortes[k + 1]].tolist()
+                # Flujos aleatorios del producto para las cantidades y los descuentos
+                rng_cantidades = self.flujos.generador("cantidades", k)
+                rng_descuentos = self.flujos.generador("descuentos", k)
+                # Extraemos la cantidad con la que se cuenta de ese producto 
+                cantidad_del_producto = self.catalogo.cantidad[k]
+                cantidad_maxima = tabla_cantidades[:, k].tolist()
+                # Compras del producto que se agregan en bloque a las canastas de los clientes
+                compras_clientes, compras_cantidades, compras_descuentos = [], [], []
             
-            # En caso que se dese correr una simulación con tiempo cero
-            if(tiempo_cero):
-                # 2.1. Para cada cliente se simula el método de descuento que se le va a aplicar
-                for cliente in clientes_compran:
-                    # Agregamos el producto al cliente 
-                    # Simulamos de una uniforme discreta de 0 a cantidad_promedio[producto]
-                    cantidad = np.random.randint(1, self.cantidad_promedio[producto])
-                    if(self.CANTIDADES_SOLICITADAS[producto] + cantidad <= cantidad_del_producto): 
-                        # Se agrega el producto a la canasta del cliente 
-                        cliente.agregarProducto(producto, cantidad)
-                        # Aplicamos el descuento 
-                        descuento, tipo_descuento = aplicaDescuentoIndividual(cliente, self.forma_a, self.forma_b, producto)
-                        # Vamos a guardar el descuento en un arreglo de descuentos para calcular posteriormente los ingresos por ventas (ya con el descuento aplicado)
-                        # Este arreglo nos facilitará el cálculo de los descuentos por producto para no iterar por todos los clientes
-                        self.DESCUENTOS_APLICADOS[producto].append(cantidad * (1 - descuento))
-                        # Agregamos las cantidades solicitadas 
-                        self.CANTIDADES_SOLICITADAS[producto] += cantidad
-                        # Vamos a registrar el método por descuento 
-                        if(tipo_descuento in self.METODOS_DESCUENTO):
-                            self.METODOS_DESCUENTO[tipo_descuento] += 1
-                        elif(tipo_descuento != None):
-                            self.METODOS_DESCUENTO[tipo_descuento] = 1
-                    else:
-                        print(f'Se han agotado las existencias del producto {producto}')
-                        self.CANTIDADES_NO_SATISFECHAS[producto] += cantidad
-
-            # Ajustamos los productos solicitados al dataframe productos 
-            self.productos.loc[self.productos["Nombre"] == producto, "productos_solicitados"] = self.CANTIDADES_SOLICITADAS[producto]
-
-        self.ingresos, self.ingresos_x_producto = calculaIngresosConDescuento(self.DESCUENTOS_APLICADOS, self.productos)
+                # En caso que se dese correr una simulación con tiempo cero
+                if(tiempo_cero):
+                    # 2.1. Para cada cliente se simula el método de descuento que se le va a aplicar
+                    for j, cliente in enumerate(clientes_compran):
+                        # Cuando el producto se agota, al resto de los clientes solo se les suma la demanda no satisfecha (en bloque)
+                        if(self.CANTIDADES_SOLICITADAS[producto] >= cantidad_del_producto):
+                            self.CANTIDADES_NO_SATISFECHAS[producto] += simulaCantidadNoSatisfecha(len(clientes_compran) - j, 1, self.limitesNoSatisfechos(tabla_cantidades, clusters, clientes_compran[j:], k), rng_cantidades)
+                            break
+                        # Agregamos el producto al cliente 
+                        # Simulamos de una uniforme discreta de 0 a cantidad_promedio[producto] (ajustada al cluster del cliente)
+                        cantidad = rng_cantidades.integers(1, cantidad_maxima[clusters[cliente]])
+                        if(self.CANTIDADES_SOLICITADAS[producto] + cantidad <= cantidad_del_producto): 
+                            # Aplicamos el descuento 
+                            descuento, tipo_descuento = self.descuentos.individual(k, rng_descuentos)
+                            # Se agrega el producto (y su descuento) a la canasta del cliente 
+                            compras_clientes.append(cliente)
+                            compras_cantidades.append(cantidad)
+                            compras_descuentos.append(np.nan if tipo_descuento is None else descuento)
+                            # Vamos a acumular las unidades con descuento en el libro para calcular posteriormente los ingresos por ventas (ya con el descuento aplicado)
+                            # El libro lleva la suma por producto, así no se itera por todos los clientes ni por todas las ventas
+                            self.DESCUENTOS_APLICADOS.registra(k, cantidad * (1 - descuento))
+                            # Agregamos las cantidades solicitadas 
+                            self.CANTIDADES_SOLICITADAS[producto] += cantidad
+                            # Vamos a registrar el método por descuento 
+                            if(tipo_descuento in self.METODOS_DESCUENTO):
+                                self.METODOS_DESCUENTO[tipo_descuento] += 1
+                            elif(tipo_descuento != None):
+                                self.METODOS_DESCUENTO[tipo_descuento] = 1
+                        else:
+                            self.CANTIDADES_NO_SATISFECHAS[producto] += cantidad
+                    self.AGOTAMIENTOS.registra(0, k, self.CANTIDADES_NO_SATISFECHAS[producto])
+
+                CLIENTES.agregaCompras(compras_clientes, k, compras_cantidades, compras_descuentos)
+                compras += len(compras_clientes)
+                # Ajustamos los productos solicitados en el catálogo 
+                self.catalogo.solicitados[k] = self.CANTIDADES_SOLICITADAS[producto]
         if(tiempo_cero):
-            # Imprimimos los métodos de descuento que los clientes aplicaron durante la simulación 
-            print(f'Métodos de descuento aplicados: {self.METODOS_DESCUENTO}')
-            # Vamos a hacer una piechart utilizando plotly para desplegar los métodos de descuento
-            fig = go.Figure(data=[go.Pie(labels=list(self.METODOS_DESCUENTO.keys()), values=list(self.METODOS_DESCUENTO.values()))], layout=go.Layout(title="Métodos de descuento aplicados"))
-            # Cabiamos la tiografía de la gráfica
-            fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-            fig.show()
-
-            # 2.2 Se calculan los ingresos de ventas en total y por producto ya considerando los descuentos y cantidad de personas que solicitan cada producto 
-            print(f'Ingresos totales: {self.ingresos} y por producto: {self.ingresos_x_producto}')
-
-            # Vamos a hacer un piechart utilizando plotly para desplegar los ingresos por producto
-            fig = go.Figure(data=[go.Pie(labels=list(self.ingresos_x_producto.keys()), values=list(self.ingresos_x_producto.values()))], layout=go.Layout(title="Ingresos por producto"))
-            fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-            fig.show()
-
-            # 3. Dependiendo del total de productos demandados, se va a escoger un camión que cuente con la capacidad suficiente para transportarlos (CAMIONES)
-            espacio, peso_total = calculaEspacioCargamento(self.productos)
-            print(f'Espacio total: {espacio} y peso total: {peso_total}')
-
-            # 4. Gráfica de los productos no satisfechos (de barra y por producto) de self.CANTIDADES_NO_SATISFECHAS 
-            fig = go.Figure(data=[go.Bar(x=list(self.CANTIDADES_NO_SATISFECHAS.keys()), y=list(self.CANTIDADES_NO_SATISFECHAS.values()))], layout=go.Layout(title="Cantidad de productos no satisfechos"))
-            fig.update_traces(marker_color='rgb(158,202,225)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.6)
-            fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-            fig.show()
-
-            # Vamos a hacer una gráfica de barras para desplegar la cantidad de productos solicitados 
-            fig = go.Figure(data=[go.Bar(x=list(self.CANTIDADES_SOLICITADAS.keys()), y=list(self.CANTIDADES_SOLICITADAS.values()))], layout=go.Layout(title="Cantidad de productos solicitados"))
-            # Agregamos diferentes colores a la gráfica
-            fig.update_traces(marker_color='rgb(158,202,225)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.6)
-            fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-            fig.show()
-            # Display de los productos
-            display(self.productos)
-    
-
-    # Método que simula la dinámica de venta de productos en el tiempo 
-    def simulaSegundaDinamica_tiempo(self): 
-        # Estructuras de datos que contendrán el cambio en el tiempo de las variables de interés 
-        self.cantidades_solicitadas_en_tiempo = {}
-        for producto in self.productos["Nombre"]:
-            # La cantidad_t0 es la cantidad de productos solicitados del dataframe de productos (antes de mandar el camión )
-            cantidad_t0 = self.productos[self.productos["Nombre"] == producto]["productos_solicitados"].tolist()[0]
-            self.cantidades_solicitadas_en_tiempo[producto] = [cantidad_t0]
-
-        # Estructura que contiene los precios por producto en el tiempo
-        precios_por_producto_en_tiempo = {}
-        for producto in self.productos["Nombre"]:
-            precio = self.productos[self.productos["Nombre"] == producto]["precio"].tolist()[0]
-            precios_por_producto_en_tiempo[producto] = [precio]
-
-        # Estructura que contiene los ingresos por producto en el tiempo 
-        ingresos_por_producto_en_tiempo = {}
-        for producto in self.productos["Nombre"]:
-            ingreso = self.ingresos_x_producto[producto]
-            ingresos_por_producto_en_tiempo[producto] = [ingreso]
-
-        clientes_nuevos_tiempo = []
-        ingresos_en_tiempo = [self.ingresos]
-        cantidad_de_descuentos_aplicados_tiempo = []
-
-        # 4. Se establece el punto inicial de la ruta y el punto final de la ruta (RUTAS) (Conexión con Google Maps para estimar el tiempo de llegada) (DONE)
-
-        # Definimos un pool de clientes extemporáneos que tienen una probabilidad positiva de comprar productos 
-        CLIENTES_EXTEMPORANEOS = simulaClientes(self.tasa_tota_nuevos_clientes)
-
-        # 5. Se simula el tiempo que se tarda el camión en llegar a su destino 
-        for i in range(self.tiempo): 
-            j = 0 
-            # Variable que va contando los clientes que en el tiempo t deciden comprar un producto
-            cantidad_de_nuevos_clientes = 0 
-            # Cantidad de descuentos asignados al tiempo i 
-            descuentos_i = 0 
-
-            for producto in self.productos["Nombre"]:
-                # 5.1 Se simula la cantidad de nuevos clientes que van a comprar el producto en ese tiempo
-                nuevos_clientes = simularDemanda(self.tasas_nuevos_clientes[producto])
-                cantidad_de_nuevos_clientes += nuevos_clientes
-                # Variable que regula la cantidad de nuevo producto solicitdado 
-                nuevos_productos = 0 
-
-                # 5.1 Por cada tiempo, se simula una cantidad de clientes que decidieron comprar el producto en ese tiempo  (se tiene que ver si hay productos disponibles)
-                # 5.2 Por cada cliente se simula el método de descuento que se le va a aplicar
-                # 5.3 Se actualizan los ingresos de ventas en total y por producto ya considerando los descuentos.
-
-                # Corrección de la variable nuevos_clientes 
-                if(nuevos_clientes > len(CLIENTES_EXTEMPORANEOS)):
-                    nuevos_clientes = len(CLIENTES_EXTEMPORANEOS)
-
-                clientes_compran = random.sample(CLIENTES_EXTEMPORANEOS, nuevos_clientes)
-                # Extraemos la cantidad con la que se cuenta de ese producto 
-                cantidad_del_producto = self.productos.loc[self.productos['Nombre'] == producto, 'cantidad'].values[0]
-                # 2.1. Para cada cliente se simula el método de descuento que se le va a aplicar
-                for cliente in clientes_compran:
-                    # Agregamos el producto al cliente 
-                    # Simulamos de una uniforme discreta de 0 a cantidad_promedio[producto]
-                    cantidad = np.random.randint(0, self.cantidad_promedio[producto])
-                    if(self.CANTIDADES_SOLICITADAS[producto] + cantidad <= cantidad_del_producto): 
-                        cliente.agregarProducto(producto, cantidad)
-                        # Aplicamos el descuento             
-                        cliente.agregarProducto(producto, cantidad)
-
-                        descuento, tipo_descuento = aplicaDescuentoIndividual(cliente, self.forma_a, self.forma_b, producto)
-                        # Vamos a guardar el descuento en un arreglo de descuentos para calcular posteriormente los ingresos por ventas (ya con el descuento aplicado)
-                        # Este arreglo nos facilitará el cálculo de los descuentos por producto para no iterar por todos los clientes
-                        self.DESCUENTOS_APLICADOS[producto].append(cantidad * (1 - descuento))
-                        # Agregamos las cantidades solicitadas 
-                        self.CANTIDADES_SOLICITADAS[producto] += cantidad
-                        nuevos_productos += cantidad
-                        # Vamos a registrar el método por descuento 
-                        if(tipo_descuento in self.METODOS_DESCUENTO):
-                            self.METODOS_DESCUENTO[tipo_descuento] += 1
-                        elif(tipo_descuento != None):
-                            self.METODOS_DESCUENTO[tipo_descuento] = 1
-                        
-                        # Agregamos el descuento 
-                        if(descuento != 0): 
-                            descuentos_i += 1
-                    else: 
-                        # Si no hay suficiente producto, no se le vende al cliente 
-                        print(f'Se han agotado las existencias del producto {producto}')
-                        self.CANTIDADES_NO_SATISFECHAS[producto] += cantidad
-                
-                # Se actualiza el precio del producto y se disminuye en un factor porporcional a la variable de nuevos_productos (ACTUALIZAR)
-                # Vamos a actualizarlo siempre y cuando el precio del producto sea mayor o igual al límite inferior
-                if(self.productos.loc[self.productos["Nombre"] == producto, "precio"].tolist()[0] >= self.limites_inferiores[producto]):
-                    # Actualización del precio 
-                    self.productos.loc[self.productos["Nombre"] == producto, "precio"] = ajusta_precio(self.productos.loc[self.productos["Nombre"] == producto, "precio"], nuevos_clientes)
-
-                # Ajustamos los productos solicitados al dataframe productos 
-                self.productos.loc[self.productos["Nombre"] == producto, "productos_solicitados"] = self.CANTIDADES_SOLICITADAS[producto]
-
-                # Actualizamos las series de tiempo 
-                self.cantidades_solicitadas_en_tiempo[producto].append(nuevos_productos)
-                precios_por_producto_en_tiempo[producto].append(self.productos.loc[self.productos["Nombre"] == producto, "precio"].tolist()[0])
-                
-            # Calculamos los ingresos después de la actualización 
-            ingresos, ingresos_x_producto = calculaIngresosConDescuento(self.DESCUENTOS_APLICADOS, self.productos)
-
-            # Vamos a actualizar ingreos_por_producto_en_tiempo
-            for producto in self.productos["Nombre"]:
-                ingresos_por_producto_en_tiempo[producto].append(ingresos_x_producto[producto])
-
-            ingresos_en_tiempo.append(ingresos)
-            cantidad_de_descuentos_aplicados_tiempo.append(descuentos_i)
-            clientes_nuevos_tiempo.append(cantidad_de_nuevos_clientes)
-
-
-        # Observaciones: 
-        # Cuando hayan más clientes que soliciten un producto, el precio va a ir disminuyendo 
-
-        display(self.productos)
+            self.instrumentacion.cuenta("llegadas", demandas.sum())
+            self.instrumentacion.cuenta("compras", compras)
+            self.instrumentacion.cuenta("agotamientos", demandas.sum() - compras)
+
+        with self.instrumentacion.fase("ingresos"):
+            self.ingresos, self.ingresos_x_producto = calculaIngresosConDescuento(self.DESCUENTOS_APLICADOS, self.catalogo)
+        # 3. Dependiendo del total de productos demandados, se va a escoger un camión que cuente con la capacidad suficiente para transportarlos (CAMIONES)
+        with self.instrumentacion.fase("cargamento"):
+            self.espacio, self.peso_total = calculaEspacioCargamento(self.catalogo)
+            if(self.camiones is not None):
+                # Camión (o combinación de camiones) más barato y asignación de los productos a los camiones
+                self.plan_carga = planificaCarga(self.catalogo, self.camiones)
+        # Ajustamos los productos solicitados al dataframe productos 
+        with self.instrumentacion.fase("dataframe"):
+            self.catalogo.escribeEnDataFrame(self.productos)
+        return self.resultado()
+
+    # Método que simula la dinámica de venta de productos en el tiempo
+    # @param salida (EscritorTicks) escritor al que se agrega el estado de cada minuto (opcional)
+    # @param guardar_series (bool) indica si se guardan en memoria las series de tiempo (False mantiene la memoria constante)
+    # @param punto_control (PuntoControl) guarda periódicamente el estado de la simulación para reanudarla (opcional)
+    def simulaSegundaDinamica_tiempo(self, salida = None, guardar_series = True, punto_control = None):
+        return self.simulaSegundaDinamica("clasico", salida, guardar_series, punto_control)
+
+    # Método que simula la dinámica de venta de productos en el tiempo de forma vectorizada
+    def simulaSegundaDinamica_vectorizada(self, salida = None, guardar_series = True, punto_control = None):
+        return self.simulaSegundaDinamica("vectorizado", salida, guardar_series, punto_control)
+
+    # Método que simula la dinámica de venta de productos en el tiempo por eventos discretos
+    def simulaSegundaDinamica_eventos(self, salida = None, guardar_series = True, punto_control = None):
+        return self.simulaSegundaDinamica("eventos", salida, guardar_series, punto_control)
+
+    # Método que simula la dinámica en el tiempo con el motor indicado
+    # @param reanuda (bool) continúa desde el último minuto guardado en un punto de control en lugar de empezar desde el minuto 0
+    def simulaSegundaDinamica(self, engine = "clasico", salida = None, guardar_series = True, punto_control = None, reanuda = False):
+        return self.consumeTicks(self.iteraSegundaDinamica(engine, reanuda), salida, guardar_series, punto_control, reanuda)
+
+    # Generador de la dinámica en el tiempo: regresa el estado de un minuto a la vez sin guardar las series
+    # Se debe ejecutar después de simulaPrimeraDinamica; el catálogo y los contadores se actualizan al agotar el generador
+    # @param engine (str) motor de la segunda dinámica: "clasico", "vectorizado" o "eventos"
+    # @param reanuda (bool) continúa desde self.estado_motor (el estado al cierre del último minuto que regresó el motor)
+    def iteraSegundaDinamica(self, engine = "clasico", reanuda = False):
+        if(engine == "clasico"):
+            return self.ticksClasico(reanuda)
+        elif(engine in ("vectorizado", "vectorized")):
+            return self.ticksVectorizado(reanuda)
+        elif(engine == "eventos"):
+            return self.ticksEventos(reanuda)
+        raise ValueError(f'Motor de simulación desconocido: {engine}')
+
+    # Estado desde el que continúa un motor: None para empezar desde el minuto 0, o el estado guardado al reanudar
+    def estadoParaReanudar(self, engine, reanuda):
+        if(not reanuda):
+            self.estado_motor = None
+            return None
+        if(self.estado_motor is None):
+            raise ValueError('No hay un estado de la dinámica en el tiempo para reanudar')
+        if(self.estado_motor["engine"] != engine):
+            raise ValueError(f'El estado guardado es del motor {self.estado_motor["engine"]}, no de {engine}')
+        return self.estado_motor
+
+    # Generador de toda la simulación: ejecuta la primera dinámica y regresa el estado inicial (minuto 0) y el de cada minuto
+    def itera(self, tiempo_cero = True, engine = "clasico"):
+        self.simulaPrimeraDinamica(tiempo_cero)
+        yield self.estadoInicial()
+        yield from self.iteraSegundaDinamica(engine)
+
+    # Estado de la simulación en el minuto 0 (al terminar la primera dinámica), con el mismo formato que los minutos siguientes
+    def estadoInicial(self):
+        n_productos = len(self.catalogo.nombres)
+        return {
+            "tiempo": 0,
+            "productos": self.catalogo.nombres,
+            "cantidades_solicitadas": np.array(self.catalogo.solicitados, dtype=np.int64),
+            "precios": np.array(self.catalogo.precio, dtype=float),
+            "ingresos_x_producto": self.catalogo.arreglo(self.ingresos_x_producto),
+            "ingresos": self.ingresos,
+            "clientes_nuevos": np.zeros(n_productos, dtype=np.int64),
+            "descuentos": np.zeros(n_productos, dtype=np.int64),
+        }
+
+    # Método que consume los minutos de un generador de la dinámica en el tiempo
+    # Escribe cada minuto en la salida (si se indica) y, opcionalmente, guarda las series de tiempo en memoria
+    # @param punto_control (PuntoControl) cada cierto número de minutos guarda la simulación (con las series y la posición de la salida)
+    # @param reanuda (bool) las series continúan desde las guardadas en el punto de control
+    def consumeTicks(self, ticks, salida = None, guardar_series = True, punto_control = None, reanuda = False):
+        nombres = self.catalogo.nombres
+        if(reanuda and self.series_parciales is not None):
+            solicitadas, precios, ingresos_x_producto, ingresos, clientes_nuevos, descuentos, ultimo, _ = self.series_parciales
+        else:
+            inicial = self.estadoInicial()
+            # Filas de las series de tiempo (la fila 0 es el estado inicial)
+            solicitadas, precios, ingresos_x_producto = [inicial["cantidades_solicitadas"]], [inicial["precios"]], [inicial["ingresos_x_producto"]]
+            ingresos, clientes_nuevos, descuentos = [inicial["ingresos"]], [], []
+            ultimo = inicial
+        self.series_parciales = None
+        try:
+            if(salida is not None and not reanuda):
+                salida.escribe(inicial)
+            while(True):
+                # El tiempo de la dinámica es el que tarda el generador en producir cada minuto
+                with self.instrumentacion.fase("dinamica"):
+                    tick = next(ticks, None)
+                if(tick is None):
+                    break
+                if(salida is not None):
+                    with self.instrumentacion.fase("salida"):
+                        salida.escribe(tick)
+                if(guardar_series):
+                    solicitadas.append(tick["cantidades_solicitadas"])
+                    precios.append(tick["precios"])
+                    ingresos_x_producto.append(tick["ingresos_x_producto"])
+                    ingresos.append(tick["ingresos"])
+                    clientes_nuevos.append(int(tick["clientes_nuevos"].sum()))
+                    descuentos.append(int(tick["descuentos"].sum()))
+                ultimo = tick
+                if(punto_control is not None and punto_control.toca()):
+                    with self.instrumentacion.fase("punto_control"):
+                        # Lo escrito en la salida hasta este minuto es lo que se conserva al reanudar
+                        if(salida is not None):
+                            salida.vacia()
+                            self.salida_parcial = {"ruta": salida.ruta, "formato": salida.formato, "tam_lote": salida.tam_lote, "posicion": salida.posicion()}
+                        self.series_parciales = (solicitadas, precios, ingresos_x_producto, ingresos, clientes_nuevos, descuentos, ultimo, guardar_series)
+                        punto_control.guarda(self)
+                        self.series_parciales = None
+        finally:
+            # Aunque la simulación se interrumpa, los minutos ya simulados quedan en la salida
+            if(salida is not None):
+                with self.instrumentacion.fase("salida"):
+                    salida.vacia()
+
+        if(guardar_series):
+            solicitadas, precios, ingresos_x_producto = np.array(solicitadas), np.array(precios), np.array(ingresos_x_producto)
+            self.cantidades_solicitadas_en_tiempo = {producto: solicitadas[:, k].tolist() for k, producto in enumerate(nombres)}
+            self.precios_por_producto_en_tiempo = {producto: precios[:, k].tolist() for k, producto in enumerate(nombres)}
+            self.ingresos_por_producto_en_tiempo = {producto: ingresos_x_producto[:, k].tolist() for k, producto in enumerate(nombres)}
+            self.ingresos_en_tiempo = ingresos
+            self.clientes_nuevos_tiempo = clientes_nuevos
+            self.cantidad_de_descuentos_aplicados_tiempo = descuentos
+        else:
+            # Sin series, el resultado lleva los ingresos del último minuto
+            self.ingresos_en_tiempo = None
+            self.ingresos = ultimo["ingresos"]
+            self.ingresos_x_producto = self.catalogo.diccionario(ultimo["ingresos_x_producto"])
         # Resultados (por camión)
-
-        # Observaciones 
+        return self.resultado()
+
+    # Generador de la dinámica en el tiempo cliente por cliente (motor clásico)
+    # (todo su estado está en la simulación, así que para reanudar basta el minuto en el que se quedó)
+    def ticksClasico(self, reanuda = False):
+        nombres = self.catalogo.nombres
+        n_productos = len(nombres)
+        estado = self.estadoParaReanudar("clasico", reanuda)
+
+        # 4. Se establece el punto inicial de la ruta y el punto final de la ruta (RUTAS): el tiempo de llegada se calcula en el constructor con Rutas
+
+        # Definimos un pool de clientes extemporáneos que tienen una probabilidad positiva de comprar productos
+        CLIENTES_EXTEMPORANEOS = self.simulaClientesExtemporaneos() if estado is None else self.CLIENTES_EXTEMPORANEOS
+        tabla_cantidades = self.tablaCantidades(CLIENTES_EXTEMPORANEOS).tolist()
+        clusters = CLIENTES_EXTEMPORANEOS.clusters.tolist()
+
+        # 5. Se simula el tiempo que se tarda el camión en llegar a su destino
+        for i in range(0 if estado is None else estado["tick"], self.tiempo):
+            # Clientes que en el tiempo i deciden comprar cada producto, productos nuevos solicitados y descuentos asignados
+            clientes_i = np.zeros(n_productos, dtype=np.int64)
+            nuevos_productos_i = np.zeros(n_productos, dtype=np.int64)
+            descuentos_i = np.zeros(n_productos, dtype=np.int64)
+            # Contadores de la instrumentación
+            compras_i, rechazos_i, actualizaciones_i = 0, 0, 0
+
+            with self.instrumentacion.fase("compras"):
+                for k, producto in enumerate(nombres):
+                    # 5.1 Se simula la cantidad de nuevos clientes que van a comprar el producto en ese tiempo
+                    nuevos_clientes = simularDemanda(self.tasas_nuevos_clientes[producto], self.flujos.generador("llegadas", k))
+                    clientes_i[k] = nuevos_clientes
+                    # Variable que regula la cantidad de nuevo producto solicitdado
+                    nuevos_productos = 0
+
+                    # 5.1 Por cada tiempo, se simula una cantidad de clientes que decidieron comprar el producto en ese tiempo  (se tiene que ver si hay productos disponibles)
+                    # 5.2 Por cada cliente se simula el método de descuento que se le va a aplicar
+                    # 5.3 Se actualizan los ingresos de ventas en total y por producto ya considerando los descuentos.
+
+                    # Corrección de la variable nuevos_clientes
+                    if(nuevos_clientes > len(CLIENTES_EXTEMPORANEOS)):
+                        nuevos_clientes = len(CLIENTES_EXTEMPORANEOS)
+
+                    # Flujos aleatorios del producto para las cantidades y los descuentos
+                    rng_cantidades = self.flujos.generador("cantidades_tiempo", k)
+                    rng_descuentos = self.flujos.generador("descuentos_tiempo", k)
+                    # Extraemos la cantidad con la que se cuenta de ese producto
+                    cantidad_del_producto = self.catalogo.cantidad[k]
+                    no_satisfecha = 0
+                    if(self.CANTIDADES_SOLICITADAS[producto] >= cantidad_del_producto and self.segmentacion is None):
+                        # Producto agotado: no se muestrean clientes ni descuentos, solo se suma la demanda no satisfecha en bloque
+                        # (con segmentación se muestrean los clientes, porque su cluster da el límite de la cantidad, y el ciclo toma el camino del producto agotado)
+                        clientes_compran = []
+                        no_satisfecha = simulaCantidadNoSatisfecha(nuevos_clientes, 0, self.limitesNoSatisfechos(tabla_cantidades, clusters, [], k), rng_cantidades)
+                    else:
+                        clientes_compran = muestreaSinReemplazo(self.flujos.generador("muestreo_extemporaneos", k), len(CLIENTES_EXTEMPORANEOS), nuevos_clientes).tolist()
+                    # Compras del producto que se agregan en bloque a las canastas de los clientes
+                    compras_clientes, compras_cantidades, compras_descuentos = [], [], []
+                    # 2.1. Para cada cliente se simula el método de descuento que se le va a aplicar
+                    for j, cliente in enumerate(clientes_compran):
+                        # Si el producto se agota en este minuto, el resto de los clientes toma el camino del producto agotado
+                        if(self.CANTIDADES_SOLICITADAS[producto] >= cantidad_del_producto):
+                            no_satisfecha += simulaCantidadNoSatisfecha(len(clientes_compran) - j, 0, self.limitesNoSatisfechos(tabla_cantidades, clusters, clientes_compran[j:], k), rng_cantidades)
+                            break
+                        # Agregamos el producto al cliente
+                        # Simulamos de una uniforme discreta de 0 a cantidad_promedio[producto] (ajustada al cluster del cliente)
+                        cantidad = rng_cantidades.integers(0, tabla_cantidades[clusters[cliente]][k])
+                        if(self.CANTIDADES_SOLICITADAS[producto] + cantidad <= cantidad_del_producto):
+                            # Aplicamos el descuento
+                            descuento, tipo_descuento = self.descuentos.individual(k, rng_descuentos)
+                            # Se agrega el producto (y su descuento) a la canasta del cliente
+                            compras_clientes.append(cliente)
+                            compras_cantidades.append(cantidad)
+                            compras_descuentos.append(np.nan if tipo_descuento is None else descuento)
+
+                            # Vamos a acumular las unidades con descuento en el libro para calcular posteriormente los ingresos por ventas (ya con el descuento aplicado)
+                            # El libro lleva la suma por producto, así no se itera por todos los clientes ni por todas las ventas
+                            self.DESCUENTOS_APLICADOS.registra(k, cantidad * (1 - descuento))
+                            # Agregamos las cantidades solicitadas
+                            self.CANTIDADES_SOLICITADAS[producto] += cantidad
+                            nuevos_productos += cantidad
+                            # Vamos a registrar el método por descuento
+                            if(tipo_descuento in self.METODOS_DESCUENTO):
+                                self.METODOS_DESCUENTO[tipo_descuento] += 1
+                            elif(tipo_descuento != None):
+                                self.METODOS_DESCUENTO[tipo_descuento] = 1
+
+                            # Agregamos el descuento
+                            if(descuento != 0):
+                                descuentos_i[k] += 1
+                        else:
+                            # Si no hay suficiente producto, no se le vende al cliente
+                            no_satisfecha += cantidad
+
+                    # La demanda no satisfecha se acumula y se registra una sola vez por producto y minuto
+                    self.CANTIDADES_NO_SATISFECHAS[producto] += no_satisfecha
+                    self.AGOTAMIENTOS.registra(i + 1, k, no_satisfecha)
+                    CLIENTES_EXTEMPORANEOS.agregaCompras(compras_clientes, k, compras_cantidades, compras_descuentos)
+                    compras_i += len(compras_clientes)
+                    rechazos_i += nuevos_clientes - len(compras_clientes)
+
+                    # Se actualiza el precio del producto y se disminuye en un factor porporcional a la variable de nuevos_productos (ACTUALIZAR)
+                    # Vamos a actualizarlo siempre y cuando el precio del producto sea mayor o igual al límite inferior (sin bajar del límite)
+                    self.catalogo.precio[k], actualizado = self.precios.actualizaProducto(k, self.catalogo.precio[k], nuevos_clientes)
+                    actualizaciones_i += actualizado
+
+                    # Ajustamos los productos solicitados en el catálogo
+                    self.catalogo.solicitados[k] = self.CANTIDADES_SOLICITADAS[producto]
+                    nuevos_productos_i[k] = nuevos_productos
+            self.instrumentacion.cuenta("llegadas", clientes_i.sum())
+            self.instrumentacion.cuenta("compras", compras_i)
+            self.instrumentacion.cuenta("agotamientos", rechazos_i)
+            self.instrumentacion.cuenta("actualizaciones_precio", actualizaciones_i)
+
+            # Calculamos los ingresos después de la actualización
+            with self.instrumentacion.fase("ingresos"):
+                ingresos, ingresos_x_producto = calculaIngresosConDescuento(self.DESCUENTOS_APLICADOS, self.catalogo)
+
+            # Estado del minuto i + 1 (el precio se copia porque el catálogo se sigue actualizando)
+            self.estado_motor = {"engine": "clasico", "tick": i + 1}
+            yield {
+                "tiempo": i + 1,
+                "productos": nombres,
+                "cantidades_solicitadas": nuevos_productos_i,
+                "precios": self.catalogo.precio.astype(float),
+                "ingresos_x_producto": self.catalogo.arreglo(ingresos_x_producto),
+                "ingresos": ingresos,
+                "clientes_nuevos": clientes_i,
+                "descuentos": descuentos_i,
+            }
+
+        # Observaciones:
+        # Cuando hayan más clientes que soliciten un producto, el precio va a ir disminuyendo
+
+        # Observaciones
         # El procedimiento anterior se hará por camión. Por lo que se pueden cambiar las variables globales que hacen referencia a las tasas de demanda, descuentos ofrecidos y capacidad de los camiones.
-        # Ya con estos datos, se puede aplicar una clusterización de usuarios para clasificarlos en grupos  que compran ciertos paquetes de productos. 
-
-        # 1. Gráfica del precio por producto a lo largo del tiempo 
-        fig = go.Figure()
-        for producto in self.cantidades_solicitadas_en_tiempo:
-            fig.add_trace(go.Scatter(x=np.arange(len(self.cantidades_solicitadas_en_tiempo[producto][1:])), y=self.cantidades_solicitadas_en_tiempo[producto][1:], name=producto))
-
-        fig.update_layout(title="Cantidad de productos solicitados por producto a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Cantidad de productos solicitados")
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()
-
-        # 2. Gráfica de los ingresos por ventas a lo largo del tiempo 
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=np.arange(len(ingresos_en_tiempo[1:])), y=ingresos_en_tiempo[1:], name="Ingresos"))
-        fig.update_layout(title="Ingresos por ventas a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Ingresos")
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()
-
-        # 3. Gráfica de los ingresos por ventas por producto a lo largo del tiempo
-        fig = go.Figure()
-        for producto in ingresos_por_producto_en_tiempo:
-            fig.add_trace(go.Scatter(x=np.arange(len(ingresos_por_producto_en_tiempo[producto][1:])), y=ingresos_por_producto_en_tiempo[producto][1:], name=producto))
-        fig.update_layout(title="Ingresos por ventas por producto a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Ingresos")
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()
-
-        # 4. Gráfica de los precios por producto a lo largo del tiempo
-        fig = go.Figure()
-        for producto in precios_por_producto_en_tiempo:
-            fig.add_trace(go.Scatter(x=np.arange(len(precios_por_producto_en_tiempo[producto])), y=precios_por_producto_en_tiempo[producto], name=producto))
-            # Vamos a agregar una línea horizontal punteada que sea el límite inferior del precio del producto y que sea del mismo color que la línea del producto
-            fig.add_shape(type="line", x0=0, y0= self.limites_inferiores[producto], x1=len(precios_por_producto_en_tiempo[producto]), y1= self.limites_inferiores[producto], line=dict(color=fig.data[-1].line.color, width=1, dash="dash"))
-        fig.update_layout(title="Precios por producto a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Precios")
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()
-
-        # 5. Gráfica de la cantidad de clientes que en el tiempo decide comprar un producto
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=np.arange(len(clientes_nuevos_tiempo)), y=clientes_nuevos_tiempo, name="Clientes"))
-        fig.update_layout(title="Cantidad de clientes que en el tiempo decide comprar un producto", xaxis_title="Tiempo", yaxis_title="Cantidad de clientes")
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()
-
-        # 6. Gráfica de pie para los métodos de descuento aplicados
-        fig = go.Figure(data=[go.Pie(labels=list(self.METODOS_DESCUENTO.keys()), values=list(self.METODOS_DESCUENTO.values()))])
-        fig.update_layout(title="Métodos de descuento aplicados")
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()
-
-        # 7. Gráfica de la cantidad de descuentos aplicados a lo largo del tiempo
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=np.arange(len(cantidad_de_descuentos_aplicados_tiempo)), y=cantidad_de_descuentos_aplicados_tiempo, name="Descuentos"))
-        fig.update_layout(title="Cantidad de descuentos aplicados a lo largo del tiempo", xaxis_title="Tiempo", yaxis_title="Cantidad de descuentos")
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()
-
-        # 8. Gráfica de barras de los productos solicitados 
-        fig = go.Figure(data=[go.Bar(x=list(self.CANTIDADES_SOLICITADAS.keys()), y=list(self.CANTIDADES_SOLICITADAS.values()))], layout=go.Layout(title="Cantidad de productos solicitados"))
-        # Agregamos diferentes colores a la gráfica
-        fig.update_traces(marker_color='rgb(158,202,225)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.6)
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()
-
-        # 9. Gráfica de los productos que fueron solicitados y que no pudieron ser colocados debido a que el producto se había agoatado
-        fig = go.Figure(data=[go.Bar(x=list(self.CANTIDADES_NO_SATISFECHAS.keys()), y=list(self.CANTIDADES_NO_SATISFECHAS.values()))], layout=go.Layout(title="Cantidad de productos no satisfechos"))
-        fig.update_traces(marker_color='rgb(158,202,225)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.6)
-        fig.update_layout(font=dict(family="Courier New, monospace", size=18, color="#7f7f7f"))
-        fig.show()  
+        # Ya con estos datos, se puede aplicar una clusterización de usuarios para clasificarlos en grupos  que compran ciertos paquetes de productos.
+
+        # Escribimos el estado final del catálogo en el dataframe de productos
+        with self.instrumentacion.fase("dataframe"):
+            self.catalogo.escribeEnDataFrame(self.productos)
+
+    # Generador de la dinámica en el tiempo vectorizada
+    # En cada minuto se simulan en bloque (arreglos de NumPy) las llegadas de Poisson, las cantidades, la elegibilidad y el valor
+    # de los descuentos de todos los productos y clientes, en lugar de iterar cliente por cliente
+    def ticksVectorizado(self, reanuda = False):
+        nombres = self.catalogo.nombres
+        n_productos = len(nombres)
+        estado = self.estadoParaReanudar("vectorizado", reanuda)
+
+        # Parámetros por producto como arreglos (en el orden del dataframe de productos)
+        tasas = self.catalogo.arreglo(self.tasas_nuevos_clientes)
+        cantidad_del_producto = self.catalogo.cantidad
+        solicitadas = self.catalogo.solicitados
+        if(estado is None):
+            precios = self.catalogo.precio
+            no_satisfechas = self.catalogo.arreglo(self.CANTIDADES_NO_SATISFECHAS)
+            conteo_metodos = np.zeros(len(TIPOS_DESCUENTO), dtype=np.int64)
+            # Pool de clientes extemporáneos
+            self.simulaClientesExtemporaneos()
+        else:
+            precios, no_satisfechas, conteo_metodos = estado["precios"], estado["no_satisfechas"], estado["conteo_metodos"]
+        tam_pool = len(self.CLIENTES_EXTEMPORANEOS)
+        tabla_cantidades = self.tablaCantidades(self.CLIENTES_EXTEMPORANEOS)
+        clusters = self.CLIENTES_EXTEMPORANEOS.clusters
+        # Flujos aleatorios por fase (cada extracción es en bloque para todos los productos)
+        rng_llegadas = self.flujos.generador("llegadas")
+        rng_muestreo = self.flujos.generador("muestreo_extemporaneos")
+        rng_cantidades = self.flujos.generador("cantidades_tiempo")
+        rng_descuentos = self.flujos.generador("descuentos_tiempo")
+        rng_estaticos = self.flujos.generador("descuentos_estaticos")
+
+        for i in range(0 if estado is None else estado["tick"], self.tiempo):
+            # 5.1 Llegadas de Poisson para todos los productos (corregidas para no superar el tamaño del pool)
+            with self.instrumentacion.fase("llegadas"):
+                nuevos_clientes = np.minimum(simularDemanda(tasas, rng_llegadas), tam_pool)
+            # Los productos agotados no muestrean clientes ni descuentos; su demanda no satisfecha se simula en bloque
+            # (con segmentación se muestrean los clientes, porque su cluster da el límite de la cantidad, y el límite de inventario los rechaza a todos)
+            agotado = solicitadas >= cantidad_del_producto if self.segmentacion is None else np.zeros(n_productos, dtype=bool)
+            clientes_agotados = np.where(agotado, nuevos_clientes, 0)
+            clientes_disponibles = nuevos_clientes - clientes_agotados
+            # Índices del cliente y del producto de cada compra en este minuto (muestreo sin reemplazo por producto)
+            with self.instrumentacion.fase("muestreo"):
+                cliente_de_compra, producto_de_cliente = muestreaPorProducto(rng_muestreo, tam_pool, clientes_disponibles)
+
+            with self.instrumentacion.fase("inventario"):
+                no_satisfecha = np.zeros(n_productos, dtype=np.int64)
+                if(clientes_agotados.any()):
+                    producto_agotado = np.repeat(np.arange(n_productos), clientes_agotados)
+                    no_satisfecha += np.bincount(producto_agotado, weights=rng_cantidades.integers(0, tabla_cantidades[0, producto_agotado]), minlength=n_productos).astype(np.int64)
+                # Cantidad solicitada por cada cliente: uniforme discreta de 0 a cantidad_promedio[producto] (ajustada al cluster del cliente)
+                cantidades = rng_cantidades.integers(0, tabla_cantidades[clusters[cliente_de_compra], producto_de_cliente])
+                # Límite de inventario: si lo que piden todos los clientes de un producto cabe en su inventario restante se atienden todos;
+                # los productos disputados (pocos, los que se agotan en este minuto) se recorren en orden de llegada como en el motor clásico,
+                # así un cliente rechazado no impide atender a los siguientes que piden menos
+                restante = cantidad_del_producto - solicitadas
+                pedido = np.bincount(producto_de_cliente, weights=cantidades, minlength=n_productos)
+                atendido = np.ones(len(cantidades), dtype=bool)
+                inicio = np.cumsum(clientes_disponibles) - clientes_disponibles
+                for k in np.nonzero((clientes_disponibles > 0) & (pedido >= restante))[0].tolist():
+                    tramo = slice(inicio[k], inicio[k] + clientes_disponibles[k])
+                    atendido[tramo] = atiendeEnOrden(cantidades[tramo], restante[k])
+                # Cantidades que no se pudieron satisfacer (por agotamiento de inventario)
+                no_satisfecha += np.bincount(producto_de_cliente[~atendido], weights=cantidades[~atendido], minlength=n_productos).astype(np.int64)
+                no_satisfechas += no_satisfecha
+                self.AGOTAMIENTOS.registraLote(i + 1, no_satisfecha)
+
+            # 5.2 Descuentos para los clientes atendidos (método, elegibilidad y valor en una sola extracción)
+            producto_atendido = producto_de_cliente[atendido]
+            cantidad_atendida = cantidades[atendido]
+            n_atendidos = len(producto_atendido)
+            with self.instrumentacion.fase("descuentos"):
+                descuento, metodo = self.descuentos.lote(producto_atendido, rng_descuentos, rng_estaticos)
+                elegible = metodo != SIN_DESCUENTO
+                conteo_metodos += cuentaMetodos(metodo)
+
+            with self.instrumentacion.fase("registro"):
+                unidades = cantidad_atendida * (1 - descuento)
+                self.DESCUENTOS_APLICADOS.registraLote(producto_atendido, unidades)
+                # Las compras se agregan directamente a las canastas de la población de clientes
+                self.CLIENTES_EXTEMPORANEOS.agregaCompras(cliente_de_compra[atendido], producto_atendido, cantidad_atendida, np.where(elegible, descuento, np.nan))
+                nuevos_productos = np.bincount(producto_atendido, minlength=n_productos, weights=cantidad_atendida).astype(np.int64)
+                solicitadas += nuevos_productos
+
+            # Se actualiza el precio de los productos cuyo precio es mayor o igual a su límite inferior (sin bajar del límite)
+            precios, actualiza = self.precios.actualiza(precios, nuevos_clientes)
+
+            self.instrumentacion.cuenta("llegadas", nuevos_clientes.sum())
+            self.instrumentacion.cuenta("compras", n_atendidos)
+            self.instrumentacion.cuenta("agotamientos", nuevos_clientes.sum() - n_atendidos)
+            self.instrumentacion.cuenta("actualizaciones_precio", np.count_nonzero(actualiza))
+
+            # 5.3 Estado del minuto i + 1
+            with self.instrumentacion.fase("ingresos"):
+                ingresos_x_producto = self.DESCUENTOS_APLICADOS.ingresos(precios)[1]
+            self.estado_motor = {"engine": "vectorizado", "tick": i + 1, "precios": precios, "no_satisfechas": no_satisfechas, "conteo_metodos": conteo_metodos}
+            yield {
+                "tiempo": i + 1,
+                "productos": nombres,
+                "cantidades_solicitadas": nuevos_productos,
+                "precios": precios,
+                "ingresos_x_producto": ingresos_x_producto,
+                "ingresos": float(ingresos_x_producto.sum()),
+                "clientes_nuevos": nuevos_clientes.astype(np.int64),
+                "descuentos": np.bincount(producto_atendido[descuento != 0], minlength=n_productos),
+            }
+
+        # Regresamos los resultados a las estructuras de la simulación
+        self.catalogo.precio = precios
+        with self.instrumentacion.fase("dataframe"):
+            self.catalogo.escribeEnDataFrame(self.productos)
+        for k, producto in enumerate(nombres):
+            self.CANTIDADES_SOLICITADAS[producto] = int(solicitadas[k])
+            self.CANTIDADES_NO_SATISFECHAS[producto] = int(no_satisfechas[k])
+        acumulaMetodos(self.METODOS_DESCUENTO, conteo_metodos)
+
+    # Generador de la dinámica en el tiempo por eventos discretos
+    # Las llegadas de clientes se agendan con tiempos entre llegadas exponenciales, así el costo depende del número de eventos
+    # y no de tiempo x productos; las tasas pueden variar por tramos y los precios se actualizan y reportan cada self.resolucion minutos
+    def ticksEventos(self, reanuda = False):
+        nombres = self.catalogo.nombres
+        n_productos = len(nombres)
+        resolucion = self.resolucion
+        estado = self.estadoParaReanudar("eventos", reanuda)
+        # (la tolerancia evita un periodo de más por el redondeo de resoluciones como 0.1)
+        n_ticks = int(np.ceil(self.tiempo / resolucion - 1e-9))
+
+        cantidad_del_producto = self.catalogo.cantidad
+        solicitadas = self.catalogo.solicitados
+        if(estado is None):
+            precios = self.catalogo.precio
+            no_satisfechas = self.catalogo.arreglo(self.CANTIDADES_NO_SATISFECHAS)
+            # Llegadas de cada producto en el periodo de precio actual y productos cuyo agotamiento ya se agendó
+            llegadas_periodo = np.zeros(n_productos, dtype=np.int64)
+            agotado = np.zeros(n_productos, dtype=bool)
+            # Pool de clientes extemporáneos
+            CLIENTES_EXTEMPORANEOS = self.simulaClientesExtemporaneos()
+
+            # Se agenda la primera llegada de cada producto y el primer reporte
+            agenda = AgendaEventos()
+            for k, producto in enumerate(nombres):
+                llegada = siguienteLlegada(self.flujos.generador("llegadas", k), self.tasas_nuevos_clientes[producto], 0.0, self.tiempo)
+                if(llegada is not None):
+                    agenda.agenda(llegada, "llegada", k)
+            if(n_ticks > 0):
+                agenda.agenda(resolucion, "reporte")
+            tick = 0
+        else:
+            # Al reanudar, la agenda guardada ya tiene las llegadas pendientes y el siguiente reporte
+            precios, no_satisfechas, llegadas_periodo, agotado, agenda, tick = (estado[llave] for llave in ["precios", "no_satisfechas", "llegadas_periodo", "agotado", "agenda", "tick"])
+            CLIENTES_EXTEMPORANEOS = self.CLIENTES_EXTEMPORANEOS
+        tam_pool = len(CLIENTES_EXTEMPORANEOS)
+        tabla_cantidades = self.tablaCantidades(CLIENTES_EXTEMPORANEOS).tolist()
+        clusters = CLIENTES_EXTEMPORANEOS.clusters.tolist()
+        clientes_i = np.zeros(n_productos, dtype=np.int64)
+        nuevos_productos_i = np.zeros(n_productos, dtype=np.int64)
+        descuentos_i = np.zeros(n_productos, dtype=np.int64)
+        no_satisfecha_i = np.zeros(n_productos, dtype=np.int64)
+        # Contadores de la instrumentación (se reportan al cierre de cada periodo)
+        compras, rechazos, actualizaciones = 0, 0, 0
+
+        while(len(agenda) > 0):
+            t, tipo, k = agenda.siguiente()
+            if(tipo == "llegada"):
+                producto = nombres[k]
+                # Se agenda la siguiente llegada del producto
+                llegada = siguienteLlegada(self.flujos.generador("llegadas", k), self.tasas_nuevos_clientes[producto], t, self.tiempo)
+                if(llegada is not None):
+                    agenda.agenda(llegada, "llegada", k)
+                if(tam_pool == 0):
+                    continue
+                # La primera llegada del periodo agenda la actualización del precio al cierre del periodo
+                if(llegadas_periodo[k] == 0):
+                    agenda.agenda((t // resolucion + 1) * resolucion, "precio", k)
+                llegadas_periodo[k] += 1
+                clientes_i[k] += 1
+
+                if(solicitadas[k] >= cantidad_del_producto[k]):
+                    # Producto agotado: solo se suma la demanda no satisfecha (sin su descuento); el cliente solo se muestrea con segmentación,
+                    # porque entonces su cluster da el límite de la cantidad
+                    cluster = 0 if self.segmentacion is None else clusters[self.flujos.generador("muestreo_extemporaneos", k).integers(0, tam_pool)]
+                    no_satisfecha_i[k] += self.flujos.generador("cantidades_tiempo", k).integers(0, tabla_cantidades[cluster][k])
+                    rechazos += 1
+                    continue
+                # El cliente se muestrea del pool y solicita una cantidad uniforme discreta de 0 a cantidad_promedio[producto] (ajustada a su cluster)
+                cliente = self.flujos.generador("muestreo_extemporaneos", k).integers(0, tam_pool)
+                cantidad = self.flujos.generador("cantidades_tiempo", k).integers(0, tabla_cantidades[clusters[cliente]][k])
+                if(solicitadas[k] + cantidad <= cantidad_del_producto[k]):
+                    compras += 1
+                    descuento, tipo_descuento = self.descuentos.individual(k, self.flujos.generador("descuentos_tiempo", k))
+                    CLIENTES_EXTEMPORANEOS.agregaCompras([cliente], k, [cantidad], [np.nan if tipo_descuento is None else descuento])
+                    self.DESCUENTOS_APLICADOS.registra(k, cantidad * (1 - descuento))
+                    solicitadas[k] += cantidad
+                    nuevos_productos_i[k] += cantidad
+                    if(tipo_descuento is not None):
+                        self.METODOS_DESCUENTO[tipo_descuento] = self.METODOS_DESCUENTO.get(tipo_descuento, 0) + 1
+                    if(descuento != 0):
+                        descuentos_i[k] += 1
+                    agota = solicitadas[k] >= cantidad_del_producto[k]
+                else:
+                    # Si no hay suficiente producto, no se le vende al cliente
+                    no_satisfecha_i[k] += cantidad
+                    rechazos += 1
+                    agota = True
+                if(agota and not agotado[k]):
+                    agotado[k] = True
+                    agenda.agenda(t, "agotamiento", k)
+            elif(tipo == "precio"):
+                # Se actualiza el precio con las llegadas del periodo, siempre y cuando sea mayor o igual al límite inferior (sin bajar del límite)
+                precios[k], actualizado = self.precios.actualizaProducto(k, precios[k], llegadas_periodo[k])
+                actualizaciones += actualizado
+                llegadas_periodo[k] = 0
+            elif(tipo == "agotamiento"):
+                self.AGOTAMIENTOS.marca(t, k)
+            else:
+                # Estado al cierre del periodo
+                tick += 1
+                self.instrumentacion.cuenta("llegadas", clientes_i.sum())
+                self.instrumentacion.cuenta("compras", compras)
+                self.instrumentacion.cuenta("agotamientos", rechazos)
+                self.instrumentacion.cuenta("actualizaciones_precio", actualizaciones)
+                compras, rechazos, actualizaciones = 0, 0, 0
+                # La demanda no satisfecha del periodo se registra una sola vez por producto
+                no_satisfechas += no_satisfecha_i
+                self.AGOTAMIENTOS.registraLote(tick * resolucion, no_satisfecha_i)
+                no_satisfecha_i = np.zeros(n_productos, dtype=np.int64)
+                with self.instrumentacion.fase("ingresos"):
+                    ingresos_x_producto = self.DESCUENTOS_APLICADOS.ingresos(precios)[1]
+                reporte = {
+                    "tiempo": tick * resolucion,
+                    "productos": nombres,
+                    "cantidades_solicitadas": nuevos_productos_i,
+                    "precios": precios.copy(),
+                    "ingresos_x_producto": ingresos_x_producto,
+                    "ingresos": float(ingresos_x_producto.sum()),
+                    "clientes_nuevos": clientes_i,
+                    "descuentos": descuentos_i,
+                }
+                # Los acumulados del periodo empiezan en cero y se agenda el siguiente reporte antes de regresar el estado,
+                # así el estado del motor al cierre del periodo está completo
+                clientes_i = np.zeros(n_productos, dtype=np.int64)
+                nuevos_productos_i = np.zeros(n_productos, dtype=np.int64)
+                descuentos_i = np.zeros(n_productos, dtype=np.int64)
+                if(tick < n_ticks):
+                    agenda.agenda((tick + 1) * resolucion, "reporte")
+                self.estado_motor = {"engine": "eventos", "tick": tick, "precios": precios, "no_satisfechas": no_satisfechas, "llegadas_periodo": llegadas_periodo, "agotado": agotado, "agenda": agenda}
+                yield reporte
+
+        # Regresamos los resultados a las estructuras de la simulación
+        self.eventos_atendidos = agenda.atendidos
+        self.instrumentacion.cuenta("eventos", agenda.atendidos)
+        with self.instrumentacion.fase("dataframe"):
+            self.catalogo.escribeEnDataFrame(self.productos)
+        for k, producto in enumerate(nombres):
+            self.CANTIDADES_SOLICITADAS[producto] = int(solicitadas[k])
+            self.CANTIDADES_NO_SATISFECHAS[producto] = int(no_satisfechas[k])
+
+    # Método que define el pool de clientes extemporáneos que tienen una probabilidad positiva de comprar productos 
+    # (el pool fijo, si se indicó en el constructor, o uno simulado con tasa_tota_nuevos_clientes)
+    def simulaClientesExtemporaneos(self): 
+        if(self.clientes_extemporaneos is not None):
+            self.CLIENTES_EXTEMPORANEOS = self.clientes_extemporaneos
+        else:
+            with self.instrumentacion.fase("clientes_extemporaneos"):
+                self.CLIENTES_EXTEMPORANEOS = simulaPoblacionClientes(self.tasa_tota_nuevos_clientes, self.catalogo.nombres, self.flujos.generador("clientes_extemporaneos"), self.segmentacion)
+        return self.CLIENTES_EXTEMPORANEOS
+
+    # Método que construye la tabla del límite de la cantidad uniforme que solicita un cliente por cluster (renglón) y producto (columna)
+    # Sin segmentación todos los renglones son cantidad_promedio; con segmentación los clusters aprendidos usan su perfil de cantidades
+    def tablaCantidades(self, poblacion):
+        cantidad_promedio = self.catalogo.arreglo(self.cantidad_promedio, dtype=int)
+        n_etiquetas = int(poblacion.clusters.max()) + 1 if len(poblacion) > 0 else 1
+        if(self.segmentacion is None):
+            return np.tile(cantidad_promedio, (n_etiquetas, 1))
+        return self.segmentacion.tablaCantidades(self.catalogo.nombres, cantidad_promedio, n_etiquetas)
+
+    # Método que regresa el límite de la cantidad uniforme de los clientes (índices del pool) de un producto agotado
+    # Es la misma tabla que en las compras, indexada por el cluster de cada cliente; sin segmentación todos los renglones
+    # son iguales y basta el límite del producto (así no hace falta muestrear a los clientes)
+    def limitesNoSatisfechos(self, tabla_cantidades, clusters, clientes, k):
+        if(self.segmentacion is None):
+            return tabla_cantidades[0][k]
+        return np.array([tabla_cantidades[clusters[cliente]][k] for cliente in clientes], dtype=np.int64)
+
+    # Método que construye el resultado estructurado con el estado actual de la simulación 
+    def resultado(self): 
+        series = None
+        if(getattr(self, "ingresos_en_tiempo", None) is not None):
+            series = {
+                "cantidades_solicitadas_en_tiempo": self.cantidades_solicitadas_en_tiempo,
+                "precios_por_producto_en_tiempo": self.precios_por_producto_en_tiempo,
+                "ingresos_por_producto_en_tiempo": self.ingresos_por_producto_en_tiempo,
+                "ingresos_en_tiempo": self.ingresos_en_tiempo,
+                "clientes_nuevos_tiempo": self.clientes_nuevos_tiempo,
+                "cantidad_de_descuentos_aplicados_tiempo": self.cantidad_de_descuentos_aplicados_tiempo,
+            }
+        return SimulationResult(self.productos.copy(), self.limites_inferiores, self.ingresos, dict(self.ingresos_x_producto), dict(self.CANTIDADES_SOLICITADAS), dict(self.CANTIDADES_NO_SATISFECHAS), dict(self.METODOS_DESCUENTO), self.espacio, self.peso_total, series, self.instrumentacion.aDiccionario(), self.AGOTAMIENTOS.copia(), self.plan_carga)
 
     # Main Simulation
-    def run(self, tiempo_bool = True, tiempo_cero = True):
+    # @param engine (str) motor de la segunda dinámica: "clasico" (cliente por cliente), "vectorizado" (en bloque por minuto) o "eventos" (eventos discretos)
+    # @param mostrar (bool) indica si se despliegan las gráficas y mensajes de la simulación (False no construye gráficas ni escribe en consola)
+    # @param salida (EscritorTicks) escritor al que se agrega el estado de cada minuto de la dinámica en el tiempo (opcional)
+    # @param guardar_series (bool) indica si se guardan en memoria las series de tiempo (sin series no se grafica la dinámica en el tiempo)
+    # @param punto_control (PuntoControl) guarda periódicamente la simulación durante la dinámica en el tiempo (ver Checkpoints)
+    # @return (SimulationResult) resultado de la última dinámica simulada
+    def run(self, tiempo_bool = True, tiempo_cero = True, engine = "clasico", mostrar = True, salida = None, guardar_series = True, punto_control = None):
         # Ejecutamos la primera simulación en el tiempo 
-        self.simulaPrimeraDinamica(tiempo_cero)
+        resultado = self.simulaPrimeraDinamica(tiempo_cero)
+        if(mostrar and tiempo_cero):
+            with self.instrumentacion.fase("graficas"):
+                resultado.grafica()
         if(tiempo_bool): 
             # Mostramos los resultados de la simulación en el tiempo 
-            self.simulaSegundaDinamica_tiempo()
-            
\ No newline at end of file
+            if(engine == "clasico"):
+                resultado = self.simulaSegundaDinamica_tiempo(salida, guardar_series, punto_control)
+            elif(engine in ("vectorizado", "vectorized")):
+                resultado = self.simulaSegundaDinamica_vectorizada(salida, guardar_series, punto_control)
+            elif(engine == "eventos"):
+                resultado = self.simulaSegundaDinamica_eventos(salida, guardar_series, punto_control)
+            else:
+                raise ValueError(f'Motor de simulación desconocido: {engine}')
+            if(mostrar and guardar_series):
+                with self.instrumentacion.fase("graficas"):
+                    resultado.grafica()
+        # La instrumentación del resultado incluye el tiempo de las gráficas
+        self.instrumentacion.termina()
+        resultado.instrumentacion = self.instrumentacion.aDiccionario()
+        return resultado
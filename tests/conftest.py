@@ -0,0 +1,64 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Los módulos de Colmena están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Query pequeña con inventario limitado (los productos se agotan durante la dinámica en el tiempo)
+def construyeQuery(tiempo = 40, semilla = 1):
+    rs = np.random.RandomState(semilla)
+    nombres = ['Frijoles', 'Leche', 'Cereal', 'Arroz']
+    productos = pd.DataFrame({
+        'Id': np.arange(len(nombres)),
+        'Nombre': nombres,
+        'precio': rs.randint(10, 30, len(nombres)).astype(float),
+        'peso': rs.randint(5, 20, len(nombres)),
+        'dimensiones': rs.randint(1, 10, len(nombres)),
+        'cantidad': rs.randint(150, 300, len(nombres)),
+        'demanda_clientes': rs.poisson(60, len(nombres)),
+        'productos_solicitados': 0,
+    })
+    return {
+        "tasa_clientes_compran": 80, "forma_a": 3, "forma_b": 6,
+        "cantidad_promedio": {p: 5 for p in nombres},
+        "tasa_clientes_compran_nuevos": 2,
+        "tasas_nuevos_clientes": {p: 1 + i for i, p in enumerate(nombres)},
+        "tiempo": tiempo, "tasa_tota_nuevos_clientes": 40,
+        "limites_inferiores": {p: precio * 0.9 for p, precio in zip(nombres, productos['precio'])},
+        "productos": productos,
+    }
+
+
+@pytest.fixture
+def query():
+    return construyeQuery()
+
+
+# Campos de un resultado que deben coincidir entre dos corridas equivalentes
+def firmaResultado(resultado):
+    firma = [resultado.CANTIDADES_SOLICITADAS, resultado.CANTIDADES_NO_SATISFECHAS, resultado.METODOS_DESCUENTO, float(resultado.ingresosFinales()[0])]
+    if(resultado.tieneSeries()):
+        firma += [resultado.cantidades_solicitadas_en_tiempo, resultado.precios_por_producto_en_tiempo, [float(v) for v in resultado.ingresos_en_tiempo]]
+    return firma
+
+
+# La misma query como la recibe Consultas.validaQuery (JSON): productos como registros y una ruta en lugar de tiempo
+def construyeQueryJSON(semilla = 1):
+    import json
+    query = construyeQuery(semilla = semilla)
+    del query["tiempo"]
+    nombres = list(query["productos"]["Nombre"])
+    query["productos"] = json.loads(query["productos"].to_json(orient = "records"))
+    query["ruta"] = ["a", "c"]
+    query["rutas"] = [["a", "b", 3.0], ["b", "c", 4.5]]
+    query["segmentacion"] = {
+        "nombres_productos": nombres,
+        "proporciones": [0.25, 0.75],
+        "perfil_cantidades": [[8, 2, 4, 4], [2, 6, 4, 0]],
+        "cantidad_global": [4, 5, 4, 4],
+    }
+    return query
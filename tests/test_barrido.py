@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import construyeQuery
+from Barrido import llaveQuery, barrido, CacheResultados
+from Segmentacion import Segmentacion
+from Rutas import MatrizDistancias
+
+
+def segmentacion(proporciones):
+    return Segmentacion(None, ["a", "b"], None, np.array(proporciones), np.array([[1.0, 2.0], [3.0, 4.0]]), np.ones(2))
+
+
+def test_misma_query_misma_llave():
+    assert llaveQuery(construyeQuery(), {"n": 3}) == llaveQuery(construyeQuery(), {"n": 3})
+
+
+@pytest.mark.parametrize("cambio", [
+    {"forma_a": 4},
+    {"cantidad_promedio": {"Frijoles": 6, "Leche": 5, "Cereal": 5, "Arroz": 5}},
+    {"curva_precio": "exponencial"},
+])
+def test_queries_distintas_llaves_distintas(cambio):
+    query = construyeQuery()
+    assert llaveQuery(query) != llaveQuery(dict(query, **cambio))
+
+
+def test_llave_por_contenido_de_productos_y_extras():
+    query = construyeQuery()
+    otra = construyeQuery()
+    otra["productos"].loc[2, "cantidad"] += 1
+    assert llaveQuery(query) != llaveQuery(otra)
+    assert llaveQuery(query, {"semilla": 1}) != llaveQuery(query, {"semilla": 2})
+
+
+def test_dataframes_por_contenido_y_no_por_texto():
+    query = construyeQuery()
+    # Un dataframe grande se incluye completo (str lo trunca)
+    camiones = pd.DataFrame({"capacidad": np.arange(200)})
+    otros = camiones.copy()
+    otros.loc[100, "capacidad"] = -1
+    assert str(camiones) == str(otros)
+    assert llaveQuery(dict(query, camiones = camiones)) != llaveQuery(dict(query, camiones = otros))
+
+
+def test_segmentaciones_por_contenido_y_no_por_texto():
+    query = construyeQuery()
+    # Dos segmentaciones con las mismas proporciones redondeadas (mismo str) son escenarios distintos
+    a, b = segmentacion([0.5, 0.5]), segmentacion([0.5000001, 0.4999999])
+    assert str(a) == str(b)
+    assert llaveQuery(dict(query, segmentacion = a)) != llaveQuery(dict(query, segmentacion = b))
+
+
+def test_llave_de_la_matriz_de_distancias():
+    query = construyeQuery()
+    # La llave de la matriz de distancias depende del grafo y no cambia con sus contadores
+    rutas = MatrizDistancias([("a", "b", 3.0), ("b", "c", 4.0)], directorio = None)
+    llave = llaveQuery(dict(query, rutas = rutas))
+    rutas.tiempo("a", "c")
+    assert llaveQuery(dict(query, rutas = rutas)) == llave
+    assert llaveQuery(dict(query, rutas = MatrizDistancias([("a", "b", 3.0), ("b", "c", 5.0)], directorio = None))) != llave
+
+
+def test_valores_sin_llave_estable():
+    with pytest.raises(TypeError):
+        llaveQuery(dict(construyeQuery(), curva_precio = lambda precios, llegadas: precios))
+
+
+def curvaFija(precios, llegadas):
+    return precios
+
+
+def test_barrido_sin_llave_no_usa_la_cache(tmp_path):
+    # Una curva de precio que es una función no tiene llave estable: el punto se simula sin fallar el barrido y sin guardarse
+    cache = CacheResultados(str(tmp_path))
+    query = dict(construyeQuery(tiempo = 10), curva_precio = curvaFija)
+    primero = barrido(query, {"forma_a": [2]}, n = 2, workers = 1, semilla = 0, cache = cache)
+    segundo = barrido(query, {"forma_a": [2]}, n = 2, workers = 1, semilla = 0, cache = cache)
+    assert [p["en_cache"] for p in primero + segundo] == [False, False]
+    assert primero[0]["resumen"]["replicas"] == segundo[0]["resumen"]["replicas"]
+    assert len(cache) == 0
+
+
+def test_barrido_usa_la_cache(tmp_path):
+    cache = CacheResultados(str(tmp_path))
+    rangos = {"forma_a": [2, 4]}
+    primero = barrido(construyeQuery(tiempo = 10), rangos, n = 2, workers = 1, semilla = 0, cache = cache)
+    segundo = barrido(construyeQuery(tiempo = 10), rangos, n = 2, workers = 1, semilla = 0, cache = cache)
+    assert [p["en_cache"] for p in primero] == [False, False]
+    assert [p["en_cache"] for p in segundo] == [True, True]
+    assert [p["resumen"]["replicas"] for p in primero] == [p["resumen"]["replicas"] for p in segundo]
+    assert primero[0]["resumen"]["replicas"] != primero[1]["resumen"]["replicas"]
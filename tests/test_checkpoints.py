@@ -0,0 +1,33 @@
+import pytest
+from conftest import construyeQuery, firmaResultado
+from Simulacion import Simulacion
+from Salida import EscritorTicks
+from Checkpoints import PuntoControl, reanuda, corraRamas
+
+
+@pytest.mark.parametrize("engine", ["clasico", "vectorizado", "eventos"])
+def test_reanudar_coincide_con_corrida_sin_interrupciones(engine, tmp_path):
+    salida = EscritorTicks(str(tmp_path / "completa.csv"), "csv")
+    completa = Simulacion(construyeQuery(), 7).run(engine = engine, mostrar = False, salida = salida)
+    salida.cierra()
+
+    # La corrida con puntos de control se "interrumpe" después de terminar y se reanuda desde el último punto guardado
+    punto_control = PuntoControl(str(tmp_path / "simulacion.pkl.gz"), cada = 15)
+    salida = EscritorTicks(str(tmp_path / "reanudada.csv"), "csv")
+    Simulacion(construyeQuery(), 7).run(engine = engine, mostrar = False, salida = salida, punto_control = punto_control)
+    salida.cierra()
+    assert punto_control.guardados > 0
+    reanudada = reanuda(punto_control.ruta)
+
+    assert firmaResultado(reanudada) == firmaResultado(completa)
+    assert reanudada.productos.equals(completa.productos)
+    assert (tmp_path / "reanudada.csv").read_text() == (tmp_path / "completa.csv").read_text()
+
+
+def test_rama_sin_cambios_repite_la_dinamica():
+    simulacion = Simulacion(construyeQuery(), 7)
+    simulacion.simulaPrimeraDinamica(True)
+    ramas = corraRamas(simulacion, [{}, {"semilla": 3}], workers = 1, guardar_series = True)
+    referencia = Simulacion(construyeQuery(), 7).run(engine = "vectorizado", mostrar = False)
+    assert firmaResultado(ramas[0]) == firmaResultado(referencia)
+    assert firmaResultado(ramas[1]) != firmaResultado(referencia)
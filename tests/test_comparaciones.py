@@ -0,0 +1,10 @@
+from conftest import construyeQuery
+from Comparaciones import comparaEscenarios
+
+
+def test_crn_reduce_la_varianza_de_la_diferencia():
+    query = construyeQuery(tiempo = 30)
+    variantes = {"base": {}, "piso": {"limites_inferiores": {producto: limite * 0.8 for producto, limite in query["limites_inferiores"].items()}}}
+    independiente = comparaEscenarios(query, variantes, n = 12, metodo = "independiente", workers = 1, semilla = 1, control = False, inversion = False)
+    crn = comparaEscenarios(query, variantes, n = 12, metodo = "crn", workers = 1, semilla = 1, control = False, inversion = True)
+    assert crn["diferencias"]["piso"]["varianza"] < independiente["diferencias"]["piso"]["varianza"]
@@ -0,0 +1,47 @@
+import json
+import pytest
+from conftest import construyeQueryJSON
+from Consultas import validaQuery, validaMotor
+from Corridas import corraQuery
+from Segmentacion import Segmentacion
+
+
+def test_query_con_ruta_segmentacion_y_tasas_por_tramo():
+    datos = construyeQueryJSON()
+    datos["tasas_nuevos_clientes"]["Leche"] = [0, 4, 1]
+    query = validaQuery(datos)
+    assert "tiempo" not in query and query["ruta"] == ("a", "c")
+    assert list(query["rutas"].columns) == ["origen", "destino", "minutos"]
+    assert isinstance(query["segmentacion"], Segmentacion) and query["segmentacion"].aDiccionario() == datos["segmentacion"]
+    assert validaMotor(query, "eventos") == "eventos"
+    with pytest.raises(ValueError):
+        validaMotor(query, "vectorizado")
+
+
+@pytest.mark.parametrize("cambio", [
+    {"ruta": None},
+    {"ruta": ["a", "z"]},
+    {"rutas": [["a", "b", -1]]},
+    {"segmentacion": {"proporciones": [1.0]}},
+])
+def test_query_con_ruta_invalida(cambio):
+    datos = construyeQueryJSON()
+    datos.update(cambio)
+    with pytest.raises(ValueError):
+        validaQuery(datos)
+
+
+def test_corrida_con_rutas_en_un_csv_relativo(tmp_path):
+    datos = construyeQueryJSON()
+    datos["tasas_nuevos_clientes"]["Leche"] = [0, 4, 1]
+    datos["rutas"] = "aristas.csv"
+    datos["cache_rutas"] = "cache"
+    (tmp_path / "aristas.csv").write_text("origen,destino,minutos\na,b,3\nb,c,4.5\n")
+    (tmp_path / "query.json").write_text(json.dumps(datos))
+    with pytest.raises(ValueError):
+        corraQuery(str(tmp_path / "query.json"), str(tmp_path / "salida"), engine = "vectorizado", semilla = 3)
+    resumen = corraQuery(str(tmp_path / "query.json"), str(tmp_path / "salida"), engine = "eventos", semilla = 3)
+    assert resumen["ingresos"] > 0
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    with open(tmp_path / "salida" / "resultado.json", encoding = "utf-8") as archivo:
+        assert set(json.load(archivo)["CANTIDADES_SOLICITADAS"]) == set(datos["cantidad_promedio"])
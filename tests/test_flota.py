@@ -0,0 +1,31 @@
+import numpy as np
+from conftest import construyeQuery, firmaResultado
+from Flota import Flota
+from Segmentacion import Segmentacion
+
+
+def construyeFlota(query):
+    flota = Flota({"norte": {"tasa_tota_nuevos_clientes": 60}})
+    flota.agregaCamion("a", query, "norte")
+    flota.agregaCamion("b", construyeQuery(semilla = 2), "norte")
+    return flota
+
+
+def test_misma_semilla_misma_flota():
+    semilla = np.random.SeedSequence(4)
+    a = construyeFlota(construyeQuery()).run(workers = 1, semilla = semilla)
+    b = construyeFlota(construyeQuery()).run(workers = 1, semilla = semilla)
+    assert [firmaResultado(r) for r in a["camiones"].values()] == [firmaResultado(r) for r in b["camiones"].values()]
+    # Por defecto los camiones no guardan sus series de tiempo
+    assert not any(r.tieneSeries() for r in a["camiones"].values())
+
+
+def test_pool_regional_usa_la_segmentacion_de_la_query():
+    nombres = ['Frijoles', 'Leche', 'Cereal', 'Arroz']
+    query = construyeQuery()
+    # Todos los clientes en el cluster 2
+    query["segmentacion"] = Segmentacion(None, nombres, None, np.array([0.0, 1.0]), np.ones((2, 4)), np.ones(4))
+    flota = Flota({"norte": {"tasa_tota_nuevos_clientes": 60}})
+    flota.agregaCamion("a", query, "norte")
+    regiones = flota.run(workers = 1, semilla = 1)["regiones"]
+    assert set(regiones["norte"].clusters.tolist()) == {2}
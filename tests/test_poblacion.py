@@ -0,0 +1,54 @@
+import numpy as np
+from PoblacionClientes import PoblacionClientes
+from Segmentacion import segmentaClientes, lotesCanastas
+from Descuentos import MotorDescuentos
+
+
+def construyePoblacion(n = 300, m = 200, semilla = 0):
+    rng = np.random.default_rng(semilla)
+    poblacion = PoblacionClientes(rng.integers(1, 5, n), ["a", "b", "c"])
+    for k in range(3):
+        for _ in range(2):
+            clientes = rng.choice(n, m, replace = False)
+            descuentos = np.where(rng.random(m) < 0.5, np.nan, rng.random(m))
+            poblacion.agregaCompras(clientes, k, rng.integers(1, 5, m), descuentos)
+    return poblacion
+
+
+def test_cliente_tiene_todas_sus_compras():
+    poblacion = construyePoblacion()
+    clientes, productos, cantidades, _ = [arreglo.copy() for arreglo in poblacion.compras()]
+    for i in [0, 17, 299]:
+        esperadas = {}
+        for producto, cantidad in zip(productos[clientes == i], cantidades[clientes == i]):
+            nombre = poblacion.nombres_productos[producto]
+            esperadas[nombre] = esperadas.get(nombre, 0) + int(cantidad)
+        assert poblacion.cliente(i).productos == esperadas
+    # Las compras registradas después de ordenar también aparecen
+    antes = poblacion.cliente(5).productos.get("a", 0)
+    poblacion.agregaCompras([5], 0, [7])
+    assert poblacion.cliente(5).productos["a"] == antes + 7
+    assert len(list(poblacion)) == len(poblacion)
+
+
+def test_canasta_por_bloques_igual_a_la_canasta_completa():
+    poblacion = construyePoblacion()
+    completa = poblacion.canasta()
+    bloques = [poblacion.canastaDeClientes(inicio, min(inicio + 64, len(poblacion))) for inicio in range(0, len(poblacion), 64)]
+    for i in range(4):
+        assert np.array_equal(completa[i], np.concatenate([bloque[i] for bloque in bloques]), equal_nan = True)
+
+
+def test_segmentacion_por_bloques():
+    poblacion = construyePoblacion(2000, 900)
+    segmentacion = segmentaClientes(poblacion, 3, tam_lote = 256, rng = np.random.default_rng(1))
+    assert segmentacion.proporciones.sum() == 1
+    assert sum(len(clientes) for clientes, _ in lotesCanastas(poblacion, 256)) == np.count_nonzero(segmentacion.etiquetas)
+
+
+def test_descuentos_en_lote_no_dependen_de_la_tabla_estatica():
+    motor = MotorDescuentos(3, 6, ["a", "b", "c"], {"a": 0.2})
+    sin_estaticos, con_estaticos = np.random.default_rng(1), np.random.default_rng(1)
+    motor.lote(np.array([1, 2, 1]), sin_estaticos)
+    motor.lote(np.array([0, 2, 1]), con_estaticos)
+    assert sin_estaticos.random() == con_estaticos.random()
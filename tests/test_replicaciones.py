@@ -0,0 +1,41 @@
+import numpy as np
+from Replicaciones import run_replications, run_adaptive_replications
+
+
+def test_workers_no_cambian_las_replicas(query):
+    secuencial = run_replications(query, 4, workers = 1, semilla = 3)
+    paralelo = run_replications(query, 4, workers = 2, semilla = 3)
+    assert secuencial["replicas"] == paralelo["replicas"]
+    assert secuencial["ingresos"]["media"] == paralelo["ingresos"]["media"]
+
+
+def test_semilla_del_usuario_no_se_modifica(query):
+    semilla = np.random.SeedSequence(5)
+    a = run_replications(query, 3, workers = 1, semilla = semilla)
+    b = run_replications(query, 3, workers = 1, semilla = semilla)
+    assert semilla.n_children_spawned == 0
+    assert a["replicas"] == b["replicas"]
+
+
+def test_adaptativas_coinciden_con_run_replications(query):
+    adaptativas = run_adaptive_replications(query, {"ingresos": 1e-6}, n_min = 3, lote = 2, n_max = 7, workers = 1, semilla = 11)
+    assert adaptativas["motivo"] == "presupuesto"
+    fijas = run_replications(query, len(adaptativas["replicas"]), workers = 1, semilla = 11)
+    assert adaptativas["replicas"] == fijas["replicas"]
+
+
+def test_replicas_necesarias_cuenta_el_ultimo_alcance(query, monkeypatch):
+    import Replicaciones
+    # ingresos alcanza su objetivo, lo pierde y lo vuelve a alcanzar; la otra métrica mantiene las réplicas corriendo
+    secuencia = iter([(True, False), (False, False), (True, False), (True, True)])
+    revisa = Replicaciones.revisaObjetivos
+
+    def revisaForzado(*args):
+        estado = revisa(*args)
+        estado["ingresos"]["alcanzado"], estado["METODOS_DESCUENTO.Cupón"]["alcanzado"] = next(secuencia)
+        return estado
+    monkeypatch.setattr(Replicaciones, "revisaObjetivos", revisaForzado)
+    resumen = run_adaptive_replications(query, {"ingresos": 0.5, "METODOS_DESCUENTO.Cupón": 0.5}, n_min = 2, lote = 1, n_max = 50, workers = 1, semilla = 1)
+    assert resumen["lotes"] == [2, 3, 4, 5]
+    assert resumen["objetivos"]["ingresos"]["replicas_necesarias"] == 4
+    assert resumen["objetivos"]["METODOS_DESCUENTO.Cupón"]["replicas_necesarias"] == 5
@@ -0,0 +1,33 @@
+import os
+from conftest import construyeQuery
+from Simulacion import Simulacion
+from Rutas import MatrizDistancias
+
+ARISTAS = [("a", "b", 3.0), ("b", "c", 4.5)]
+
+
+def queryConRuta():
+    query = construyeQuery()
+    del query["tiempo"]
+    query["ruta"] = ("a", "c")
+    query["rutas"] = ARISTAS
+    return query
+
+
+def test_tiempo_de_ruta_sin_cache_en_disco(tmp_path, monkeypatch):
+    # Por defecto la matriz de distancias solo vive en memoria: no se escribe nada en el directorio de trabajo
+    monkeypatch.chdir(tmp_path)
+    assert Simulacion(queryConRuta(), 1).tiempo == 8
+    assert MatrizDistancias(ARISTAS).ruta_cache is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_cache_de_rutas_en_el_directorio_de_la_query(tmp_path):
+    query = queryConRuta()
+    query["cache_rutas"] = str(tmp_path / "rutas")
+    Simulacion(query, 1)
+    assert len(os.listdir(tmp_path / "rutas")) == 1
+    # Otra matriz con el mismo grafo y directorio sirve el origen de la caché sin calcularlo
+    rutas = MatrizDistancias(ARISTAS, str(tmp_path / "rutas"))
+    assert rutas.tiempo("a", "c") == 7.5
+    assert (rutas.aciertos, rutas.calculados) == (1, 0)
@@ -0,0 +1,33 @@
+import asyncio
+from conftest import construyeQueryJSON
+from Consultas import validaQuery
+from Servicio import ServicioSimulacion, solicita
+from Simulacion import Simulacion
+
+
+# Inicia el servicio en un puerto libre de localhost y hace las solicitudes desde otro hilo (solicita es síncrono)
+def solicitaAlServicio(solicitudes):
+    async def corre():
+        async with ServicioSimulacion(workers = 1) as servicio:
+            await servicio.inicia(puerto = 0)
+            respuestas = []
+            for solicitud in solicitudes:
+                try:
+                    respuestas.append(await asyncio.to_thread(solicita, solicitud, puerto = servicio.puerto, timeout = 60))
+                except RuntimeError as error:
+                    respuestas.append(error)
+            return respuestas
+    return asyncio.run(corre())
+
+
+def test_servicio_simula_una_query_con_ruta_y_segmentacion():
+    datos = construyeQueryJSON()
+    datos["tasas_nuevos_clientes"]["Leche"] = [0, 4, 1]
+    solicitud = {"query": datos, "engine": "eventos", "semilla": 5}
+    primera, segunda, rechazada = solicitaAlServicio([solicitud, solicitud, dict(solicitud, engine = "vectorizado")])
+    # El resultado del servicio es el mismo que el de la simulación directa con la query validada
+    esperado = Simulacion(validaQuery(datos), 5).run(engine = "eventos", mostrar = False)
+    assert primera["resultado"]["CANTIDADES_SOLICITADAS"] == {producto: int(valor) for producto, valor in esperado.CANTIDADES_SOLICITADAS.items()}
+    assert primera["resultado"] == segunda["resultado"]
+    assert segunda["en_cache"] and segunda["llave"] == primera["llave"]
+    assert isinstance(rechazada, RuntimeError) and str(rechazada).startswith("400")
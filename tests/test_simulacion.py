@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from conftest import construyeQuery, firmaResultado
+from Simulacion import Simulacion
+from AlgoritmosAuxiliares import atiendeEnOrden
+from Segmentacion import Segmentacion
+
+MOTORES = ["clasico", "vectorizado", "eventos"]
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_misma_semilla_mismo_resultado(engine):
+    a = Simulacion(construyeQuery(), 7).run(engine = engine, mostrar = False)
+    b = Simulacion(construyeQuery(), 7).run(engine = engine, mostrar = False)
+    assert firmaResultado(a) == firmaResultado(b)
+    assert a.productos.equals(b.productos)
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_semillas_distintas_resultados_distintos(engine):
+    a = Simulacion(construyeQuery(), 7).run(engine = engine, mostrar = False)
+    b = Simulacion(construyeQuery(), 8).run(engine = engine, mostrar = False)
+    assert firmaResultado(a) != firmaResultado(b)
+
+
+def test_atiende_en_orden_sigue_con_pedidos_menores():
+    # Un cliente rechazado no impide atender a los siguientes que piden menos (como el motor clásico)
+    assert atiendeEnOrden(np.array([6, 1, 1, 0]), 5).tolist() == [False, True, True, True]
+    # Con el inventario agotado ya no se atiende a nadie, ni a quien pide 0
+    assert atiendeEnOrden(np.array([3, 0, 2, 0]), 5).tolist() == [True, True, True, False]
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_agotamiento_con_segmentacion_usa_tabla_por_cluster(engine):
+    # Cluster 1 pide hasta 31 unidades y cluster 2 a lo más 1: la demanda no satisfecha por llegada sigue la mezcla de clusters
+    nombres = ['Frijoles', 'Leche', 'Cereal', 'Arroz']
+    segmentacion = Segmentacion(None, nombres, None, np.array([0.5, 0.5]), np.array([[8.0] * 4, [0.1] * 4]), np.ones(4))
+    no_satisfecha, esperada = 0, 0.0
+    for semilla in range(4):
+        query = construyeQuery(tiempo = 30)
+        query["segmentacion"] = segmentacion
+        query["productos"]["cantidad"] = 5
+        simulacion = Simulacion(query, semilla)
+        resultado = simulacion.run(engine = engine, mostrar = False, tiempo_cero = False, guardar_series = True)
+        tabla = simulacion.tablaCantidades(simulacion.CLIENTES_EXTEMPORANEOS)
+        por_llegada = ((tabla[simulacion.CLIENTES_EXTEMPORANEOS.clusters] - 1) / 2).mean()
+        no_satisfecha += sum(resultado.CANTIDADES_NO_SATISFECHAS.values())
+        esperada += por_llegada * np.sum(resultado.clientes_nuevos_tiempo)
+    assert no_satisfecha == pytest.approx(esperada, rel = 0.1)